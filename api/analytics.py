@@ -28,3 +28,8 @@ async def get_outcome_distribution(days: int = Query(7, ge=1, le=90), db: AsyncS
 @router.get("/agents")
 async def get_agent_performance(days: int = Query(7, ge=1, le=90), db: AsyncSession = Depends(get_db)):
     return await analytics.get_agent_performance(db, days)
+
+
+@router.get("/latency")
+async def get_latency_breakdown(days: int = Query(7, ge=1, le=90), db: AsyncSession = Depends(get_db)):
+    return await analytics.get_latency_breakdown(db, days)
@@ -15,11 +15,17 @@ logger = logging.getLogger("tron.app")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle."""
+    import asyncio
     # Initialize database
     from tron.core.database import init_db
     await init_db()
     logger.info("Tron database initialized")
+
+    # Tail worker-written transcript segments onto the event bus
+    from tron.core.transcripts import relay_segments
+    relay_task = asyncio.create_task(relay_segments())
     yield
+    relay_task.cancel()
     logger.info("Tron shutting down")
 
 
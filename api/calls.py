@@ -1,29 +1,34 @@
 """
 Calls API — individual call management.
 """
+import json
 import uuid
 from typing import List, Optional, Any, Dict
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, desc, inspect
+from sqlalchemy.orm import selectinload, undefer, undefer_group
 
-from tron.core.database import CallModel, AgentModel, get_db
+from tron.core.database import CallModel, AgentModel, CALL_PAYLOAD_FIELDS, get_db
 from tron.core.models import CallResponse, DialRequest
 from tron.core.call_engine import make_outbound_call, hangup_call, get_active_rooms
+from tron.core.transcripts import load_transcript, load_transcripts
+from tron.core.flow_history import current_flow_version
 
 router = APIRouter()
 
 
 def _enrich_call(call: CallModel) -> dict:
-    """Convert CallModel to dict with agent_name and duration alias."""
+    """
+    Convert CallModel to dict with agent_name and duration alias. Payload
+    fields (CALL_PAYLOAD_FIELDS) are included only if the query loaded them.
+    """
     d = {
         "id": call.id,
         "phone_number": call.phone_number,
         "contact_name": call.contact_name,
-        "contact_metadata": call.contact_metadata or {},
         "direction": call.direction,
         "agent_id": call.agent_id,
         "agent_name": call.agent.name if call.agent else None,
@@ -37,19 +42,51 @@ def _enrich_call(call: CallModel) -> dict:
         "talk_time_seconds": call.talk_time_seconds,
         "livekit_room": call.livekit_room,
         "recording_url": call.recording_url,
-        "transcript": call.transcript or [],
-        "summary": call.summary,
         "sentiment": call.sentiment,
         "outcome": call.outcome,
-        "extracted_data": call.extracted_data or {},
         "retry_count": call.retry_count,
         "error_message": call.error_message,
         "cost_estimate": call.cost_estimate,
         "created_at": call.created_at.isoformat() if call.created_at else None,
     }
+    unloaded = inspect(call).unloaded
+    if "contact_metadata" not in unloaded:
+        d["contact_metadata"] = call.contact_metadata or {}
+    if "transcript" not in unloaded:
+        d["transcript"] = call.transcript or []
+    if "summary" not in unloaded:
+        d["summary"] = call.summary
+    if "extracted_data" not in unloaded:
+        d["extracted_data"] = call.extracted_data or {}
     return d
 
 
+def _payload_fields(include: Optional[str]) -> List[str]:
+    """Parse ``?include=transcript,extracted_data`` into payload field names."""
+    fields = [f.strip() for f in (include or "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in CALL_PAYLOAD_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include {', '.join(unknown)}; expected any of {', '.join(CALL_PAYLOAD_FIELDS)}",
+        )
+    return fields
+
+
+def _extracted_data_matches(db: AsyncSession, wanted: Dict[str, Any]):
+    """WHERE clause: the call's extracted_data has every top-level key/value in ``wanted``."""
+    from sqlalchemy import and_, func, type_coerce
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    if db.get_bind().dialect.name == "postgresql":
+        # jsonb containment, served by the GIN index ix_calls_extracted_data
+        return type_coerce(CallModel.extracted_data, JSONB).contains(wanted)
+    return and_(*(
+        func.json_extract(CallModel.extracted_data, f"$.{json.dumps(key)}") == value
+        for key, value in wanted.items()
+    ))
+
+
 @router.get("")
 async def list_calls(
     limit: int = 50,
@@ -59,9 +96,21 @@ async def list_calls(
     agent_id: Optional[str] = None,
     direction: Optional[str] = None,
     outcome: Optional[str] = None,
+    extracted: Optional[str] = None,
+    include: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    query = select(CallModel).options(selectinload(CallModel.agent)).order_by(desc(CallModel.created_at))
+    """
+    ``extracted`` is a JSON object, e.g. ``{"interested": "yes"}``, matched
+    against extracted_data. Payload fields (transcript, extracted_data, ...)
+    are left out unless named in ``include``, e.g. ``?include=transcript``.
+    """
+    fields = _payload_fields(include)
+    query = (
+        select(CallModel)
+        .options(selectinload(CallModel.agent), *(undefer(getattr(CallModel, f)) for f in fields))
+        .order_by(desc(CallModel.created_at))
+    )
     if status:
         query = query.where(CallModel.status == status)
     if agent_id:
@@ -72,11 +121,27 @@ async def list_calls(
         query = query.where(CallModel.outcome == outcome)
     if search:
         query = query.where(CallModel.phone_number.contains(search))
+    if extracted:
+        try:
+            wanted = json.loads(extracted)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="extracted must be a JSON object")
+        if not isinstance(wanted, dict) or not all(
+            isinstance(v, (str, int, float, bool)) for v in wanted.values()
+        ):
+            raise HTTPException(status_code=400, detail="extracted must map fields to string, number or boolean values")
+        if wanted:
+            query = query.where(_extracted_data_matches(db, wanted))
     query = query.limit(limit).offset(offset)
 
     result = await db.execute(query)
     calls = result.scalars().all()
-    return [_enrich_call(c) for c in calls]
+    enriched = [_enrich_call(c) for c in calls]
+    if "transcript" in fields:
+        segments = await load_transcripts(db, [c.id for c in calls])
+        for d in enriched:
+            d["transcript"] = segments.get(d["id"]) or d["transcript"]
+    return enriched
 
 
 @router.get("/active")
@@ -126,12 +191,31 @@ async def get_call_stats(db: AsyncSession = Depends(get_db)):
 @router.get("/{call_id}")
 async def get_call(call_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
-        select(CallModel).options(selectinload(CallModel.agent)).where(CallModel.id == call_id)
+        select(CallModel)
+        .options(selectinload(CallModel.agent), undefer_group("payload"))
+        .where(CallModel.id == call_id)
     )
     call = result.scalar_one_or_none()
     if not call:
         raise HTTPException(status_code=404, detail="Call not found")
-    return _enrich_call(call)
+    d = _enrich_call(call)
+    segments = await load_transcript(db, call_id)
+    if segments:
+        d["transcript"] = segments
+    return d
+
+
+@router.get("/{call_id}/transcript")
+async def get_call_transcript(call_id: str, after_seq: int = -1, db: AsyncSession = Depends(get_db)):
+    """Transcript segments of a call, optionally only those after ``after_seq``."""
+    segments = await load_transcript(db, call_id, after_seq)
+    if not segments and after_seq < 0:
+        result = await db.execute(select(CallModel.transcript).where(CallModel.id == call_id))
+        legacy = result.one_or_none()
+        if legacy is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return legacy.transcript or []
+    return segments
 
 
 class CallUpdate(BaseModel):
@@ -192,6 +276,8 @@ async def dial(payload: DialRequest, db: AsyncSession = Depends(get_db)):
     await db.commit()
     await db.refresh(call)
 
+    flow_id, flow_version = await current_flow_version(db, payload.agent_id)
+
     # Initiate the call
     try:
         result = await make_outbound_call(
@@ -200,6 +286,9 @@ async def dial(payload: DialRequest, db: AsyncSession = Depends(get_db)):
             call_id=call.id,
             contact_name=payload.contact_name,
             contact_metadata=payload.contact_metadata,
+            agent_version=agent.updated_at.isoformat() if agent.updated_at else None,
+            flow_id=flow_id,
+            flow_version=flow_version,
         )
 
         call.status = "ringing"
@@ -151,6 +151,27 @@ async def cancel_campaign(campaign_id: str, db: AsyncSession = Depends(get_db)):
     return campaign
 
 
+@router.get("/{campaign_id}/warmup")
+async def get_campaign_warmup(campaign_id: str):
+    """Last warm-up report: per-step ok / ms / detail for llm, prompt, tts and stt."""
+    report = campaign_manager.get_warmup_report(campaign_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Campaign has not been warmed up")
+    return report
+
+
+@router.post("/{campaign_id}/warmup")
+async def warm_up_campaign(campaign_id: str, db: AsyncSession = Depends(get_db)):
+    """Warm up ahead of a scheduled start (campaign start also warms up)."""
+    result = await db.execute(select(CampaignModel).where(CampaignModel.id == campaign_id))
+    campaign = result.scalar_one_or_none()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    factory = await get_session_factory()
+    return await campaign_manager.warm_up_campaign(campaign_id, campaign.agent_id, factory)
+
+
 @router.post("/{campaign_id}/import-csv")
 async def import_csv(
     campaign_id: str,
@@ -8,11 +8,19 @@ from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
 
-from tron.core.database import FlowModel, get_db
+from tron.core.database import FlowModel, FlowVersionModel, get_db
 from tron.core.models import FlowCreate, FlowUpdate, FlowResponse
 from tron.core.flow_engine import validate_flow
+from tron.core.flow_cache import flow_cache
+from tron.core.flow_delta import DeltaError
+from tron.core.flow_history import (
+    apply_delta, diff_canvas, record_version, ensure_history, load_version, list_versions,
+)
+from tron.core.flow_validator import validator_sessions
+from tron.core.events import event_bus
 
 router = APIRouter()
 
@@ -46,6 +54,7 @@ async def create_flow(payload: FlowCreate, db: AsyncSession = Depends(get_db)):
         updated_at=datetime.utcnow(),
     )
     db.add(flow)
+    await record_version(db, flow.id, 1, flow.canvas_data)
     await db.commit()
     await db.refresh(flow)
     return flow
@@ -62,19 +71,57 @@ async def get_flow(flow_id: str, db: AsyncSession = Depends(get_db)):
 
 @router.put("/{flow_id}", response_model=FlowResponse)
 async def update_flow(flow_id: str, payload: FlowUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Save a flow. The editor sends ``ops`` (a delta) with the ``base_version``
+    it edited; a full ``canvas_data`` is still accepted and diffed. Either way
+    the history stores only the delta (see core.flow_history).
+    """
     result = await db.execute(select(FlowModel).where(FlowModel.id == flow_id))
     flow = result.scalar_one_or_none()
     if not flow:
         raise HTTPException(status_code=404, detail="Flow not found")
 
     update_data = payload.model_dump(exclude_unset=True)
+    ops = update_data.pop("ops", None)
+    base_version = update_data.pop("base_version", None)
+    if ops is not None and "canvas_data" in update_data:
+        raise HTTPException(status_code=400, detail="Send either ops or canvas_data, not both")
+    if base_version is not None and base_version != flow.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Flow is at version {flow.version}, not {base_version} — reload and reapply",
+        )
+
+    if ops is not None:
+        try:
+            update_data["canvas_data"] = apply_delta(flow.canvas_data, ops)
+        except DeltaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif "canvas_data" in update_data:
+        try:
+            ops = diff_canvas(flow.canvas_data, update_data["canvas_data"])
+        except DeltaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        # Name / description only: the canvas is unchanged
+        ops = []
+
+    # Flows saved before history was kept get their current version snapshotted first
+    await ensure_history(db, flow)
     for key, value in update_data.items():
         setattr(flow, key, value)
     flow.version += 1
     flow.updated_at = datetime.utcnow()
+    await record_version(db, flow.id, flow.version, flow.canvas_data, ops)
 
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another save claimed this version number first
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Flow was saved concurrently — reload and reapply")
     await db.refresh(flow)
+    await event_bus.publish("flow.updated", {"flow_id": flow_id, "version": flow.version})
     return flow
 
 
@@ -84,8 +131,34 @@ async def delete_flow(flow_id: str, db: AsyncSession = Depends(get_db)):
     flow = result.scalar_one_or_none()
     if not flow:
         raise HTTPException(status_code=404, detail="Flow not found")
+    await db.execute(delete(FlowVersionModel).where(FlowVersionModel.flow_id == flow_id))
     await db.delete(flow)
     await db.commit()
+    flow_cache.invalidate(flow_id)
+    validator_sessions.drop(flow_id)
+
+
+@router.get("/{flow_id}/versions")
+async def get_flow_versions(flow_id: str, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(FlowModel.version).where(FlowModel.id == flow_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    return await list_versions(db, flow_id, limit)
+
+
+@router.get("/{flow_id}/versions/{version}")
+async def get_flow_version(flow_id: str, version: int, db: AsyncSession = Depends(get_db)):
+    """The canvas as it was saved at ``version``."""
+    result = await db.execute(
+        select(FlowModel.version, FlowModel.canvas_data).where(FlowModel.id == flow_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    canvas = row.canvas_data if version == row.version else await load_version(db, flow_id, version)
+    if canvas is None:
+        raise HTTPException(status_code=404, detail=f"Version {version} not found")
+    return {"flow_id": flow_id, "version": version, "canvas_data": canvas}
 
 
 @router.post("/{flow_id}/duplicate", response_model=FlowResponse)
@@ -106,6 +179,7 @@ async def duplicate_flow(flow_id: str, db: AsyncSession = Depends(get_db)):
         updated_at=datetime.utcnow(),
     )
     db.add(new_flow)
+    await record_version(db, new_flow.id, 1, new_flow.canvas_data)
     await db.commit()
     await db.refresh(new_flow)
     return new_flow
@@ -120,6 +194,45 @@ async def validate_flow_endpoint(flow_id: str, db: AsyncSession = Depends(get_db
     return validate_flow(flow.canvas_data)
 
 
+@router.post("/{flow_id}/validate/delta")
+async def validate_flow_delta(flow_id: str, body: dict, db: AsyncSession = Depends(get_db)):
+    """
+    Incremental validation for the canvas editor.
+
+    Body: {"base_revision": int | null, "ops": [...], "canvas": {...}?}. With no
+    base revision a session starts from ``canvas`` (or the saved canvas); the
+    ops are then applied and only the region they touch is re-checked. The
+    response carries the new ``revision`` to send with the next delta; a stale
+    revision gets 409 and the editor starts over.
+    """
+    ops = body.get("ops") or []
+    base_revision = body.get("base_revision")
+    if base_revision is None:
+        canvas = body.get("canvas")
+        if canvas is None:
+            result = await db.execute(select(FlowModel.canvas_data).where(FlowModel.id == flow_id))
+            row = result.first()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Flow not found")
+            canvas = row.canvas_data
+        try:
+            validator = validator_sessions.start(flow_id, canvas)
+        except DeltaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not ops:
+            return validator.result()
+    else:
+        validator = validator_sessions.get(flow_id, base_revision)
+        if validator is None:
+            raise HTTPException(status_code=409, detail="Validation session expired — resend with base_revision null")
+    try:
+        return validator.apply(ops)
+    except DeltaError as e:
+        # A half-applied delta leaves the session out of step with the editor
+        validator_sessions.drop(flow_id)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/from-template", response_model=FlowResponse)
 async def create_from_template(
     body: dict,
@@ -149,6 +262,7 @@ async def create_from_template(
         updated_at=datetime.utcnow(),
     )
     db.add(new_flow)
+    await record_version(db, new_flow.id, 1, new_flow.canvas_data)
     await db.commit()
     await db.refresh(new_flow)
     return new_flow
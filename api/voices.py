@@ -122,42 +122,15 @@ async def preview_voice(body: dict):
     model = body.get("model", "bulbul:v3-beta")
 
     from tron.core.config import settings
-    api_key = settings.sarvam_api_key
-    if not api_key:
+    from tron.core.sarvam import synthesize_wav, SarvamError
+    if not settings.sarvam_api_key:
         raise HTTPException(status_code=400, detail="Sarvam API key not configured. Add it in Settings.")
 
-    import httpx
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.sarvam.ai/text-to-speech",
-                headers={
-                    "api-subscription-key": api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "inputs": [text],
-                    "target_language_code": language,
-                    "speaker": voice_id,
-                    "model": model,
-                    "enable_preprocessing": True,
-                },
-                timeout=30.0,
-            )
-
-        if response.status_code != 200:
-            raise HTTPException(status_code=500, detail=f"Sarvam TTS error: {response.text}")
-
-        data = response.json()
-        audio_b64 = data.get("audios", [None])[0]
-        if not audio_b64:
-            raise HTTPException(status_code=500, detail="No audio returned from Sarvam")
-
-        import base64
-        audio_bytes = base64.b64decode(audio_b64)
+        audio_bytes = await synthesize_wav(text, voice_id=voice_id, model=model, language=language)
         return Response(content=audio_bytes, media_type="audio/wav")
 
-    except HTTPException:
-        raise
+    except SarvamError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Preview failed: {str(e)}")
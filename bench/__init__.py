@@ -0,0 +1,3 @@
+"""
+Benchmarks: python -m tron.bench.<name>
+"""
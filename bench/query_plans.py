@@ -0,0 +1,158 @@
+"""
+Query plans and timings of the hot calls-table queries, before and after
+the ``0001_call_indexes`` migration.
+
+    python -m tron.bench.query_plans --rows 500000
+
+Builds a throwaway SQLite database with the real schema, fills ``calls``
+with synthetic rows spread over ``--days`` days, drops the call indexes
+("before"), runs each query, then applies the migration and runs them again
+("after"). For each query it prints SQLite's ``EXPLAIN QUERY PLAN`` and the
+median wall time.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+STATUSES = ["completed"] * 6 + ["no_answer", "busy", "failed", "cancelled"]
+OUTCOMES = ["interested", "not_interested", "callback", "wrong_number", None, None]
+
+
+def hot_queries(now: datetime, agent_id: str, campaign_id: str, room: str):
+    """(name, SQL, params) mirroring api/calls.py and core/analytics.py."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week = now - timedelta(days=7)
+    return [
+        ("list_calls (latest 50)",
+         "SELECT * FROM calls ORDER BY created_at DESC LIMIT 50", ()),
+        ("list_calls ?agent_id",
+         "SELECT * FROM calls WHERE agent_id = ? ORDER BY created_at DESC LIMIT 50", (agent_id,)),
+        ("list_calls ?outcome",
+         "SELECT * FROM calls WHERE outcome = ? ORDER BY created_at DESC LIMIT 50", ("callback",)),
+        ("calls/active",
+         "SELECT * FROM calls WHERE status IN ('ringing', 'in_progress') ORDER BY started_at DESC", ()),
+        ("stats: calls today",
+         "SELECT count(id) FROM calls WHERE created_at >= ?", (today,)),
+        ("stats: active count",
+         "SELECT count(id) FROM calls WHERE status IN ('ringing', 'in_progress')", ()),
+        ("analytics: week completed",
+         "SELECT count(id) FROM calls WHERE created_at >= ? AND status = 'completed'", (week,)),
+        ("analytics: call volume",
+         "SELECT date(created_at) AS date, count(id) FROM calls WHERE created_at >= ? "
+         "GROUP BY date(created_at) ORDER BY date", (week,)),
+        ("analytics: outcomes",
+         "SELECT outcome, count(id) FROM calls WHERE created_at >= ? AND outcome IS NOT NULL "
+         "GROUP BY outcome ORDER BY count(id) DESC", (week,)),
+        ("campaign progress",
+         "SELECT status, count(id) FROM calls WHERE campaign_id = ? GROUP BY status", (campaign_id,)),
+        ("room lookup",
+         "SELECT id FROM calls WHERE livekit_room = ?", (room,)),
+    ]
+
+
+def populate(conn, rows: int, days: int, now: datetime):
+    # SQLite doesn't enforce the agent/campaign foreign keys, so only calls are filled
+    agents = [str(uuid.uuid4()) for _ in range(20)]
+    campaigns = [str(uuid.uuid4()) for _ in range(50)] + [None] * 10
+    rng = random.Random(7)
+    batch = []
+    room = ""
+    for i in range(rows):
+        created = now - timedelta(seconds=rng.randint(0, days * 86400))
+        status = "in_progress" if i % 5000 == 0 else rng.choice(STATUSES)
+        room = f"call-outbound-91{rng.randint(10**9, 10**10 - 1)}-{int(created.timestamp())}-{i:08x}"
+        batch.append({
+            "id": str(uuid.uuid4()), "campaign_id": rng.choice(campaigns), "agent_id": rng.choice(agents),
+            "phone_number": f"+91{rng.randint(10**9, 10**10 - 1)}", "status": status,
+            "direction": "outbound", "started_at": created, "created_at": created,
+            "outcome": rng.choice(OUTCOMES) if status == "completed" else None,
+            "duration_seconds": rng.randint(5, 300), "livekit_room": room, "retry_count": 0,
+        })
+        if len(batch) == 10000:
+            _insert(conn, batch)
+            batch = []
+    if batch:
+        _insert(conn, batch)
+    return agents[0], next(c for c in campaigns if c), room
+
+
+def _insert(conn, batch):
+    from sqlalchemy import text
+
+    conn.execute(text(
+        "INSERT INTO calls (id, campaign_id, agent_id, phone_number, status, direction, started_at, "
+        "created_at, outcome, duration_seconds, livekit_room, retry_count) VALUES (:id, :campaign_id, "
+        ":agent_id, :phone_number, :status, :direction, :started_at, :created_at, :outcome, "
+        ":duration_seconds, :livekit_room, :retry_count)"
+    ), batch)
+
+
+def measure(conn, queries, repeat: int):
+    results = {}
+    for name, sql, params in queries:
+        raw = conn.connection.dbapi_connection
+        plan = " | ".join(row[-1] for row in raw.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            raw.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from tron.core.database import Base, CallModel, CallLatencyModel
+    from tron.core.migrations import _migrate
+
+    path = os.path.join(tempfile.mkdtemp(prefix="tron-bench-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        # "Before": the schema as it was, primary keys only
+        for model in (CallModel, CallLatencyModel):
+            for index in model.__table__.indexes:
+                index.drop(conn)
+        started = time.perf_counter()
+        agent_id, campaign_id, room = populate(conn, args.rows, args.days, now)
+        print(f"Inserted {args.rows} calls in {time.perf_counter() - started:.1f}s ({path})\n")
+
+    queries = hot_queries(now, agent_id, campaign_id, room)
+    with engine.connect() as conn:
+        before = measure(conn, queries, args.repeat)
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        _migrate(conn)
+        print(f"Migration (index build + ANALYZE) took {time.perf_counter() - started:.1f}s\n")
+    with engine.connect() as conn:
+        after = measure(conn, queries, args.repeat)
+
+    print(f"{'query':28} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, _, _ in queries:
+        b, a = before[name][1], after[name][1]
+        print(f"{name:28} {b:10.2f} {a:10.2f} {b / a if a else float('inf'):7.1f}x")
+    print()
+    for name, _, _ in queries:
+        print(f"{name}\n  before: {before[name][0]}\n  after:  {after[name][0]}")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Mixed read/write throughput on SQLite: default engine vs the tuned profile
+(WAL, synchronous=NORMAL, cache/mmap, busy_timeout, single writer connection),
+and optionally the PostgreSQL/asyncpg profile on the same workload.
+
+    python -m tron.bench.sqlite_mixed --writer-procs 2 --reader-procs 2 --tasks 8 --seconds 10
+    python -m tron.bench.sqlite_mixed --postgres postgresql+asyncpg://tron@localhost/tron_bench
+
+Like production, writers and readers live in separate processes (voice
+workers / campaign runner vs the API): each writer process replays campaign
+call lifecycles (insert queued → ringing → completed, one commit each), each
+reader process runs the dashboard's list and count queries, ``--tasks``
+concurrent tasks per process. Each profile gets a fresh database with
+``--rows`` existing calls (the PostgreSQL database's tables are dropped and
+recreated). Prints operations per second, latency percentiles and
+"database is locked" errors per profile.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _pct(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def _seed(factory, rows: int):
+    from tron.core.database import AgentModel, CallModel
+
+    now = datetime.utcnow()
+    rng = random.Random(1)
+    async with factory() as db:
+        # PostgreSQL enforces calls.agent_id
+        db.add(AgentModel(id="bench", name="bench"))
+        await db.commit()
+        for start in range(0, rows, 5000):
+            db.add_all([
+                CallModel(
+                    agent_id="bench", phone_number=f"+91{rng.randint(10**9, 10**10 - 1)}",
+                    status="completed", created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                )
+                for _ in range(start, min(rows, start + 5000))
+            ])
+            await db.commit()
+
+
+async def _writer(factory, deadline: float, stats):
+    from sqlalchemy import update
+    from tron.core.database import CallModel
+
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            call_id = str(uuid.uuid4())
+            async with factory() as db:
+                db.add(CallModel(id=call_id, agent_id="bench", phone_number="+910000000000", status="queued"))
+                await db.commit()
+            for status in ("ringing", "completed"):
+                async with factory() as db:
+                    await db.execute(update(CallModel).where(CallModel.id == call_id).values(status=status))
+                    await db.commit()
+        except Exception as e:
+            stats["errors"].append(type(e).__name__ + (": locked" if "locked" in str(e) else ""))
+            continue
+        stats["write_ms"].append((time.perf_counter() - started) * 1000)
+
+
+async def _reader(factory, deadline: float, stats):
+    from sqlalchemy import select, func, desc
+    from tron.core.database import CallModel
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            async with factory() as db:
+                await db.execute(select(CallModel).order_by(desc(CallModel.created_at)).limit(50))
+                await db.execute(select(func.count(CallModel.id)).where(CallModel.created_at >= today))
+                await db.execute(select(func.count(CallModel.id)).where(CallModel.status.in_(["ringing", "in_progress"])))
+        except Exception as e:
+            stats["errors"].append(type(e).__name__ + (": locked" if "locked" in str(e) else ""))
+            continue
+        stats["read_ms"].append((time.perf_counter() - started) * 1000)
+
+
+async def _setup(url: str, rows: int):
+    from tron.core.database import Base, create_engines, create_session_factory
+    from tron.core.migrations import run_migrations
+
+    engine, writer = create_engines(url, tuned=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(engine)
+    await _seed(create_session_factory(engine, writer), rows)
+    await engine.dispose()
+    if writer is not None:
+        await writer.dispose()
+
+
+async def _run_process(role: str, url: str, tuned: bool, tasks: int, start_at: float, seconds: float):
+    from tron.core.database import create_engines, create_session_factory
+
+    engine, writer = create_engines(url, tuned=tuned)
+    factory = create_session_factory(engine, writer)
+    stats = {"write_ms": [], "read_ms": [], "errors": []}
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    deadline = time.monotonic() + seconds
+    work = _writer if role == "writer" else _reader
+    await asyncio.gather(*(work(factory, deadline, stats) for _ in range(tasks)))
+    await engine.dispose()
+    if writer is not None:
+        await writer.dispose()
+    return stats
+
+
+def _process_main(role, url, tuned, tasks, start_at, seconds, results):
+    results.put(asyncio.run(_run_process(role, url, tuned, tasks, start_at, seconds)))
+
+
+def run_profile(name: str, tuned: bool, args, url: str = None) -> None:
+    path = None
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="tron-bench-"), "bench.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(_setup(url, args.rows))
+    if path and not tuned:
+        # _setup leaves the file in WAL mode; the default profile runs on a rollback journal
+        import sqlite3
+
+        sqlite3.connect(path).execute("PRAGMA journal_mode = DELETE").close()
+
+    results = multiprocessing.Queue()
+    start_at = time.time() + 2.0
+    roles = ["writer"] * args.writer_procs + ["reader"] * args.reader_procs
+    procs = [
+        multiprocessing.Process(target=_process_main, args=(role, url, tuned, args.tasks, start_at, args.seconds, results))
+        for role in roles
+    ]
+    for proc in procs:
+        proc.start()
+    stats = {"write_ms": [], "read_ms": [], "errors": []}
+    for _ in procs:
+        for key, values in results.get().items():
+            stats[key].extend(values)
+    for proc in procs:
+        proc.join()
+
+    writes, reads = stats["write_ms"], stats["read_ms"]
+    print(f"{name:8} calls/s {len(writes) / args.seconds:8.1f}  reads/s {len(reads) / args.seconds:8.1f}  "
+          f"write p50/p95 {_pct(writes, 50):7.1f}/{_pct(writes, 95):7.1f} ms  "
+          f"read p50/p95 {_pct(reads, 50):6.1f}/{_pct(reads, 95):6.1f} ms  errors {len(stats['errors'])}")
+    for error in sorted(set(stats["errors"])):
+        print(f"         {stats['errors'].count(error)} x {error}")
+    for suffix in ("", "-wal", "-shm") if path else ():
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writer-procs", type=int, default=2)
+    parser.add_argument("--reader-procs", type=int, default=2)
+    parser.add_argument("--tasks", type=int, default=8, help="concurrent tasks per process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--postgres", metavar="URL", help="also run the PostgreSQL profile against this database")
+    args = parser.parse_args()
+
+    print(f"{args.writer_procs} writer processes (3 commits per call), {args.reader_procs} reader processes "
+          f"(3 queries), {args.tasks} tasks each, {args.seconds:.0f}s, {args.rows} existing calls\n")
+    run_profile("default", False, args)
+    run_profile("tuned", True, args)
+    if args.postgres:
+        run_profile("postgres", True, args, url=args.postgres)
+
+
+if __name__ == "__main__":
+    main()
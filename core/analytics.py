@@ -2,9 +2,10 @@
 Analytics aggregation and reporting.
 """
 import logging
+import math
 from datetime import datetime, timedelta, date
 from typing import List, Optional, Dict, Any
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger("tron.analytics")
@@ -161,7 +162,7 @@ async def get_agent_performance(db: AsyncSession, days: int = 7) -> List[Dict[st
             AgentModel.name.label("agent_name"),
             func.count(CallModel.id).label("total_calls"),
             func.sum(
-                func.iif(CallModel.status == "completed", 1, 0)
+                case((CallModel.status == "completed", 1), else_=0)
             ).label("completed"),
             func.avg(CallModel.duration_seconds).label("avg_duration")
         ).join(
@@ -186,3 +187,94 @@ async def get_agent_performance(db: AsyncSession, days: int = 7) -> List[Dict[st
         })
 
     return performance
+
+
+def _percentile(sorted_values: List[int], pct: float) -> Optional[int]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _latency_stats(turn_rows: List[List[Optional[int]]]) -> Dict[str, Any]:
+    """p50/p95/p99 per stage plus interruption rate for a set of turn rows."""
+    from tron.core.database import LATENCY_TURN_FIELDS as TURN_FIELDS
+
+    stages = {}
+    for idx, field in enumerate(TURN_FIELDS):
+        if field in ("interrupted", "prompt_tokens", "cached_tokens"):
+            continue
+        values = sorted(r[idx] for r in turn_rows if len(r) > idx and r[idx] is not None)
+        stages[field] = {
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+        }
+    interrupted_idx = TURN_FIELDS.index("interrupted")
+    interrupted = sum(1 for r in turn_rows if len(r) > interrupted_idx and r[interrupted_idx])
+    tokens_idx = TURN_FIELDS.index("prompt_tokens")
+    tokens = sorted(r[tokens_idx] for r in turn_rows if len(r) > tokens_idx and r[tokens_idx] is not None)
+    # Share of prompt tokens served from the LLM server's prompt cache (turns that report it)
+    cached_idx = TURN_FIELDS.index("cached_tokens")
+    cache_rows = [r for r in turn_rows if len(r) > cached_idx and r[cached_idx] is not None and r[tokens_idx]]
+    cache_total = sum(r[tokens_idx] for r in cache_rows)
+    return {
+        "turns": len(turn_rows),
+        "interruption_rate": round(interrupted / len(turn_rows) * 100, 1) if turn_rows else 0.0,
+        "stages_ms": stages,
+        "prompt_tokens": {
+            "p50": _percentile(tokens, 50),
+            "p95": _percentile(tokens, 95),
+            "max": tokens[-1] if tokens else None,
+            "cache_hit_rate": round(sum(r[cached_idx] for r in cache_rows) / cache_total * 100, 1) if cache_total else None,
+        },
+    }
+
+
+async def get_latency_breakdown(db: AsyncSession, days: int = 7) -> Dict[str, Any]:
+    """
+    Per-turn latency percentiles (ms from end of caller speech) grouped per
+    agent and per (provider, model).
+    """
+    from tron.core.database import CallLatencyModel, AgentModel
+
+    start = datetime.utcnow() - timedelta(days=days)
+    result = await db.execute(
+        select(
+            CallLatencyModel.agent_id,
+            AgentModel.name.label("agent_name"),
+            CallLatencyModel.llm_provider,
+            CallLatencyModel.llm_model,
+            CallLatencyModel.turns,
+        ).join(
+            AgentModel, AgentModel.id == CallLatencyModel.agent_id, isouter=True
+        ).where(
+            CallLatencyModel.created_at >= start
+        )
+    )
+
+    by_agent: Dict[Any, Dict[str, Any]] = {}
+    by_model: Dict[Any, Dict[str, Any]] = {}
+    for row in result.all():
+        turns = row.turns or []
+        agent = by_agent.setdefault(row.agent_id, {
+            "agent_id": row.agent_id, "agent_name": row.agent_name, "calls": 0, "rows": [],
+        })
+        agent["calls"] += 1
+        agent["rows"].extend(turns)
+        model = by_model.setdefault((row.llm_provider, row.llm_model), {
+            "llm_provider": row.llm_provider, "llm_model": row.llm_model, "calls": 0, "rows": [],
+        })
+        model["calls"] += 1
+        model["rows"].extend(turns)
+
+    def _finish(groups):
+        out = []
+        for group in groups.values():
+            rows = group.pop("rows")
+            group.update(_latency_stats(rows))
+            out.append(group)
+        return sorted(out, key=lambda g: g["turns"], reverse=True)
+
+    return {"by_agent": _finish(by_agent), "by_model": _finish(by_model)}
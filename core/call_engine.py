@@ -1,5 +1,6 @@
 """
-Call engine — makes outbound SIP calls via LiveKit + Twilio.
+Call engine — makes outbound calls through the configured telephony backend
+(LiveKit SIP + Twilio in production, the local stand-in for tests/load runs).
 """
 import asyncio
 import logging
@@ -7,6 +8,8 @@ import os
 import time
 from typing import Optional, Dict, Any
 
+from tron.core.telephony import get_telephony
+
 logger = logging.getLogger("tron.call_engine")
 
 
@@ -17,33 +20,29 @@ async def make_outbound_call(
     contact_name: Optional[str] = None,
     contact_metadata: Optional[Dict[str, Any]] = None,
     from_number: Optional[str] = None,
+    agent_version: Optional[str] = None,
+    flow_id: Optional[str] = None,
+    flow_version: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
-    Initiate an outbound call via LiveKit SIP → Twilio Elastic SIP Trunk.
+    Initiate an outbound call via the telephony backend.
+    ``agent_version`` (the agent row's ``updated_at``) lets the worker serve
+    the agent config from its cache without touching the DB; ``flow_id`` /
+    ``flow_version`` pin the call to the flow version current at dial time.
     Returns room_name and participant info.
     """
     from tron.core.config import settings
-    from livekit import api
-    from livekit.protocol.sip import CreateSIPParticipantRequest
 
-    livekit_url = settings.livekit_url
-    livekit_api_key = settings.livekit_api_key
-    livekit_api_secret = settings.livekit_api_secret
-    outbound_trunk_id = settings.livekit_outbound_trunk_id
+    backend = get_telephony()
     caller_id = from_number or settings.twilio_from_number
 
-    # Room name must start with "call-" to match dispatch rule
+    # Room name must start with "call-" to match dispatch rule. The call id
+    # suffix keeps rooms unique when the same number is retried within a second.
     timestamp = int(time.time())
     phone_safe = phone_number.replace("+", "").replace(" ", "")
-    room_name = f"call-outbound-{phone_safe}-{timestamp}"
-
-    logger.info(f"Making outbound call to {phone_number} via room {room_name}")
+    room_name = f"call-outbound-{phone_safe}-{timestamp}-{call_id[:8]}"
 
-    lkapi = api.LiveKitAPI(
-        url=livekit_url,
-        api_key=livekit_api_key,
-        api_secret=livekit_api_secret,
-    )
+    logger.info(f"Making outbound call to {phone_number} via room {room_name} ({backend.name})")
 
     # Build participant name
     participant_name = contact_name or phone_number
@@ -56,92 +55,60 @@ async def make_outbound_call(
         "tron_contact_metadata": str(contact_metadata or {}),
     }
 
-    request = CreateSIPParticipantRequest(
-        sip_trunk_id=outbound_trunk_id,
-        sip_call_to=phone_number,
-        sip_number=caller_id,
-        room_name=room_name,
-        participant_identity=f"phone-{phone_safe}",
-        participant_name=participant_name,
-        krisp_enabled=True,
-        play_dialtone=True,
-        wait_until_answered=False,  # Don't block; let call proceed async
-        participant_attributes=attributes,
+    # Dispatch the voice agent in parallel with SIP creation so the worker can
+    # load config, build its pipeline and pre-synthesize the greeting while the
+    # phone is still ringing. Dispatch metadata carries everything it needs.
+    dispatch_metadata = {
+        "agent_id": agent_id,
+        "agent_version": agent_version or "",
+        "flow_id": flow_id or "",
+        "flow_version": flow_version,
+        "call_id": call_id,
+        "phone_number": phone_number,
+        "contact_name": contact_name or "",
+        "contact_metadata": contact_metadata or {},
+    }
+    participant, dispatch = await asyncio.gather(
+        backend.dial(
+            room_name=room_name,
+            phone_number=phone_number,
+            caller_id=caller_id,
+            participant_identity=f"phone-{phone_safe}",
+            participant_name=participant_name,
+            attributes=attributes,
+        ),
+        backend.dispatch_agent(room_name, dispatch_metadata),
+        return_exceptions=True,
     )
 
-    try:
-        participant = await lkapi.sip.create_sip_participant(request)
-        logger.info(f"SIP participant created: {participant.participant_id}")
+    if isinstance(dispatch, BaseException):
+        logger.warning(f"Agent dispatch failed (worker may auto-pick up): {dispatch}")
 
-        # Dispatch the voice agent worker to this room so it can speak
+    if isinstance(participant, BaseException):
+        logger.error(f"Failed to create SIP participant: {participant}")
+        # Don't leave a warmed-up agent sitting in an empty room
         try:
-            from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
-            import json as _json
-            dispatch_req = CreateAgentDispatchRequest(
-                room=room_name,
-                agent_name="hindi-voice-agent",
-                metadata=_json.dumps({
-                    "agent_id": agent_id,
-                    "call_id": call_id,
-                    "contact_name": contact_name or "",
-                }),
-            )
-            dispatch = await lkapi.agent_dispatch.create_dispatch(dispatch_req)
-            logger.info(f"Agent dispatched: {dispatch.dispatch_id if hasattr(dispatch, 'dispatch_id') else 'ok'}")
-        except Exception as dispatch_err:
-            logger.warning(f"Agent dispatch failed (worker may auto-pick up): {dispatch_err}")
-
-        await lkapi.aclose()
-
-        return {
-            "room_name": room_name,
-            "participant_id": participant.participant_id,
-            "success": True,
-        }
-    except Exception as e:
-        logger.error(f"Failed to create SIP participant: {e}")
-        await lkapi.aclose()
-        raise
+            await backend.hangup(room_name)
+        except Exception:
+            pass
+        raise participant
+
+    return {
+        "room_name": room_name,
+        "participant_id": participant.get("participant_id"),
+        "success": True,
+    }
 
 
 async def hangup_call(room_name: str):
-    """End a call by deleting the LiveKit room."""
-    from tron.core.config import settings
-    from livekit import api
-
-    lkapi = api.LiveKitAPI(
-        url=settings.livekit_url,
-        api_key=settings.livekit_api_key,
-        api_secret=settings.livekit_api_secret,
-    )
-
-    try:
-        await lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
-        logger.info(f"Room {room_name} deleted")
-    except Exception as e:
-        logger.error(f"Error deleting room {room_name}: {e}")
-    finally:
-        await lkapi.aclose()
+    """End a call by tearing down its room."""
+    await get_telephony().hangup(room_name)
 
 
 async def get_active_rooms() -> list:
-    """Get list of active call rooms from LiveKit."""
-    from tron.core.config import settings
-    from livekit import api
-    from livekit.protocol.room import ListRoomsRequest
-
-    lkapi = api.LiveKitAPI(
-        url=settings.livekit_url,
-        api_key=settings.livekit_api_key,
-        api_secret=settings.livekit_api_secret,
-    )
-
+    """Get list of active call rooms from the telephony backend."""
     try:
-        result = await lkapi.room.list_rooms(ListRoomsRequest())
-        rooms = [r for r in result.rooms if r.name.startswith("call-")]
-        await lkapi.aclose()
-        return rooms
+        return await get_telephony().list_active()
     except Exception as e:
         logger.error(f"Error listing rooms: {e}")
-        await lkapi.aclose()
         return []
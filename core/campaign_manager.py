@@ -11,6 +11,8 @@ logger = logging.getLogger("tron.campaign_manager")
 
 # Track running campaign tasks
 _running_campaigns: Dict[str, asyncio.Task] = {}
+# Last warm-up report per campaign
+_warmup_reports: Dict[str, Dict[str, Any]] = {}
 
 
 async def start_campaign(campaign_id: str, db_session_factory):
@@ -65,14 +67,34 @@ def is_within_calling_hours(start_str: str, end_str: str, timezone: str = "Asia/
         return True  # Default to allowing calls if check fails
 
 
+def get_warmup_report(campaign_id: str) -> Optional[Dict[str, Any]]:
+    """Result of the campaign's last warm-up (see tron.core.warmup), if any."""
+    return _warmup_reports.get(campaign_id)
+
+
+async def warm_up_campaign(campaign_id: str, agent_id: str, db_session_factory) -> Dict[str, Any]:
+    """Warm the agent's model, prompt prefix, TTS clips and STT; record and publish the report."""
+    from tron.core.events import event_bus
+    from tron.core.warmup import warm_up_agent
+
+    report = await warm_up_agent(db_session_factory, agent_id)
+    report["finished_at"] = datetime.utcnow().isoformat()
+    _warmup_reports[campaign_id] = report
+    await event_bus.publish("campaign.warmup", {"campaign_id": campaign_id, **report})
+    return report
+
+
 async def _run_campaign(campaign_id: str, db_session_factory):
     """Execute all calls in a campaign."""
     from tron.core.database import CampaignModel, CallModel, AgentModel
     from tron.core.call_engine import make_outbound_call
     from tron.core.events import event_bus
+    from tron.core.warmup import keep_alive_loop
+    from tron.core.flow_history import current_flow_version
     from sqlalchemy import select
 
     logger.info(f"Campaign {campaign_id}: execution starting")
+    keep_alive = None
 
     try:
         async with db_session_factory() as db:
@@ -88,6 +110,11 @@ async def _run_campaign(campaign_id: str, db_session_factory):
             await db.commit()
             await db.refresh(campaign)
 
+        # Load the model, prime the prompt prefix and pre-synthesize scripted
+        # audio before the first call; keep the model loaded while dialing
+        await warm_up_campaign(campaign_id, campaign.agent_id, db_session_factory)
+        keep_alive = asyncio.create_task(keep_alive_loop(db_session_factory, campaign.agent_id))
+
         contacts = campaign.contacts or []
         concurrency = campaign.concurrency or 1
 
@@ -125,6 +152,15 @@ async def _run_campaign(campaign_id: str, db_session_factory):
                     await db.commit()
                     await db.refresh(call)
                     call_id = call.id
+                    # Pin the call to the flow as it is now; later edits don't reach it
+                    flow_id, flow_version = await current_flow_version(db, campaign.agent_id)
+                    # Agent version as of this call (edits mid-campaign apply to the
+                    # next call): lets the voice worker serve the config from cache
+                    agent_result = await db.execute(
+                        select(AgentModel.updated_at).where(AgentModel.id == campaign.agent_id)
+                    )
+                    agent_updated_at = agent_result.scalar_one_or_none()
+                    agent_version = agent_updated_at.isoformat() if agent_updated_at else None
 
                 # Make the call
                 try:
@@ -134,6 +170,9 @@ async def _run_campaign(campaign_id: str, db_session_factory):
                         call_id=call_id,
                         contact_name=contact.get("name"),
                         contact_metadata=contact.get("metadata", {}),
+                        agent_version=agent_version,
+                        flow_id=flow_id,
+                        flow_version=flow_version,
                     )
 
                     async with db_session_factory() as db2:
@@ -202,4 +241,6 @@ async def _run_campaign(campaign_id: str, db_session_factory):
         logger.error(f"Campaign {campaign_id} error: {e}", exc_info=True)
 
     finally:
+        if keep_alive is not None:
+            keep_alive.cancel()
         _running_campaigns.pop(campaign_id, None)
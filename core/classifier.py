@@ -0,0 +1,190 @@
+"""
+Local routing classifiers for flow branch nodes.
+
+Branch decisions happen on every caller turn of a flow call, so they must
+not cost an LLM generation when the answer is obvious:
+
+- ``KeywordMatcher`` compiles every branch's keywords (plus built-in Hindi /
+  Hinglish / English variants of common answers like yes / no / callback)
+  into one Aho-Corasick automaton over normalized text and finds all of them
+  in a single pass over the utterance.
+- ``IntentClassifier`` scores the utterance against each intent's label,
+  description and examples with the local n-gram embedding
+  (``core.embedding``), after an exact keyword pass. Below the confidence
+  threshold (or when two intents are too close) it returns None and the
+  flow asks the LLM instead.
+
+Both are compiled once per branch node and classify in well under a
+millisecond for phone-length utterances.
+"""
+import logging
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+from tron.core.embedding import normalize_text, embed, cosine
+
+logger = logging.getLogger("tron.classifier")
+
+DEFAULT_INTENT_THRESHOLD = 0.55
+# Best intent must beat the runner-up by this much to skip the LLM
+DEFAULT_INTENT_MARGIN = 0.05
+
+# Spoken variants of common branch labels, keyed by normalized label
+ANSWER_VARIANTS: Dict[str, Tuple[str, ...]] = {
+    "yes": (
+        "yes", "yeah", "yep", "sure", "ok", "okay", "of course", "correct", "right",
+        "haan", "han", "haa", "haanji", "haan ji", "ji haan", "ji", "bilkul", "theek hai",
+        "thik hai", "sahi hai", "chalega", "kar do", "zaroor", "jarur",
+        "हाँ", "हां", "हा", "जी", "जी हाँ", "जी हां", "हाँ जी", "बिल्कुल", "ठीक है", "सही है", "ज़रूर", "जरूर", "चलेगा",
+    ),
+    "no": (
+        "no", "nope", "not now", "not interested", "don't", "dont",
+        "nahi", "nahin", "nai", "na", "mat", "ji nahi", "nahi ji", "bilkul nahi", "nahi chahiye",
+        "नहीं", "नही", "ना", "मत", "जी नहीं", "नहीं जी", "बिल्कुल नहीं", "नहीं चाहिए",
+    ),
+    "interested": (
+        "interested", "tell me more", "batao", "bataiye", "aur batao", "chahiye",
+        "बताइए", "बताओ", "और बताइए", "चाहिए",
+    ),
+    "not interested": (
+        "not interested", "no interest", "nahi chahiye", "interest nahi", "zarurat nahi",
+        "नहीं चाहिए", "ज़रूरत नहीं", "जरूरत नहीं", "इंटरेस्ट नहीं",
+    ),
+    "callback": (
+        "call back", "callback", "call later", "later", "baad mein", "baad me", "kal", "abhi busy",
+        "busy", "phir se call", "बाद में", "कल", "अभी बिज़ी", "बिजी", "व्यस्त",
+    ),
+    "busy": (
+        "busy", "abhi busy", "meeting", "driving", "baad mein", "बिज़ी", "बिजी", "व्यस्त", "बाद में",
+    ),
+    "wrong number": (
+        "wrong number", "galat number", "koi nahi hai", "गलत नंबर", "ग़लत नंबर",
+    ),
+}
+
+
+def label_variants(label: str) -> Tuple[str, ...]:
+    """Built-in spoken variants for a branch label (empty for labels we don't know)."""
+    return ANSWER_VARIANTS.get(normalize_text(label), ())
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton mapping keyword phrases to branch labels.
+
+    Phrases and text are normalized and space-padded, so matches fall on
+    word boundaries ("na" doesn't fire inside "naam"). When several labels
+    match, the longest phrase wins ("ji nahi" over "ji"), then branch order.
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, str]]):
+        # Trie as parallel lists: children, failure link, (length, label rank, label) outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int, str]]] = [[]]
+        self.labels: List[str] = []
+        for phrase, label in phrases:
+            norm = normalize_text(phrase)
+            if not norm:
+                continue
+            if label not in self.labels:
+                self.labels.append(label)
+            self._add(f" {norm} ", label)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _add(self, pattern: str, label: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), self.labels.index(label), label))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Every (phrase length, label rank, label) occurring in ``text``."""
+        found = []
+        state = 0
+        for ch in f" {normalize_text(text)} ":
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            if self._out[state]:
+                found.extend(self._out[state])
+        return found
+
+    def match(self, text: str) -> Optional[str]:
+        """Best-matching label, or None."""
+        found = self.find_all(text)
+        if not found:
+            return None
+        return min(found, key=lambda f: (-f[0], f[1]))[2]
+
+
+class IntentClassifier:
+    """Keyword pass, then nearest-example embedding similarity, over a node's intents."""
+
+    def __init__(
+        self,
+        intents: List[Dict[str, Any]],
+        threshold: float = DEFAULT_INTENT_THRESHOLD,
+        margin: float = DEFAULT_INTENT_MARGIN,
+    ):
+        self.threshold = threshold
+        self.margin = margin
+        phrases = []
+        self._examples: List[Tuple[str, Dict[int, float]]] = []
+        for intent in intents:
+            label = intent["label"]
+            keywords = list(intent.get("keywords") or []) + list(label_variants(label))
+            phrases.extend((k, label) for k in [label] + keywords)
+            examples = [label] + list(intent.get("examples") or []) + keywords
+            if intent.get("description"):
+                examples.append(intent["description"])
+            for example in dict.fromkeys(str(e) for e in examples):
+                vector = embed(example)
+                if vector:
+                    self._examples.append((label, vector))
+        self.keywords = KeywordMatcher(phrases)
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """(label, confidence); label is None when the LLM should decide."""
+        label = self.keywords.match(text)
+        if label is not None:
+            return label, 1.0
+        vector = embed(text)
+        if not vector:
+            return None, 0.0
+        best: Dict[str, float] = {}
+        for label, example in self._examples:
+            score = cosine(vector, example)
+            if score > best.get(label, 0.0):
+                best[label] = score
+        if not best:
+            return None, 0.0
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+        top_label, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if top < self.threshold or top - runner_up < self.margin:
+            return None, top
+        return top_label, top
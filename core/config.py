@@ -2,7 +2,7 @@
 Core configuration — reads from environment variables with sensible defaults.
 """
 import os
-from typing import Optional
+from typing import Optional, Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -19,6 +19,24 @@ class TronSettings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./tron/data/tron.db"
+    # Pooled connections per process (SQLite: read connections)
+    database_pool_size: int = 5
+    # PostgreSQL only: extra connections under burst, seconds to wait for one,
+    # recycle age, liveness check on checkout, and asyncpg prepared statements
+    # cached per connection (0 behind PgBouncer in transaction mode)
+    database_max_overflow: int = 10
+    database_pool_timeout: int = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    database_statement_cache_size: int = 100
+    # SQLite only: WAL journal with synchronous=NORMAL, page cache / mmap sizes,
+    # how long a writer waits for the lock, and whether a process funnels all
+    # its writes through one dedicated connection
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_mb: int = 64
+    sqlite_mmap_mb: int = 256
+    sqlite_single_writer: bool = True
 
     # LiveKit
     livekit_url: str = os.getenv("LIVEKIT_URL", "")
@@ -26,6 +44,11 @@ class TronSettings(BaseSettings):
     livekit_api_secret: str = os.getenv("LIVEKIT_API_SECRET", "")
     livekit_outbound_trunk_id: str = os.getenv("LIVEKIT_OUTBOUND_TRUNK_ID", "")
 
+    # Telephony backend: "livekit" (real calls) or "local" (in-process stand-in)
+    telephony_backend: str = "livekit"
+    local_telephony_time_scale: float = 1.0
+    local_telephony_max_channels: int = 0
+
     # Twilio
     twilio_account_sid: str = os.getenv("TWILIO_ACCOUNT_SID", "")
     twilio_auth_token: str = os.getenv("TWILIO_AUTH_TOKEN", "")
@@ -36,6 +59,23 @@ class TronSettings(BaseSettings):
 
     # Ollama
     ollama_endpoint: str = os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
+    # Comma-separated Ollama boxes the voice worker load-balances across
+    ollama_endpoints: str = os.getenv("OLLAMA_ENDPOINTS", "")
+    # How long Ollama keeps a warmed-up model loaded, and how often a running
+    # campaign re-pings it (seconds, 0 = no pings)
+    llm_keep_alive: str = "30m"
+    llm_keep_alive_interval: float = 240.0
+
+    # LLM routing in the voice worker: fail over when the first token is later than this
+    llm_first_token_deadline: float = 2.0
+    # Smaller model tried last when every endpoint missed the deadline ("" = none)
+    llm_fallback_model: str = ""
+
+    # Chat history sent per LLM turn: token budget (per model via JSON
+    # TRON_LLM_CONTEXT_BUDGETS='{"qwen2.5:32b": 1500}') and turns kept verbatim
+    llm_context_budget: int = 2000
+    llm_context_budgets: Dict[str, int] = {}
+    llm_context_keep_turns: int = 6
 
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
@@ -43,6 +83,23 @@ class TronSettings(BaseSettings):
     # Gemini
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
 
+    # Voice pipeline
+    voice_min_endpointing_delay: float = 0.8
+    tts_min_clause_chars: int = 24
+    # Play a cached filler ("haan ji") when a reply's first LLM token is later than this (0 = off)
+    voice_filler_after: float = 0.8
+
+    # TTS audio cache (shared on disk by the API and the voice worker)
+    tts_cache_dir: str = "./tron/data/tts_cache"
+    tts_cache_max_mb: int = 2048
+    tts_cache_hot_mb: int = 64
+
+    # Voice worker end-of-call spool (finalize payloads the DB couldn't take, open-call markers)
+    finalize_spool_dir: str = "./tron/data/finalize_spool"
+
+    # Flow version history: a full canvas snapshot every N versions, deltas in between
+    flow_snapshot_interval: int = 20
+
     # Defaults
     default_llm_provider: str = "ollama"
     default_llm_model: str = "qwen2.5:32b"
@@ -7,11 +7,13 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     String, Text, Integer, Float, Boolean, DateTime,
-    JSON, Enum as SAEnum, ForeignKey, event
+    JSON, Enum as SAEnum, ForeignKey, Index, event
 )
-from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Session, relationship, Mapped, mapped_column
+from sqlalchemy.sql.dml import UpdateBase
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
 import enum
 
 
@@ -23,6 +25,11 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+def json_type(none_as_null: bool = False):
+    """JSON column type: JSON on SQLite, JSONB (binary, GIN-indexable) on PostgreSQL."""
+    return JSON(none_as_null=none_as_null).with_variant(JSONB(none_as_null=none_as_null), "postgresql")
+
+
 class AgentModel(Base):
     __tablename__ = "agents"
 
@@ -42,8 +49,8 @@ class AgentModel(Base):
     max_call_duration: Mapped[int] = mapped_column(Integer, default=300)
     greeting_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     flow_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("flows.id"), nullable=True)
-    tools_enabled: Mapped[Optional[dict]] = mapped_column(JSON, default=list)
-    guardrails: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    tools_enabled: Mapped[Optional[dict]] = mapped_column(json_type(), default=list)
+    guardrails: Mapped[Optional[dict]] = mapped_column(json_type(), default=dict)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -60,13 +67,31 @@ class FlowModel(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
     name: Mapped[str] = mapped_column(String(100))
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    canvas_data: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    canvas_data: Mapped[Optional[dict]] = mapped_column(json_type(), default=dict)
     version: Mapped[int] = mapped_column(Integer, default=1)
     is_template: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class FlowVersionModel(Base):
+    """
+    One saved version of a flow: a full canvas snapshot or the delta from the
+    previous version (see tron.core.flow_history).
+    """
+    __tablename__ = "flow_versions"
+    __table_args__ = (
+        Index("ix_flow_versions_flow_version", "flow_id", "version", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    flow_id: Mapped[str] = mapped_column(String(36), ForeignKey("flows.id", ondelete="CASCADE"))
+    version: Mapped[int] = mapped_column(Integer)
+    snapshot: Mapped[Optional[dict]] = mapped_column(json_type(none_as_null=True), nullable=True)
+    delta: Mapped[Optional[list]] = mapped_column(json_type(none_as_null=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class CampaignStatus(str, enum.Enum):
     draft = "draft"
     scheduled = "scheduled"
@@ -83,7 +108,7 @@ class CampaignModel(Base):
     name: Mapped[str] = mapped_column(String(100))
     agent_id: Mapped[str] = mapped_column(String(36), ForeignKey("agents.id"))
     status: Mapped[str] = mapped_column(String(20), default="draft")
-    contacts: Mapped[Optional[list]] = mapped_column(JSON, default=list)
+    contacts: Mapped[Optional[list]] = mapped_column(json_type(), default=list)
     total_contacts: Mapped[int] = mapped_column(Integer, default=0)
     completed_calls: Mapped[int] = mapped_column(Integer, default=0)
     failed_calls: Mapped[int] = mapped_column(Integer, default=0)
@@ -119,15 +144,37 @@ class CallStatus(str, enum.Enum):
     cancelled = "cancelled"
 
 
+# Bulky CallModel columns, deferred (group "payload"): list queries don't load
+# them; load with undefer_group("payload") or undefer(CallModel.<field>)
+CALL_PAYLOAD_FIELDS = ("contact_metadata", "transcript", "summary", "extracted_data")
+
+
 class CallModel(Base):
     __tablename__ = "calls"
+    # Match the hot filters: list/stats/analytics by date, active calls by
+    # status, per-agent and per-campaign views, room lookups (see core.migrations)
+    __table_args__ = (
+        Index("ix_calls_created_at", "created_at"),
+        Index("ix_calls_status_created_at", "status", "created_at"),
+        Index("ix_calls_agent_created_at", "agent_id", "created_at"),
+        Index("ix_calls_campaign_status", "campaign_id", "status"),
+        Index("ix_calls_outcome_created_at", "outcome", "created_at"),
+        Index("ix_calls_livekit_room", "livekit_room"),
+        # PostgreSQL only: containment filters on extracted fields (extracted_data @> ...)
+        Index(
+            "ix_calls_extracted_data", "extracted_data",
+            postgresql_using="gin", postgresql_ops={"extracted_data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
     campaign_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("campaigns.id"), nullable=True)
     agent_id: Mapped[str] = mapped_column(String(36), ForeignKey("agents.id"))
     phone_number: Mapped[str] = mapped_column(String(20))
     contact_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
-    contact_metadata: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    contact_metadata: Mapped[Optional[dict]] = mapped_column(
+        json_type(), default=dict, deferred=True, deferred_group="payload", deferred_raiseload=True,
+    )
     status: Mapped[str] = mapped_column(String(20), default="queued")
     direction: Mapped[str] = mapped_column(String(10), default="outbound")
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -139,11 +186,18 @@ class CallModel(Base):
     livekit_room: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     twilio_call_sid: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     recording_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
-    transcript: Mapped[Optional[list]] = mapped_column(JSON, default=list)
-    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Legacy whole-call transcript; live calls append to TranscriptSegmentModel
+    transcript: Mapped[Optional[list]] = mapped_column(
+        json_type(), default=list, deferred=True, deferred_group="payload", deferred_raiseload=True,
+    )
+    summary: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True,
+    )
     sentiment: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     outcome: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
-    extracted_data: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    extracted_data: Mapped[Optional[dict]] = mapped_column(
+        json_type(), default=dict, deferred=True, deferred_group="payload", deferred_raiseload=True,
+    )
     retry_count: Mapped[int] = mapped_column(Integer, default=0)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     cost_estimate: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
@@ -154,6 +208,53 @@ class CallModel(Base):
     campaign = relationship("CampaignModel", back_populates="calls", foreign_keys=[campaign_id])
 
 
+class TranscriptSegmentModel(Base):
+    """One finalized utterance of a call, appended as the call progresses."""
+    __tablename__ = "transcript_segments"
+    __table_args__ = (
+        Index("ix_transcript_segments_call_seq", "call_id", "seq", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    call_id: Mapped[str] = mapped_column(String(36), ForeignKey("calls.id"))
+    seq: Mapped[int] = mapped_column(Integer)
+    role: Mapped[str] = mapped_column(String(20))
+    text: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+# Column order of each row in CallLatencyModel.turns (milliseconds from end of caller speech)
+LATENCY_TURN_FIELDS = (
+    "eou",
+    "stt_final",
+    "llm_first_token",
+    "llm_done",
+    "tts_first_byte",
+    "playout_start",
+    "interrupted",
+    "prompt_tokens",
+    "cached_tokens",
+)
+
+
+class CallLatencyModel(Base):
+    """Per-turn latency timings for one call (see tron.voice.turn_metrics)."""
+    __tablename__ = "call_latency"
+    __table_args__ = (
+        Index("ix_call_latency_created_at", "created_at"),
+    )
+
+    call_id: Mapped[str] = mapped_column(String(36), ForeignKey("calls.id"), primary_key=True)
+    agent_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("agents.id"), nullable=True)
+    llm_provider: Mapped[str] = mapped_column(String(20), default="ollama")
+    llm_model: Mapped[str] = mapped_column(String(100), default="")
+    tts_model: Mapped[str] = mapped_column(String(50), default="")
+    turn_count: Mapped[int] = mapped_column(Integer, default=0)
+    # One row per turn, ordered as LATENCY_TURN_FIELDS
+    turns: Mapped[Optional[list]] = mapped_column(json_type(), default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class SettingModel(Base):
     __tablename__ = "settings"
 
@@ -165,6 +266,7 @@ class SettingModel(Base):
 
 # Database engine and session
 _engine = None
+_writer_engine = None
 _session_factory = None
 
 
@@ -173,16 +275,127 @@ def get_database_url():
     return settings.database_url
 
 
+def _is_file_sqlite(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite tuning (journal_mode=WAL persists in the file)."""
+    from tron.core.config import settings
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    if settings.sqlite_wal:
+        # Readers no longer block the writer (or vice versa); NORMAL only
+        # fsyncs at checkpoints, which is safe in WAL mode
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_mb) * 1024}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_mb) * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+
+def _postgres_engine(db_url: str):
+    """Pooled PostgreSQL engine; asyncpg connections get the statement caches and server settings."""
+    from tron.core.config import settings
+
+    connect_args = {}
+    if make_url(db_url).get_driver_name() == "asyncpg":
+        cache_size = settings.database_statement_cache_size
+        connect_args = {
+            "statement_cache_size": cache_size,
+            "prepared_statement_cache_size": cache_size,
+            # Short OLTP queries: JIT compilation costs more than it saves
+            "server_settings": {"application_name": "tron", "jit": "off"},
+        }
+        if cache_size == 0:
+            # Behind PgBouncer in transaction mode: never reuse a statement name
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return create_async_engine(
+        db_url,
+        echo=False,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+def create_engines(db_url: str, tuned: bool = True):
+    """
+    (engine, writer engine or None) for ``db_url``. PostgreSQL gets a pool
+    sized by the ``database_*`` settings; it handles concurrent writers
+    itself, so there is no writer engine. File SQLite databases get the
+    pragmas above and, with ``sqlite_single_writer``, a second engine
+    holding exactly one connection that every write of this process goes
+    through (see ``RoutingSession``): writers queue in the pool instead of
+    spinning on the database lock.
+    """
+    from tron.core.config import settings
+
+    if tuned and make_url(db_url).get_backend_name() == "postgresql":
+        return _postgres_engine(db_url), None
+    if not tuned or not _is_file_sqlite(db_url):
+        return create_async_engine(db_url, echo=False), None
+
+    engine = create_async_engine(
+        db_url, echo=False, pool_size=settings.database_pool_size, max_overflow=settings.database_pool_size,
+    )
+    event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    writer = None
+    if settings.sqlite_single_writer:
+        writer = create_async_engine(db_url, echo=False, pool_size=1, max_overflow=0)
+        event.listen(writer.sync_engine, "connect", _sqlite_pragmas)
+    return engine, writer
+
+
+class RoutingSession(Session):
+    """
+    Sends flushes and INSERT/UPDATE/DELETE statements to the writer engine
+    and other reads to the read pool. Once a transaction has written it stays
+    on the writer until it ends, so it reads its own uncommitted rows.
+    """
+
+    reader = None
+    writer = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("writing") or self._flushing or isinstance(clause, UpdateBase):
+            self.info["writing"] = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
+
+def create_session_factory(engine, writer=None):
+    if writer is None:
+        return async_sessionmaker(engine, expire_on_commit=False)
+    session_class = type("BoundRoutingSession", (RoutingSession,), {
+        "reader": engine.sync_engine, "writer": writer.sync_engine,
+    })
+    return async_sessionmaker(engine, expire_on_commit=False, sync_session_class=session_class)
+
+
 async def get_engine():
-    global _engine
+    global _engine, _writer_engine
     if _engine is None:
         db_url = get_database_url()
         # Ensure directory exists for SQLite
-        if "sqlite" in db_url:
+        if _is_file_sqlite(db_url):
             import os
-            db_path = db_url.replace("sqlite+aiosqlite:///", "").replace("./", "")
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        _engine = create_async_engine(db_url, echo=False)
+            db_dir = os.path.dirname(make_url(db_url).database)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+        _engine, _writer_engine = create_engines(db_url)
     return _engine
 
 
@@ -190,15 +403,18 @@ async def get_session_factory():
     global _session_factory
     if _session_factory is None:
         engine = await get_engine()
-        _session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        _session_factory = create_session_factory(engine, _writer_engine)
     return _session_factory
 
 
 async def init_db():
-    """Create all tables."""
+    """Create missing tables, then apply pending schema migrations."""
+    from tron.core.migrations import run_migrations
+
     engine = await get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(engine)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession]:
@@ -0,0 +1,54 @@
+"""
+Lightweight local text embeddings.
+
+Caller utterances are short, Hinglish, often in mixed Devanagari/Latin
+script, and arrive with STT noise ("kitna price hai" / "kitne ka price h").
+A hashed bag of character n-grams is robust to exactly that, needs no model
+download and runs in microseconds, which is what the per-turn hot path can
+afford. Vectors are sparse ``{bucket: weight}`` dicts, L2-normalized so a
+dot product is the cosine similarity.
+"""
+import re
+import unicodedata
+import zlib
+from typing import Dict
+
+DIMENSIONS = 512
+NGRAM_SIZES = (2, 3, 4)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, NFC, punctuation (incl. ``।`` ``॥``) stripped, whitespace collapsed."""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    # By Unicode category rather than \w, which would also strip Devanagari matras
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def embed(text: str, dimensions: int = DIMENSIONS) -> Dict[int, float]:
+    """Hashed character n-gram vector of ``text`` (unit length, empty if no text)."""
+    vec: Dict[int, float] = {}
+    norm = normalize_text(text)
+    if not norm:
+        return vec
+    for word in norm.split(" "):
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                h = zlib.crc32(padded[i:i + n].encode("utf-8"))
+                # Sign bit from the hash keeps collisions from only adding up
+                bucket = h % dimensions
+                vec[bucket] = vec.get(bucket, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    length = sum(v * v for v in vec.values()) ** 0.5
+    if not length:
+        return {}
+    return {k: v / length for k, v in vec.items() if v}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two ``embed`` vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
@@ -0,0 +1,112 @@
+"""
+Process-wide cache of compiled flows.
+
+A campaign runs the same flow for thousands of calls, so the canvas is read
+and compiled (``flow_engine.CompiledFlow``) once per ``FlowModel.version``
+and shared. Entries are keyed by (flow_id, version) and versions never
+change, so a save needs no invalidation: the voice worker (another process)
+either loads the version pinned in the dispatch metadata or checks the
+current one (one indexed integer read), and reads the canvas only on a miss.
+Older versions are rebuilt from ``core.flow_history``.
+"""
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from tron.core.flow_engine import CompiledFlow
+
+logger = logging.getLogger("tron.flow_cache")
+
+
+class FlowCache:
+    """LRU of compiled flows keyed by (flow_id, version)."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], CompiledFlow]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, flow_id: str, version: int) -> Optional[CompiledFlow]:
+        flow = self._entries.get((flow_id, version))
+        if flow is not None:
+            self._entries.move_to_end((flow_id, version))
+        return flow
+
+    def put(self, flow: CompiledFlow):
+        key = (flow.flow_id, flow.version)
+        self._entries[key] = flow
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, flow_id: Optional[str] = None):
+        """Drop every version of one flow, or everything when ``flow_id`` is None."""
+        if flow_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == flow_id]:
+            del self._entries[key]
+
+    async def load(self, flow_id: Optional[str], db=None, version: Optional[int] = None) -> Optional[CompiledFlow]:
+        """
+        Compiled flow at ``version`` (default: the current one), via ``db`` or
+        a new session. None if the flow or that version doesn't exist.
+        """
+        if not flow_id:
+            return None
+        if version is not None:
+            flow = self.get(flow_id, version)
+            if flow is not None:
+                self.hits += 1
+                return flow
+        if db is None:
+            from tron.core.database import get_session_factory
+
+            factory = await get_session_factory()
+            async with factory() as session:
+                return await self._load(flow_id, session, version)
+        return await self._load(flow_id, db, version)
+
+    async def _load(self, flow_id: str, db, version: Optional[int]) -> Optional[CompiledFlow]:
+        from tron.core.database import FlowModel
+        from tron.core.flow_history import load_version
+        from sqlalchemy import select
+
+        result = await db.execute(select(FlowModel.version).where(FlowModel.id == flow_id))
+        current = result.scalar_one_or_none()
+        if current is None:
+            self.invalidate(flow_id)
+            return None
+        version = current if version is None else version
+        flow = self.get(flow_id, version)
+        if flow is not None:
+            self.hits += 1
+            return flow
+
+        self.misses += 1
+        canvas = None
+        if version == current:
+            # Version and canvas in one read, so a concurrent save can't pair them wrongly
+            result = await db.execute(
+                select(FlowModel.version, FlowModel.canvas_data).where(FlowModel.id == flow_id)
+            )
+            row = result.first()
+            if row is not None and row.version == version:
+                canvas = row.canvas_data or {}
+        if canvas is None:
+            canvas = await load_version(db, flow_id, version)
+            if canvas is None:
+                logger.warning(f"Flow {flow_id} v{version} is not in the history")
+                return None
+        flow = CompiledFlow(canvas, flow_id, version)
+        self.put(flow)
+        logger.debug(f"Compiled flow {flow_id} v{version} ({len(flow.nodes)} nodes)")
+        return flow
+
+
+# Process-wide cache (API and voice worker each hold one)
+flow_cache = FlowCache()
@@ -0,0 +1,261 @@
+"""
+JSON-patch style deltas against a flow canvas.
+
+The editor addresses nodes and edges by id rather than by array index, so
+a delta stays valid however the arrays are ordered::
+
+    [{"op": "add",     "path": "/nodes/n7", "value": {...node...}},
+     {"op": "replace", "path": "/nodes/n3/data/text", "value": "Namaste!"},
+     {"op": "remove",  "path": "/edges/e12"},
+     {"op": "replace", "path": "/viewport", "value": {...}}]
+
+Below the node / edge id, paths are plain JSON pointers (RFC 6901, with
+``-`` to append to a list). ``op`` is one of add / remove / replace / test.
+New members are appended; ``{"op": "add", "path": "/nodes/-", ...}`` takes
+the id from the value. A node's id must match its path; id-less nodes are
+rejected, id-less edges are keyed ``source->target``. To reorder, replace the whole list
+(``{"op": "replace", "path": "/edges", "value": [...]}``) — edge order
+decides which edge a node follows first.
+``IndexedCanvas`` holds a canvas keyed by id so each op costs O(path length)
+instead of a scan of the node list.
+"""
+import copy
+from typing import Optional, Dict, Any, List, Tuple, Set
+
+OPS = ("add", "remove", "replace", "test")
+
+
+class DeltaError(ValueError):
+    """Raised for malformed ops or paths that don't exist in the canvas."""
+
+
+def edge_key(edge: Dict[str, Any], taken: Optional[Set[str]] = None) -> str:
+    """An edge's id, or a stable one derived from its endpoints for id-less edges."""
+    key = edge.get("id")
+    if key:
+        return str(key)
+    base = key = f"{edge.get('source')}->{edge.get('target')}"
+    n = 1
+    while taken is not None and key in taken:
+        n += 1
+        key = f"{base}#{n}"
+    return key
+
+
+def _appended_key(name: str, value: Dict[str, Any], taken: Optional[Dict[str, Any]] = None) -> str:
+    """Key of a member added at ``/nodes/-`` or ``/edges/-``."""
+    if name == "nodes":
+        return str(value.get("id"))
+    return edge_key(value, taken)
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def parse_path(path: str) -> List[str]:
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise DeltaError(f"Invalid path {path!r}")
+    return [_unescape(t) for t in path[1:].split("/")]
+
+
+def _container_step(container, token: str, path: str):
+    if isinstance(container, dict):
+        if token not in container:
+            raise DeltaError(f"Path {path} does not exist")
+        return container[token]
+    if isinstance(container, list):
+        try:
+            return container[int(token)]
+        except (ValueError, IndexError):
+            raise DeltaError(f"Path {path} does not exist")
+    raise DeltaError(f"Path {path} goes through a scalar")
+
+
+def _apply_pointer(doc, tokens: List[str], op: Dict[str, Any], path: str):
+    """Apply one op at ``tokens`` inside ``doc`` (never the root)."""
+    parent = doc
+    for token in tokens[:-1]:
+        parent = _container_step(parent, token, path)
+    last = tokens[-1]
+    kind = op["op"]
+
+    if kind == "test":
+        if _container_step(parent, last, path) != op.get("value"):
+            raise DeltaError(f"Test failed at {path}")
+        return
+    if isinstance(parent, dict):
+        if kind == "remove":
+            if last not in parent:
+                raise DeltaError(f"Path {path} does not exist")
+            del parent[last]
+        else:
+            if kind == "replace" and last not in parent:
+                raise DeltaError(f"Path {path} does not exist")
+            parent[last] = copy.deepcopy(op.get("value"))
+    elif isinstance(parent, list):
+        if kind == "add" and last == "-":
+            parent.append(copy.deepcopy(op.get("value")))
+            return
+        try:
+            index = int(last)
+        except ValueError:
+            raise DeltaError(f"Invalid list index in {path}")
+        if kind == "add":
+            if not 0 <= index <= len(parent):
+                raise DeltaError(f"Path {path} does not exist")
+            parent.insert(index, copy.deepcopy(op.get("value")))
+        elif not 0 <= index < len(parent):
+            raise DeltaError(f"Path {path} does not exist")
+        elif kind == "remove":
+            del parent[index]
+        else:
+            parent[index] = copy.deepcopy(op.get("value"))
+    else:
+        raise DeltaError(f"Path {path} goes through a scalar")
+
+
+class IndexedCanvas:
+    """A canvas with nodes and edges keyed by id (insertion order = canvas order)."""
+
+    __slots__ = ("nodes", "edges", "extra")
+
+    def __init__(self, canvas: Optional[Dict[str, Any]] = None):
+        canvas = copy.deepcopy(canvas or {})
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[str, Dict[str, Any]] = {}
+        self._replace_table("nodes", canvas.pop("nodes", None) or [])
+        self._replace_table("edges", canvas.pop("edges", None) or [])
+        # viewport and anything else the editor stores
+        self.extra: Dict[str, Any] = canvas
+
+    def _replace_table(self, name: str, items: List[Dict[str, Any]]):
+        table: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                raise DeltaError(f"/{name} items must be objects")
+            if name == "nodes":
+                if item.get("id") in (None, ""):
+                    raise DeltaError("/nodes items must have an id")
+                table[str(item["id"])] = item
+            else:
+                table[edge_key(item, table)] = item
+        if name == "nodes":
+            self.nodes = table
+        else:
+            self.edges = table
+
+    def to_canvas(self) -> Dict[str, Any]:
+        canvas = copy.deepcopy(self.extra)
+        canvas["nodes"] = copy.deepcopy(list(self.nodes.values()))
+        canvas["edges"] = copy.deepcopy(list(self.edges.values()))
+        return canvas
+
+    @staticmethod
+    def targets(ops: List[Dict[str, Any]]) -> Tuple[Set[str], Set[str]]:
+        """
+        (node ids, edge ids) a delta touches, without applying it. Whole-list
+        replaces report only the ids in the new list; ``apply`` also returns
+        the ones they dropped.
+        """
+        nodes, edges = set(), set()
+        for op in ops:
+            tokens = parse_path(op.get("path", ""))
+            if len(tokens) == 1 and tokens[0] in ("nodes", "edges") and isinstance(op.get("value"), list):
+                table = nodes if tokens[0] == "nodes" else edges
+                items = op["value"]
+                if tokens[0] == "nodes":
+                    table.update(str(i["id"]) for i in items if isinstance(i, dict) and i.get("id") not in (None, ""))
+                else:
+                    taken: Dict[str, Any] = {}
+                    for item in items:
+                        if isinstance(item, dict):
+                            taken[edge_key(item, taken)] = None
+                    table.update(taken)
+            elif len(tokens) >= 2 and tokens[0] in ("nodes", "edges"):
+                key = tokens[1]
+                if key == "-" and len(tokens) == 2 and isinstance(op.get("value"), dict):
+                    key = _appended_key(tokens[0], op["value"])
+                (nodes if tokens[0] == "nodes" else edges).add(key)
+        return nodes, edges
+
+    def apply(self, ops: List[Dict[str, Any]]) -> Tuple[Set[str], Set[str]]:
+        """
+        Apply ``ops`` in order; returns the (node ids, edge ids) they touched.
+        Not atomic: on ``DeltaError`` earlier ops stay applied.
+        """
+        if not isinstance(ops, list):
+            raise DeltaError("A delta is a list of ops")
+        touched_nodes, touched_edges = set(), set()
+        for op in ops:
+            if not isinstance(op, dict) or op.get("op") not in OPS:
+                raise DeltaError(f"Unsupported op {op!r}")
+            path = op.get("path", "")
+            tokens = parse_path(path)
+            if tokens[0] in ("nodes", "edges") and len(tokens) >= 2:
+                table = self.nodes if tokens[0] == "nodes" else self.edges
+                key = self._member_key(tokens[0], table, tokens[1], op, path) if len(tokens) == 2 else tokens[1]
+                (touched_nodes if tokens[0] == "nodes" else touched_edges).add(key)
+                if len(tokens) == 2:
+                    self._apply_member(table, key, op, path, set_id=tokens[0] == "nodes")
+                else:
+                    if key not in table:
+                        raise DeltaError(f"Path {path} does not exist")
+                    _apply_pointer(table[key], tokens[2:], op, path)
+            elif tokens[0] in ("nodes", "edges") and op["op"] == "replace":
+                if not isinstance(op.get("value"), list):
+                    raise DeltaError(f"{path} must be a list")
+                touched = touched_nodes if tokens[0] == "nodes" else touched_edges
+                touched.update(getattr(self, tokens[0]))
+                self._replace_table(tokens[0], copy.deepcopy(op["value"]))
+                touched.update(getattr(self, tokens[0]))
+            elif tokens[0] in ("nodes", "edges"):
+                raise DeltaError(f"Address {tokens[0]} by id, e.g. /{tokens[0]}/<id>")
+            else:
+                _apply_pointer(self.extra, tokens, op, path)
+        return touched_nodes, touched_edges
+
+    @staticmethod
+    def _member_key(name: str, table: Dict[str, Dict[str, Any]], key: str, op: Dict[str, Any], path: str) -> str:
+        """
+        Key for ``/nodes/<key>`` / ``/edges/<key>``: ``-`` (append) takes it
+        from the value; a value whose id disagrees with the path is rejected.
+        """
+        value = op.get("value")
+        if op["op"] in ("add", "replace") and not isinstance(value, dict):
+            raise DeltaError(f"{path} must be an object")
+        if key == "-":
+            if op["op"] != "add":
+                raise DeltaError(f"{path}: '-' only appends")
+            if name == "nodes" and value.get("id") in (None, ""):
+                raise DeltaError(f"{path}: appended nodes need an id")
+            key = _appended_key(name, value, table)
+            if key in table:
+                raise DeltaError(f"{path}: {name[:-1]} {key} already exists")
+            return key
+        if op["op"] in ("add", "replace") and value.get("id") not in (None, "") and str(value["id"]) != key:
+            raise DeltaError(f"{path}: value id {value['id']!r} does not match the path")
+        return key
+
+    @staticmethod
+    def _apply_member(table: Dict[str, Dict[str, Any]], key: str, op: Dict[str, Any], path: str,
+                      set_id: bool = True):
+        """
+        Add / replace / remove / test one node or edge. A node's id is its key;
+        an edge is stored as given, since id-less edges are keyed by endpoints.
+        """
+        kind = op["op"]
+        if kind == "test":
+            if table.get(key) != op.get("value"):
+                raise DeltaError(f"Test failed at {path}")
+        elif kind == "remove":
+            if key not in table:
+                raise DeltaError(f"Path {path} does not exist")
+            del table[key]
+        else:
+            if kind == "replace" and key not in table:
+                raise DeltaError(f"Path {path} does not exist")
+            value = copy.deepcopy(op.get("value"))
+            if set_id:
+                value["id"] = key
+            table[key] = value
@@ -1,14 +1,222 @@
 """
 Flow engine — interprets canvas JSON during live calls.
 """
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import re
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Tuple
 
 logger = logging.getLogger("tron.flow_engine")
 
+# Node types emitted by the bundled templates → canonical canvas types
+NODE_ALIASES = {
+    "start": "start_outbound",
+    "say": "speak",
+    "ask": "speak",
+    "collect": "set_variable",
+    "branch": "branch_intent",
+    "hangup": "end_call",
+}
+
+# Nodes whose text is fixed and spoken verbatim (cacheable TTS)
+SCRIPTED_NODE_TYPES = ("greeting", "speak", "end_call")
+
+
+def node_type(node: Dict[str, Any]) -> str:
+    """
+    Canonical type of a canvas node. The editor stores every node as
+    ``type: "flowNode"`` with the real type in ``data.type``.
+    """
+    t = node.get("type", "")
+    if t == "flowNode" or not t:
+        t = (node.get("data") or {}).get("type", "")
+    return NODE_ALIASES.get(t, t)
+
+
+def node_text(node: Dict[str, Any]) -> str:
+    """Verbatim text a scripted node speaks ('' if none)."""
+    data = node.get("data") or {}
+    if node_type(node) == "end_call":
+        return data.get("closing_message") or data.get("text") or ""
+    return data.get("text") or ""
+
+
+def scripted_texts(canvas) -> List[str]:
+    """All fixed texts spoken by greeting/speak/end_call nodes in a canvas."""
+    if not canvas:
+        return []
+    if isinstance(canvas, CompiledFlow):
+        return list(canvas.scripted)
+    return list(CompiledFlow(canvas).scripted)
+
+
+# ─────────────── {{variable}} templates ───────────────
+
+_VARIABLE_RE = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+# Sentence ends, incl. the Devanagari danda
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+class Template:
+    """
+    A text with ``{{name}}`` slots, parsed once: ``literals`` has one more
+    entry than ``names`` and rendering interleaves them with a single join.
+    Unknown names render empty.
+    """
+
+    __slots__ = ("source", "literals", "names", "_sentences")
+
+    def __init__(self, source: str):
+        self.source = source or ""
+        literals, names = [], []
+        pos = 0
+        for m in _VARIABLE_RE.finditer(self.source):
+            literals.append(self.source[pos:m.start()])
+            names.append(m.group(1))
+            pos = m.end()
+        literals.append(self.source[pos:])
+        self.literals: Tuple[str, ...] = tuple(literals)
+        self.names: Tuple[str, ...] = tuple(names)
+        self._sentences: Optional[Tuple["Template", ...]] = None
+
+    @property
+    def static(self) -> bool:
+        return not self.names
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        if not self.names:
+            return self.source
+        parts = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            value = variables.get(name)
+            parts.append("" if value is None else str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+    @property
+    def sentences(self) -> Tuple["Template", ...]:
+        if self._sentences is None:
+            self._sentences = tuple(compile_template(s) for s in _SENTENCE_END_RE.split(self.source.strip()) if s)
+        return self._sentences
+
+    def cacheable_texts(self) -> List[str]:
+        """Texts whose audio is the same for every call: the whole text, or its slot-free sentences."""
+        if self.static:
+            return [self.source.strip()] if self.source.strip() else []
+        return [s.source for s in self.sentences if s.static]
+
+    def speech_parts(self, variables: Dict[str, Any]) -> List[Tuple[str, bool]]:
+        """
+        Rendered text as (text, static) runs of whole sentences: static runs
+        can be replayed from the TTS cache, the others are synthesized per call.
+        """
+        if self.static:
+            return [(self.source, True)] if self.source else []
+        parts: List[Tuple[str, bool]] = []
+        for sentence in self.sentences:
+            text = sentence.render(variables)
+            if parts and parts[-1][1] == sentence.static and not sentence.static:
+                parts[-1] = (f"{parts[-1][0]} {text}", False)
+            else:
+                parts.append((text, sentence.static))
+        return parts
+
+
+@lru_cache(maxsize=2048)
+def compile_template(text: str) -> Template:
+    """Parsed template for ``text``, shared process-wide."""
+    return Template(text)
+
+
+def render_text(text: str, variables: Dict[str, Any]) -> str:
+    """Substitute ``{{name}}`` placeholders (unknown names become empty)."""
+    if not text or "{{" not in text:
+        return text or ""
+    return compile_template(text).render(variables)
+
+
+def _edge_label(edge: Dict[str, Any]) -> str:
+    """Branch label of an edge: its label, else a non-default source handle."""
+    handle = edge.get("sourceHandle")
+    label = edge.get("label") or (handle if handle not in (None, "default") else "")
+    return str(label).strip()
+
+
+class CompiledFlow:
+    """
+    Immutable, pre-indexed form of one flow canvas version.
+
+    Built once per (flow_id, version) by ``compile_flow`` and shared by every
+    call (``core.flow_cache``): node table with canonical types, adjacency
+    as ``(target, label)`` tuples per source, the start node, the
+    pre-rendered prompt summary and scripted texts. Per-voice TTS cache keys
+    and per-node branch classifiers are memoized on first use.
+    """
+
+    __slots__ = ("flow_id", "version", "nodes", "types", "edges", "start",
+                 "scripted", "_summary", "_tts_keys", "classifiers")
+
+    def __init__(self, canvas: Optional[Dict[str, Any]], flow_id: Optional[str] = None, version: Optional[int] = None):
+        canvas = canvas or {}
+        nodes = {n["id"]: n for n in canvas.get("nodes", []) if n.get("id")}
+        edges: Dict[str, List[Tuple[str, str]]] = {}
+        for edge in canvas.get("edges", []):
+            edges.setdefault(edge.get("source"), []).append((edge.get("target"), _edge_label(edge)))
+        self.flow_id = flow_id
+        self.version = version
+        self.nodes: Mapping[str, Dict[str, Any]] = MappingProxyType(nodes)
+        self.types: Mapping[str, str] = MappingProxyType({nid: node_type(n) for nid, n in nodes.items()})
+        self.edges: Mapping[str, Tuple[Tuple[str, str], ...]] = MappingProxyType(
+            {src: tuple(out) for src, out in edges.items()}
+        )
+        self.start: Optional[str] = next(
+            (nid for nid, t in self.types.items() if t in ("start_outbound", "start_inbound")), None,
+        )
+        # Same audio on every call: scripted texts, or the slot-free sentences of templated ones
+        self.scripted: Tuple[str, ...] = tuple(dict.fromkeys(
+            text
+            for nid, n in nodes.items() if self.types[nid] in SCRIPTED_NODE_TYPES
+            for text in compile_template(node_text(n)).cacheable_texts()
+        ))
+        self._summary: Optional[str] = None
+        self._tts_keys: Dict[Tuple, Mapping[str, str]] = {}
+        # node_id → compiled KeywordMatcher / IntentClassifier (read-only once built)
+        self.classifiers: Dict[str, Any] = {}
+
+    def __repr__(self) -> str:
+        return f"<CompiledFlow {self.flow_id} v{self.version} nodes={len(self.nodes)}>"
+
+    @property
+    def summary(self) -> str:
+        """Flow instructions for the LLM prompt (rendered once)."""
+        if self._summary is None:
+            self._summary = _summarize_flow(self)
+        return self._summary
+
+    def tts_keys(self, voice: Dict[str, Any]) -> Mapping[str, str]:
+        """Scripted text → TTS cache key for ``voice`` (``tts_cache.voice_params``)."""
+        memo_key = tuple(sorted(voice.items()))
+        keys = self._tts_keys.get(memo_key)
+        if keys is None:
+            from tron.core.tts_cache import cache_key
+
+            keys = self._tts_keys[memo_key] = MappingProxyType(
+                {text: cache_key(text, **voice) for text in self.scripted}
+            )
+        return keys
+
+
+def compile_flow(canvas: Optional[Dict[str, Any]], flow_id: Optional[str] = None,
+                 version: Optional[int] = None) -> CompiledFlow:
+    """Compile a canvas (uncached; see ``core.flow_cache`` for the shared LRU)."""
+    return CompiledFlow(canvas, flow_id, version)
+
 
 def build_prompt_from_flow(
-    flow_canvas: Optional[Dict[str, Any]],
+    flow_canvas,
     agent_persona: str,
     contact_name: Optional[str] = None,
     contact_metadata: Optional[Dict[str, Any]] = None,
@@ -17,18 +225,26 @@ def build_prompt_from_flow(
     Build a system prompt from the agent persona and optional flow canvas.
     For simple (no-canvas) agents, just returns the persona with context.
     For flow-based agents, summarizes the flow as instructions.
+
+    The static part comes first and the per-contact part last, so every call
+    of a campaign shares the same prompt prefix (see ``build_static_prompt``).
     """
-    parts = [agent_persona or "You are a helpful voice assistant."]
+    static = build_static_prompt(flow_canvas, agent_persona)
+    contact = build_contact_context(contact_name, contact_metadata)
+    return f"{static}\n\n{contact}" if contact else static
 
-    if contact_name:
-        parts.append(f"\nThe person you are calling is named: {contact_name}")
 
-    if contact_metadata:
-        meta_str = ", ".join(f"{k}: {v}" for k, v in contact_metadata.items())
-        parts.append(f"Additional context: {meta_str}")
+def build_static_prompt(flow_canvas, agent_persona: str) -> str:
+    """
+    The part of the prompt that is identical for every call of an
+    (agent, flow version): byte-stable so LLM servers can reuse their
+    KV / prompt cache across calls.
+    """
+    parts = [agent_persona or "You are a helpful voice assistant."]
 
-    if flow_canvas and flow_canvas.get("nodes"):
-        flow_summary = _summarize_flow(flow_canvas)
+    flow = flow_canvas if isinstance(flow_canvas, CompiledFlow) else CompiledFlow(flow_canvas)
+    if flow.nodes:
+        flow_summary = flow.summary
         if flow_summary:
             parts.append(f"\nConversation Flow:\n{flow_summary}")
 
@@ -38,55 +254,83 @@ def build_prompt_from_flow(
     return "\n".join(parts)
 
 
-def _summarize_flow(canvas: Dict[str, Any]) -> str:
-    """Convert canvas JSON to a text summary for the LLM prompt."""
-    nodes = {n["id"]: n for n in canvas.get("nodes", [])}
-    edges = canvas.get("edges", [])
-
-    # Build adjacency list
-    adjacency = {}
-    for edge in edges:
-        src = edge.get("source")
-        tgt = edge.get("target")
-        handle = edge.get("sourceHandle", "default")
-        if src not in adjacency:
-            adjacency[src] = []
-        adjacency[src].append({"target": tgt, "handle": handle, "label": edge.get("label", "")})
-
-    # Find start node
-    start_node = next(
-        (n for n in nodes.values() if n.get("type") in ("start_outbound", "start_inbound")),
-        None
-    )
-    if not start_node:
+def build_agent_prompt(config: Dict[str, Any]) -> str:
+    """
+    Static system prompt of a voice-worker agent (persona, language rules,
+    guardrails) from an agent config dict or ``AgentModel``. The warm-up
+    step primes LLM servers with exactly this text.
+    """
+    get = config.get if isinstance(config, dict) else (lambda k, d=None: getattr(config, k, d))
+    parts = []
+    persona = get('persona') or ''
+    if persona:
+        parts.append(persona)
+    else:
+        parts.append("You are a helpful AI assistant making an outbound call. Be concise and natural. Speak in the same language the user prefers.")
+
+    language = get('language') or 'hi-IN'
+    if language.startswith('hi'):
+        parts.append("\nRespond in Hindi by default unless the user speaks in another language. Keep responses short (1-2 sentences max per turn).")
+    else:
+        parts.append("\nKeep responses short and conversational (1-2 sentences max per turn).")
+
+    # Guardrails
+    guardrails = get('guardrails') or {}
+    if isinstance(guardrails, dict):
+        forbidden = guardrails.get('forbidden_topics', [])
+        if forbidden:
+            parts.append(f"\nNever discuss: {', '.join(forbidden)}.")
+        disclosures = guardrails.get('required_disclosures', '')
+        if disclosures:
+            parts.append(f"\nRequired disclosure: {disclosures}")
+
+    return '\n'.join(parts)
+
+
+def build_contact_context(
+    contact_name: Optional[str] = None,
+    contact_metadata: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Per-contact prompt suffix (empty when there is nothing to say). Keys are sorted."""
+    parts = []
+    if contact_name:
+        parts.append(f"The person you are calling is named: {contact_name}")
+    if contact_metadata:
+        meta_str = ", ".join(f"{k}: {contact_metadata[k]}" for k in sorted(contact_metadata))
+        parts.append(f"Additional context: {meta_str}")
+    return "\n".join(parts)
+
+
+def prompt_hash(text: str) -> str:
+    """Short stable hash of a prompt prefix, for cache-reuse metrics."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _summarize_flow(flow: CompiledFlow) -> str:
+    """Convert a compiled flow to a text summary for the LLM prompt (BFS from the start node)."""
+    if flow.start is None:
         return ""
 
-    # Walk the flow
     lines = ["Follow this conversation flow:"]
-    visited = set()
-    queue = [start_node["id"]]
+    visited = {flow.start}
+    queue = deque([flow.start])
 
     while queue:
-        node_id = queue.pop(0)
-        if node_id in visited:
-            continue
-        visited.add(node_id)
-
-        node = nodes.get(node_id)
+        node_id = queue.popleft()
+        node = flow.nodes.get(node_id)
         if not node:
             continue
 
-        node_type = node.get("type", "")
-        data = node.get("data", {})
-
         # Describe this node
-        desc = _describe_node(node_type, data)
+        desc = _describe_node(flow.types[node_id], node.get("data", {}))
         if desc:
             lines.append(f"- {desc}")
 
         # Queue children
-        for edge in adjacency.get(node_id, []):
-            queue.append(edge["target"])
+        for target, _ in flow.edges.get(node_id, ()):
+            if target not in visited:
+                visited.add(target)
+                queue.append(target)
 
     return "\n".join(lines)
 
@@ -125,7 +369,7 @@ def _describe_node(node_type: str, data: Dict[str, Any]) -> str:
         number = data.get("transfer_to", "")
         return f"Transfer the call to {number}."
     elif node_type == "end_call":
-        text = data.get("closing_message", "")
+        text = data.get("closing_message") or data.get("text", "")
         outcome = data.get("outcome", "")
         parts = []
         if text:
@@ -142,44 +386,286 @@ def _describe_node(node_type: str, data: Dict[str, Any]) -> str:
 
 def validate_flow(canvas: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Validate a flow canvas. Returns {"valid": bool, "errors": [...], "warnings": [...]}.
+    Validate a flow canvas. Returns {"valid": bool, "errors": [...], "warnings": [...]},
+    plus structured "issues" (see ``core.flow_validator``).
     """
-    if not canvas:
-        return {"valid": True, "errors": [], "warnings": ["No canvas data — agent will use freeform mode."]}
-
-    nodes = canvas.get("nodes", [])
-    edges = canvas.get("edges", [])
-    errors = []
-    warnings = []
-
-    if not nodes:
-        return {"valid": False, "errors": ["Flow has no nodes."], "warnings": []}
-
-    # Check for start node
-    start_nodes = [n for n in nodes if n.get("type") in ("start_outbound", "start_inbound")]
-    if not start_nodes:
-        errors.append("Flow must have at least one Start node.")
-    elif len(start_nodes) > 1:
-        warnings.append("Flow has multiple Start nodes — only the first will be used.")
-
-    # Check for at least one end node
-    end_nodes = [n for n in nodes if n.get("type") == "end_call"]
-    if not end_nodes:
-        warnings.append("Flow has no End Call node — call may never terminate gracefully.")
-
-    # Check disconnected nodes
-    connected = set()
-    for edge in edges:
-        connected.add(edge.get("source"))
-        connected.add(edge.get("target"))
-
-    node_ids = {n["id"] for n in nodes}
-    disconnected = node_ids - connected - {n["id"] for n in start_nodes}
-    if disconnected:
-        warnings.append(f"{len(disconnected)} node(s) are not connected to any edge.")
-
-    return {
-        "valid": len(errors) == 0,
-        "errors": errors,
-        "warnings": warnings
-    }
+    from tron.core.flow_validator import validate_canvas
+
+    return validate_canvas(canvas)
+
+
+# ─────────────── Runtime interpreter ───────────────
+
+# Nodes that need something the caller said
+INPUT_NODE_TYPES = ("listen", "branch_keyword", "branch_intent", "branch_sentiment", "set_variable")
+# Edge labels that mean "none of the other branches"
+FALLBACK_LABELS = ("", "default", "else", "other", "otherwise", "fallback", "no match")
+SENTIMENT_LABELS = ("positive", "neutral", "negative")
+
+
+class FlowRuntime:
+    """
+    State machine over a flow canvas for one call.
+
+    Scripted nodes (greeting/speak/wait/webhook/transfer/end_call),
+    ``branch_keyword`` and confidently classified ``branch_intent`` nodes
+    (``core.classifier``) are executed here without the LLM. The runtime returns
+    *actions* for the voice worker to carry out::
+
+        {"type": "say", "text": ..., "parts": [(text, static), ...]}  # parts only for templated text
+        {"type": "llm", "instructions": ...}          # llm_response: generate a reply
+        {"type": "decide", "prompt": ..., "text": ...} # unsure branch_intent, branch_sentiment, set_variable
+        {"type": "wait", "seconds": ...}
+        {"type": "webhook", "url": ..., "method": ..., "variables": {...}}
+        {"type": "transfer", "to": ...}
+        {"type": "end", "text": ..., "outcome": ...}
+
+    After a ``decide`` action the worker asks the LLM and passes the answer to
+    ``decide()``, which continues the walk. When no action is pending the
+    runtime is waiting for the caller (``on_user_turn``) or has ended.
+    """
+
+    MAX_STEPS = 200
+
+    def __init__(self, flow, variables: Optional[Dict[str, Any]] = None):
+        # A CompiledFlow (shared, from core.flow_cache) or a raw canvas
+        self.flow = flow if isinstance(flow, CompiledFlow) else CompiledFlow(flow)
+        self.nodes = self.flow.nodes
+        self.edges = self.flow.edges
+        self.variables: Dict[str, Any] = dict(variables or {})
+        self.collected: Dict[str, Any] = {}
+        self.current: Optional[str] = None   # node waiting for the caller or a decision
+        self.awaiting_decision = False
+        self.ended = False
+        self.last_user_text = ""
+        self._fresh = False  # last_user_text not yet answered by the agent
+        # Branches routed without the LLM
+        self.local_routes = 0
+
+    @property
+    def start_node(self) -> Optional[Dict[str, Any]]:
+        return self.nodes.get(self.flow.start) if self.flow.start else None
+
+    # ── Public API ──
+
+    def start(self) -> List[Dict[str, Any]]:
+        start = self.start_node
+        if start is None:
+            self.ended = True
+            return []
+        return self._walk(self._next(start["id"]))
+
+    def on_user_turn(self, text: str) -> List[Dict[str, Any]]:
+        """Feed a finished caller utterance; returns the actions it triggers."""
+        if self.ended or self.awaiting_decision:
+            return []
+        self.last_user_text = (text or "").strip()
+        self._fresh = True
+        node_id, self.current = self.current, None
+        if node_id is None:
+            return []
+        if self.flow.types[node_id] == "listen":
+            return self._walk(self._next(node_id))
+        return self._walk(node_id)
+
+    def decide(self, answer: str) -> List[Dict[str, Any]]:
+        """Apply the LLM's answer to the pending ``decide`` action and continue."""
+        if not self.awaiting_decision or self.current is None:
+            return []
+        node_id, self.current = self.current, None
+        self.awaiting_decision = False
+        node = self.nodes[node_id]
+        answer = (answer or "").strip()
+        if self.flow.types[node_id] == "set_variable":
+            name = self._variable_name(node)
+            if answer and answer.upper() != "NONE":
+                self.variables[name] = answer
+                self.collected[name] = answer
+            return self._walk(self._next(node_id))
+        return self._walk(self._branch_target(node_id, answer))
+
+    # ── Walk ──
+
+    def _walk(self, node_id: Optional[str]) -> List[Dict[str, Any]]:
+        actions: List[Dict[str, Any]] = []
+        for _ in range(self.MAX_STEPS):
+            node = self.nodes.get(node_id) if node_id else None
+            if node is None:
+                # Dead end: nothing left to say, let the call finish
+                self.ended = True
+                actions.append({"type": "end", "text": "", "outcome": None})
+                return actions
+            t = self.flow.types[node_id]
+            data = node.get("data") or {}
+
+            if t in ("greeting", "speak"):
+                template = compile_template(node_text(node))
+                text = template.render(self.variables)
+                if text:
+                    action = {"type": "say", "text": text, "node_id": node_id}
+                    if not template.static:
+                        action["parts"] = template.speech_parts(self.variables)
+                    actions.append(action)
+                    self._fresh = False
+                node_id = self._next(node_id)
+            elif t == "llm_response":
+                actions.append({
+                    "type": "llm",
+                    "instructions": render_text(data.get("instructions", ""), self.variables),
+                    "node_id": node_id,
+                })
+                self._fresh = False
+                node_id = self._next(node_id)
+            elif t == "wait":
+                actions.append({"type": "wait", "seconds": float(data.get("seconds", 2) or 0)})
+                node_id = self._next(node_id)
+            elif t == "webhook":
+                actions.append({
+                    "type": "webhook",
+                    "url": render_text(data.get("url", ""), self.variables),
+                    "method": (data.get("method") or "POST").upper(),
+                    "variables": dict(self.variables),
+                })
+                node_id = self._next(node_id)
+            elif t == "transfer":
+                self.ended = True
+                actions.append({"type": "transfer", "to": render_text(data.get("transfer_to", ""), self.variables)})
+                return actions
+            elif t == "end_call":
+                self.ended = True
+                template = compile_template(node_text(node))
+                action = {
+                    "type": "end",
+                    "text": template.render(self.variables),
+                    "outcome": data.get("outcome") or None,
+                }
+                if not template.static:
+                    action["parts"] = template.speech_parts(self.variables)
+                actions.append(action)
+                return actions
+            elif t in INPUT_NODE_TYPES:
+                if t == "listen" or not self._fresh:
+                    # Wait for the caller
+                    self.current = node_id
+                    return actions
+                if t == "branch_keyword":
+                    self.local_routes += 1
+                    node_id = self._branch_target(node_id, self._match_keyword(node_id))
+                    continue
+                if t == "branch_intent":
+                    label = self._classify_intent(node_id)
+                    if label is not None:
+                        # Confident local match: no LLM round trip
+                        self.local_routes += 1
+                        node_id = self._branch_target(node_id, label)
+                        continue
+                self.current = node_id
+                self.awaiting_decision = True
+                actions.append({
+                    "type": "decide",
+                    "prompt": self._decision_prompt(node),
+                    "text": self.last_user_text,
+                    "node_id": node_id,
+                })
+                return actions
+            else:
+                # start nodes and anything unknown are pass-through
+                node_id = self._next(node_id)
+
+        logger.warning("Flow walk exceeded step limit (cycle without input?), ending call")
+        self.ended = True
+        actions.append({"type": "end", "text": "", "outcome": None})
+        return actions
+
+    def _next(self, node_id: str) -> Optional[str]:
+        edges = self.edges.get(node_id)
+        return edges[0][0] if edges else None
+
+    # ── Branching ──
+
+    def _branch_labels(self, node_id: str) -> List[str]:
+        node = self.nodes[node_id]
+        data = node.get("data") or {}
+        if self.flow.types[node_id] == "branch_sentiment":
+            return list(SENTIMENT_LABELS)
+        labels = [i.get("label", "") for i in data.get("intents", []) if isinstance(i, dict)]
+        labels += [label for _, label in self.edges.get(node_id, ())]
+        return [l for l in dict.fromkeys(labels) if l and l.lower() not in FALLBACK_LABELS]
+
+    def _branch_target(self, node_id: str, label: Optional[str]) -> Optional[str]:
+        edges = self.edges.get(node_id) or ()
+        wanted = (label or "").strip().lower()
+        if wanted:
+            for target, edge_label in edges:
+                if edge_label.lower() == wanted:
+                    return target
+        for target, edge_label in edges:
+            if edge_label.lower() in FALLBACK_LABELS:
+                return target
+        # No explicit fallback: the last branch catches everything else
+        return edges[-1][0] if edges else None
+
+    def _match_keyword(self, node_id: str) -> Optional[str]:
+        """Label of the branch whose keywords occur in the caller's words (longest match wins)."""
+        matcher = self.flow.classifiers.get(node_id)
+        if matcher is None:
+            from tron.core.classifier import KeywordMatcher, label_variants
+
+            data = self.nodes[node_id].get("data") or {}
+            keywords = data.get("keywords") or {}
+            phrases = []
+            for label in self._branch_labels(node_id):
+                words = keywords.get(label) if isinstance(keywords, dict) else None
+                if words is None:
+                    words = label.split(",") + list(label_variants(label))
+                phrases.extend((str(w), label) for w in words)
+            matcher = self.flow.classifiers[node_id] = KeywordMatcher(phrases)
+        return matcher.match(self.last_user_text)
+
+    def _classify_intent(self, node_id: str) -> Optional[str]:
+        """Intent label from the local classifier, or None when it isn't confident."""
+        classifier = self.flow.classifiers.get(node_id)
+        if classifier is None:
+            from tron.core.classifier import IntentClassifier, DEFAULT_INTENT_THRESHOLD
+
+            data = self.nodes[node_id].get("data") or {}
+            intents = {
+                i["label"]: i for i in data.get("intents", [])
+                if isinstance(i, dict) and i.get("label")
+            }
+            for label in self._branch_labels(node_id):
+                intents.setdefault(label, {"label": label})
+            threshold = float(data.get("confidence_threshold") or DEFAULT_INTENT_THRESHOLD)
+            classifier = self.flow.classifiers[node_id] = IntentClassifier(list(intents.values()), threshold)
+        label, confidence = classifier.classify(self.last_user_text)
+        logger.debug(f"Intent at {node_id}: {label or 'unsure'} ({confidence:.2f})")
+        return label
+
+    # ── LLM decisions ──
+
+    @staticmethod
+    def _variable_name(node: Dict[str, Any]) -> str:
+        data = node.get("data") or {}
+        name = data.get("variable_name") or data.get("label") or node.get("id", "value")
+        return re.sub(r"\W+", "_", str(name).strip().lower()).strip("_") or "value"
+
+    def _decision_prompt(self, node: Dict[str, Any]) -> str:
+        data = node.get("data") or {}
+        t = node_type(node)
+        if t == "set_variable":
+            name = self._variable_name(node)
+            hint = data.get("description") or data.get("label") or name
+            return (
+                f"Extract the value of '{name}' ({hint}) from the caller's reply on a phone call. "
+                "Reply with only the value, or NONE if it is not there."
+            )
+        labels = self._branch_labels(node["id"])
+        condition = data.get("condition") or data.get("label") or ""
+        lines = [f"Classify the caller's reply on a phone call into exactly one of: {', '.join(labels)}."]
+        if condition:
+            lines.append(f"Context: {condition}")
+        for intent in data.get("intents", []):
+            if isinstance(intent, dict) and intent.get("description"):
+                lines.append(f"- {intent.get('label')}: {intent['description']}")
+        lines.append("Reply with the label only, or NONE if nothing fits.")
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""
+Flow version history as periodic snapshots plus deltas.
+
+Every save of a flow writes one ``FlowVersionModel`` row: usually the delta
+from the previous version (``core.flow_delta`` ops, a few hundred bytes for
+an editor autosave), and a full canvas snapshot every
+``settings.flow_snapshot_interval`` versions or when the delta would not be
+smaller than the canvas. Rebuilding version *v* reads the nearest snapshot at
+or below *v* and replays at most ``interval - 1`` deltas, in one query.
+
+``FlowModel.canvas_data`` still holds the current version, so the common
+case (the latest flow) never touches the history.
+"""
+import json
+import logging
+from typing import Optional, Dict, Any, List, Tuple
+
+from tron.core.flow_delta import IndexedCanvas, DeltaError
+
+logger = logging.getLogger("tron.flow_history")
+
+
+def diff_canvas(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Delta turning ``old`` into ``new``: changed nodes and edges are replaced
+    whole, by id. When the order changed other than by appending (edge order
+    decides which edge is followed), the whole list is replaced instead.
+    """
+    before, after = IndexedCanvas(old), IndexedCanvas(new)
+    ops: List[Dict[str, Any]] = []
+    for table in ("nodes", "edges"):
+        old_items, new_items = getattr(before, table), getattr(after, table)
+        kept = [k for k in old_items if k in new_items]
+        if kept + [k for k in new_items if k not in old_items] != list(new_items):
+            ops.append({"op": "replace", "path": f"/{table}", "value": list(new_items.values())})
+            continue
+        for key in old_items:
+            if key not in new_items:
+                ops.append({"op": "remove", "path": f"/{table}/{_escape(key)}"})
+        for key, value in new_items.items():
+            if key not in old_items:
+                ops.append({"op": "add", "path": f"/{table}/{_escape(key)}", "value": value})
+            elif old_items[key] != value:
+                ops.append({"op": "replace", "path": f"/{table}/{_escape(key)}", "value": value})
+    for key in before.extra:
+        if key not in after.extra:
+            ops.append({"op": "remove", "path": f"/{_escape(key)}"})
+    for key, value in after.extra.items():
+        if before.extra.get(key, object()) != value:
+            ops.append({"op": "add", "path": f"/{_escape(key)}", "value": value})
+    return ops
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def apply_delta(canvas: Optional[Dict[str, Any]], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A new canvas with ``ops`` applied (raises ``DeltaError``)."""
+    indexed = IndexedCanvas(canvas)
+    indexed.apply(ops)
+    return indexed.to_canvas()
+
+
+async def record_version(db, flow_id: str, version: int, canvas: Optional[Dict[str, Any]],
+                         ops: Optional[List[Dict[str, Any]]] = None):
+    """
+    Add the history row for ``version`` (not committed). ``ops`` is the delta
+    from ``version - 1``; without it, or on snapshot versions, the full
+    canvas is stored.
+    """
+    from tron.core.config import settings
+    from tron.core.database import FlowVersionModel
+
+    interval = max(1, settings.flow_snapshot_interval)
+    snapshot = ops is None or version <= 1 or version % interval == 0
+    if not snapshot and len(json.dumps(ops)) >= len(json.dumps(canvas or {})):
+        snapshot = True
+    if snapshot:
+        db.add(FlowVersionModel(flow_id=flow_id, version=version, snapshot=canvas or {}))
+    else:
+        db.add(FlowVersionModel(flow_id=flow_id, version=version, delta=ops))
+
+
+async def ensure_history(db, flow) -> None:
+    """Snapshot the current version of a flow saved before history was kept (not committed)."""
+    from tron.core.database import FlowVersionModel
+    from sqlalchemy import select
+
+    result = await db.execute(
+        select(FlowVersionModel.id).where(
+            FlowVersionModel.flow_id == flow.id, FlowVersionModel.version == flow.version,
+        )
+    )
+    if result.first() is None:
+        db.add(FlowVersionModel(flow_id=flow.id, version=flow.version, snapshot=flow.canvas_data or {}))
+
+
+async def load_version(db, flow_id: str, version: int) -> Optional[Dict[str, Any]]:
+    """Canvas of ``flow_id`` at ``version``, or None if the history doesn't cover it."""
+    from tron.core.database import FlowVersionModel
+    from sqlalchemy import select, func
+
+    base = (
+        select(func.max(FlowVersionModel.version))
+        .where(
+            FlowVersionModel.flow_id == flow_id,
+            FlowVersionModel.version <= version,
+            FlowVersionModel.snapshot.isnot(None),
+        )
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(FlowVersionModel.version, FlowVersionModel.snapshot, FlowVersionModel.delta)
+        .where(
+            FlowVersionModel.flow_id == flow_id,
+            FlowVersionModel.version >= base,
+            FlowVersionModel.version <= version,
+        )
+        .order_by(FlowVersionModel.version)
+    )
+    rows = result.all()
+    if not rows or rows[-1].version != version:
+        return None
+
+    expected = rows[0].version
+    indexed = None
+    for row in rows:
+        if row.version != expected:
+            logger.warning(f"Flow {flow_id} history has a gap before v{row.version}")
+            return None
+        expected += 1
+        try:
+            if indexed is None:
+                indexed = IndexedCanvas(row.snapshot)
+            else:
+                indexed.apply(row.delta or [])
+        except DeltaError as e:
+            logger.warning(f"Flow {flow_id} v{row.version} delta does not apply: {e}")
+            return None
+    return indexed.to_canvas()
+
+
+async def list_versions(db, flow_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """Newest-first summary of a flow's saved versions."""
+    from tron.core.database import FlowVersionModel
+    from sqlalchemy import select
+
+    # Snapshots are whole canvases: only ask whether there is one
+    result = await db.execute(
+        select(
+            FlowVersionModel.version,
+            FlowVersionModel.snapshot.isnot(None).label("is_snapshot"),
+            FlowVersionModel.delta,
+            FlowVersionModel.created_at,
+        )
+        .where(FlowVersionModel.flow_id == flow_id)
+        .order_by(FlowVersionModel.version.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            "version": row.version,
+            "kind": "snapshot" if row.is_snapshot else "delta",
+            "ops": len(row.delta or []),
+            "created_at": row.created_at,
+        }
+        for row in result.all()
+    ]
+
+
+async def current_flow_version(db, agent_id: str) -> Tuple[Optional[str], Optional[int]]:
+    """(flow_id, version) of the agent's flow right now, to pin a call to; (None, None) for freeform agents."""
+    from tron.core.database import AgentModel, FlowModel
+    from sqlalchemy import select
+
+    result = await db.execute(
+        select(FlowModel.id, FlowModel.version).join(AgentModel, AgentModel.flow_id == FlowModel.id)
+        .where(AgentModel.id == agent_id)
+    )
+    row = result.first()
+    return (row.id, row.version) if row else (None, None)
@@ -0,0 +1,535 @@
+"""
+Full-graph flow validation in O(V + E), with incremental re-validation.
+
+Checks the things that hang or silently break live calls:
+
+- structure: start node present, edge endpoints exist, ids unique
+- reachability from the start node(s) (BFS)
+- loops that never wait for the caller (Tarjan SCC on two subgraphs):
+    * a loop with no listen/branch/extract node keeps the agent talking
+      (or pinging webhooks) forever
+    * a loop with no listen and no speaking node re-evaluates branches on
+      the same reply forever
+- handle coverage of branch nodes: outgoing edges present, every intent
+  routed, labels that can match, more than one catch-all
+- per-node data: empty scripted text, transfer without a number, dead ends
+
+``FlowValidator`` keeps the graph indexes between runs. ``apply(ops)`` takes
+an editor delta (``core.flow_delta``) and re-checks only what it touches:
+per-node checks for the changed nodes and their neighbours, reachability by
+re-seeding just the downstream region of removed edges, and SCCs only inside
+loops the change can create or break.
+"""
+import logging
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, Iterable
+
+from tron.core.flow_delta import IndexedCanvas, DeltaError
+from tron.core.flow_engine import (
+    node_type, node_text, _edge_label, INPUT_NODE_TYPES, FALLBACK_LABELS, SENTIMENT_LABELS,
+)
+
+logger = logging.getLogger("tron.flow_validator")
+
+START_TYPES = ("start_outbound", "start_inbound")
+TERMINAL_TYPES = ("end_call", "transfer")
+BRANCH_TYPES = ("branch_keyword", "branch_intent", "branch_sentiment")
+SPEAKING_TYPES = ("greeting", "speak", "llm_response")
+KNOWN_TYPES = set(START_TYPES + TERMINAL_TYPES + BRANCH_TYPES + SPEAKING_TYPES + INPUT_NODE_TYPES
+                  + ("wait", "webhook"))
+
+# Loop kinds: name → (node types that break the loop, message)
+LOOP_KINDS = {
+    "loop_no_input": (
+        set(INPUT_NODE_TYPES),
+        "Loop never waits for the caller ({nodes}); the agent would talk or call webhooks forever.",
+    ),
+    "loop_no_speech": (
+        {"listen"} | set(SPEAKING_TYPES),
+        "Loop has no listen or speaking node ({nodes}); it would re-route the same reply forever.",
+    ),
+}
+
+
+def _issue(severity: str, code: str, message: str, node_id: Optional[str] = None,
+           edge_id: Optional[str] = None) -> Dict[str, Any]:
+    issue = {"severity": severity, "code": code, "message": message}
+    if node_id is not None:
+        issue["node_id"] = node_id
+    if edge_id is not None:
+        issue["edge_id"] = edge_id
+    return issue
+
+
+def tarjan_cycles(nodes: Iterable[str], successors: Callable[[str], Iterable[str]]) -> List[Set[str]]:
+    """Strongly connected components that contain a cycle (size > 1 or a self-loop). Iterative."""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    cycles: List[Set[str]] = []
+    counter = 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.add(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in successors(node):
+                    cycles.append(component)
+    return cycles
+
+
+class FlowValidator:
+    """Validation state for one canvas; ``result()`` is the report, ``apply()`` updates it."""
+
+    def __init__(self, canvas: Optional[Dict[str, Any]] = None):
+        self.canvas = IndexedCanvas(canvas)
+        self.revision = 0
+        self.duplicate_ids = self._duplicate_ids(canvas or {})
+        # node id → type (only for nodes that exist)
+        self.types: Dict[str, str] = {}
+        # edge id → (source, target, label); out/in indexes by node id (nodes may be missing)
+        self.edge_info: Dict[str, Tuple[str, str, str]] = {}
+        self.out: Dict[str, Dict[str, None]] = {}
+        self.inn: Dict[str, Set[str]] = {}
+        self.local: Dict[str, List[Dict[str, Any]]] = {}
+        self.reachable: Set[str] = set()
+        self.loops: Dict[str, List[Set[str]]] = {kind: [] for kind in LOOP_KINDS}
+
+        for node_id, node in self.canvas.nodes.items():
+            self.types[node_id] = node_type(node)
+        for edge_id, edge in self.canvas.edges.items():
+            self._index_edge(edge_id, edge)
+        for node_id in set(self.types) | set(self.out):
+            self._check_node(node_id)
+        self.reachable = self._bfs(self.starts(), set())
+        for kind in LOOP_KINDS:
+            self.loops[kind] = tarjan_cycles(
+                [n for n in self.types if self._in_loop_graph(kind, n)],
+                lambda n, k=kind: self._loop_successors(k, n),
+            )
+
+    # ── Indexes ──
+
+    @staticmethod
+    def _duplicate_ids(canvas: Dict[str, Any]) -> List[str]:
+        seen, dupes = set(), []
+        for node in canvas.get("nodes", []) or []:
+            node_id = node.get("id")
+            if node_id in seen:
+                dupes.append(str(node_id))
+            seen.add(node_id)
+        return dupes
+
+    def _index_edge(self, edge_id: str, edge: Dict[str, Any]):
+        source, target = str(edge.get("source")), str(edge.get("target"))
+        self.edge_info[edge_id] = (source, target, _edge_label(edge))
+        self.out.setdefault(source, {})[edge_id] = None
+        self.inn.setdefault(target, set()).add(edge_id)
+
+    def _unindex_edge(self, edge_id: str):
+        source, target, _ = self.edge_info.pop(edge_id)
+        out = self.out.get(source)
+        if out is not None:
+            out.pop(edge_id, None)
+            if not out:
+                del self.out[source]
+        inn = self.inn.get(target)
+        if inn is not None:
+            inn.discard(edge_id)
+            if not inn:
+                del self.inn[target]
+
+    def starts(self) -> List[str]:
+        return [n for n, t in self.types.items() if t in START_TYPES]
+
+    def successors(self, node_id: str) -> List[str]:
+        if node_id not in self.types:
+            return []
+        return [t for t in (self.edge_info[e][1] for e in self.out.get(node_id, ())) if t in self.types]
+
+    def predecessors(self, node_id: str) -> List[str]:
+        return [s for s in (self.edge_info[e][0] for e in self.inn.get(node_id, ())) if s in self.types]
+
+    def _bfs(self, seeds: Iterable[str], seen: Set[str], within: Optional[Set[str]] = None) -> Set[str]:
+        """Nodes reachable from ``seeds`` (added to ``seen``), optionally staying inside ``within``."""
+        queue = deque()
+        for seed in seeds:
+            if seed in self.types and seed not in seen and (within is None or seed in within):
+                seen.add(seed)
+                queue.append(seed)
+        while queue:
+            for nxt in self.successors(queue.popleft()):
+                if nxt not in seen and (within is None or nxt in within):
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+    # ── Per-node checks ──
+
+    def _check_node(self, node_id: str):
+        issues: List[Dict[str, Any]] = []
+        edges = list(self.out.get(node_id, ()))
+        if node_id not in self.types:
+            for edge_id in edges:
+                issues.append(_issue("error", "edge_missing_source",
+                                     f"Edge {edge_id} starts at missing node {node_id}.", edge_id=edge_id))
+            self._set_local(node_id, issues)
+            return
+
+        t = self.types[node_id]
+        data = self.canvas.nodes[node_id].get("data") or {}
+        for edge_id in edges:
+            target = self.edge_info[edge_id][1]
+            if target not in self.types:
+                issues.append(_issue("error", "edge_missing_target",
+                                     f"Edge {edge_id} points to missing node {target}.", node_id, edge_id))
+
+        if t not in KNOWN_TYPES:
+            issues.append(_issue("warning", "unknown_type", f"Node {node_id} has unknown type '{t}'.", node_id))
+        if t in BRANCH_TYPES:
+            issues.extend(self._check_branch(node_id, t, data, edges))
+        elif len(edges) > 1 and t not in TERMINAL_TYPES:
+            issues.append(_issue("warning", "extra_edges",
+                                 f"Node {node_id} has {len(edges)} outgoing edges; only the first is followed.",
+                                 node_id))
+        if not edges and t not in TERMINAL_TYPES:
+            issues.append(_issue("warning", "dead_end",
+                                 f"Node {node_id} has no outgoing edge; the call ends without a closing line.",
+                                 node_id))
+        if t in ("greeting", "speak") and not node_text(self.canvas.nodes[node_id]).strip():
+            issues.append(_issue("warning", "empty_text", f"Node {node_id} has no text to say.", node_id))
+        elif t == "llm_response" and not (data.get("instructions") or "").strip():
+            issues.append(_issue("warning", "empty_instructions", f"LLM node {node_id} has no instructions.", node_id))
+        elif t == "transfer" and not (data.get("transfer_to") or "").strip():
+            issues.append(_issue("error", "transfer_no_number", f"Transfer node {node_id} has no number.", node_id))
+        elif t == "webhook" and not (data.get("url") or "").strip():
+            issues.append(_issue("warning", "webhook_no_url", f"Webhook node {node_id} has no URL.", node_id))
+        self._set_local(node_id, issues)
+
+    def _check_branch(self, node_id: str, t: str, data: Dict[str, Any], edges: List[str]) -> List[Dict[str, Any]]:
+        issues = []
+        if not edges:
+            return [_issue("error", "branch_no_edges", f"Branch node {node_id} has no outgoing edges.", node_id)]
+        labels = [self.edge_info[e][2] for e in edges]
+        lowered = {l.lower() for l in labels}
+        fallbacks = [l for l in labels if l.lower() in FALLBACK_LABELS]
+        if len(fallbacks) > 1:
+            issues.append(_issue("warning", "branch_many_fallbacks",
+                                 f"Branch node {node_id} has {len(fallbacks)} catch-all edges; only the first is used.",
+                                 node_id))
+        if t == "branch_intent":
+            for intent in data.get("intents", []) or []:
+                label = (intent.get("label") or "").strip() if isinstance(intent, dict) else ""
+                if label and label.lower() not in lowered:
+                    issues.append(_issue("warning", "intent_unrouted",
+                                         f"Intent '{label}' of node {node_id} has no edge.", node_id))
+        elif t == "branch_sentiment":
+            for label in labels:
+                if label.lower() not in FALLBACK_LABELS and label.lower() not in SENTIMENT_LABELS:
+                    issues.append(_issue("warning", "label_never_matches",
+                                         f"Edge label '{label}' of sentiment node {node_id} never matches "
+                                         f"(use {', '.join(SENTIMENT_LABELS)}).", node_id))
+        elif t == "branch_keyword" and not fallbacks and len(edges) > 1:
+            issues.append(_issue("warning", "branch_no_fallback",
+                                 f"Keyword node {node_id} has no default edge; unmatched replies take the last edge.",
+                                 node_id))
+        return issues
+
+    def _set_local(self, node_id: str, issues: List[Dict[str, Any]]):
+        if issues:
+            self.local[node_id] = issues
+        else:
+            self.local.pop(node_id, None)
+
+    # ── Loops ──
+
+    def _in_loop_graph(self, kind: str, node_id: str) -> bool:
+        t = self.types.get(node_id)
+        return t is not None and t not in LOOP_KINDS[kind][0]
+
+    def _loop_successors(self, kind: str, node_id: str) -> List[str]:
+        return [n for n in self.successors(node_id) if self._in_loop_graph(kind, n)]
+
+    def _loop_predecessors(self, kind: str, node_id: str) -> List[str]:
+        return [n for n in self.predecessors(node_id) if self._in_loop_graph(kind, n)]
+
+    def _update_loops(self, kind: str, dirty: Set[str], new_edges: List[Tuple[str, str]]):
+        """
+        Re-run Tarjan only where loops can have changed: inside existing loops
+        that lost a node or edge (``dirty``), and in forward(v) ∩ backward(u)
+        for each new edge u → v of the loop graph.
+        """
+        loops = self.loops[kind]
+        region: Set[str] = set()
+        kept: List[Set[str]] = []
+        for loop in loops:
+            if loop & dirty:
+                region |= loop
+            else:
+                kept.append(loop)
+
+        for u, v in new_edges:
+            if not (self._in_loop_graph(kind, u) and self._in_loop_graph(kind, v)):
+                continue
+            if any(u in loop and v in loop for loop in kept):
+                continue
+            forward = self._search(v, lambda n: self._loop_successors(kind, n))
+            if u not in forward:
+                continue
+            backward = self._search(u, lambda n: self._loop_predecessors(kind, n), within=forward)
+            region |= backward
+        if not region:
+            self.loops[kind] = kept
+            return
+        # Loops overlapping the region may merge with it
+        merged = []
+        for loop in kept:
+            if loop & region:
+                region |= loop
+            else:
+                merged.append(loop)
+        region = {n for n in region if self._in_loop_graph(kind, n)}
+        merged.extend(tarjan_cycles(
+            region, lambda n: [m for m in self._loop_successors(kind, n) if m in region],
+        ))
+        self.loops[kind] = merged
+
+    @staticmethod
+    def _search(start: str, step: Callable[[str], Iterable[str]], within: Optional[Set[str]] = None) -> Set[str]:
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for nxt in step(queue.popleft()):
+                if nxt not in seen and (within is None or nxt in within):
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+    # ── Incremental ──
+
+    def apply(self, ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply an editor delta and re-validate the region it touches; returns ``result()``."""
+        node_ids, edge_ids = IndexedCanvas.targets(ops)
+        # Whole-list replaces may drop any current member
+        for op in ops:
+            if isinstance(op, dict) and op.get("path") == "/nodes":
+                node_ids.update(self.canvas.nodes)
+            elif isinstance(op, dict) and op.get("path") == "/edges":
+                edge_ids.update(self.canvas.edges)
+        old_types = {n: self.types.get(n) for n in node_ids}
+        old_edges = {e: self.edge_info.get(e) for e in edge_ids}
+        try:
+            touched_nodes, touched_edges = self.canvas.apply(ops)
+            # Appended id-less edges get their "#n" key only when applied; the
+            # indexes still hold the old state until _reindex
+            for n in touched_nodes - node_ids:
+                old_types[n] = self.types.get(n)
+            for e in touched_edges - edge_ids:
+                old_edges[e] = self.edge_info.get(e)
+            node_ids |= touched_nodes
+            edge_ids |= touched_edges
+        finally:
+            self._reindex(node_ids, edge_ids, old_types, old_edges)
+        self.revision += 1
+        return self.result()
+
+    def _reindex(self, node_ids: Set[str], edge_ids: Set[str],
+                 old_types: Dict[str, Optional[str]], old_edges: Dict[str, Optional[Tuple[str, str, str]]]):
+        removed: List[Tuple[str, str]] = []
+        added: List[Tuple[str, str]] = []
+        to_check: Set[str] = set()
+
+        for edge_id in edge_ids:
+            old = old_edges[edge_id]
+            edge = self.canvas.edges.get(edge_id)
+            new = None
+            if edge is not None:
+                new = (str(edge.get("source")), str(edge.get("target")), _edge_label(edge))
+            if old == new:
+                continue
+            if old is not None:
+                self._unindex_edge(edge_id)
+                removed.append(old[:2])
+                to_check.add(old[0])
+            if edge is not None:
+                self._index_edge(edge_id, edge)
+                added.append(new[:2])
+                to_check.add(new[0])
+
+        changed_types: Set[str] = set()
+        for node_id in node_ids:
+            node = self.canvas.nodes.get(node_id)
+            new_type = node_type(node) if node is not None else None
+            if new_type is None:
+                self.types.pop(node_id, None)
+            else:
+                self.types[node_id] = new_type
+            to_check.add(node_id)
+            if new_type != old_types[node_id]:
+                changed_types.add(node_id)
+                # Dangling status of edges into this node changed
+                to_check.update(self.edge_info[e][0] for e in self.inn.get(node_id, ()))
+
+        for node_id in to_check:
+            self._check_node(node_id)
+
+        # Edges into / out of nodes that appeared or disappeared count as added / removed
+        for node_id in changed_types:
+            incident = [self.edge_info[e][:2] for e in self.out.get(node_id, ())]
+            incident += [self.edge_info[e][:2] for e in self.inn.get(node_id, ())]
+            if old_types[node_id] is not None:
+                removed.extend(incident)
+            if node_id in self.types:
+                added.extend(incident)
+
+        self._update_reachability(removed, added, changed_types, old_types)
+        for kind in LOOP_KINDS:
+            dirty = {n for pair in removed for n in pair} | changed_types
+            self._update_loops(kind, dirty, added)
+
+    def _update_reachability(self, removed: List[Tuple[str, str]], added: List[Tuple[str, str]],
+                             changed_types: Set[str], old_types: Dict[str, Optional[str]]):
+        reachable = self.reachable
+        # Deletions: everything downstream of a cut edge is suspect; re-seed it
+        # from the part of the graph that is still reachable
+        seeds = [v for u, v in removed if u in reachable]
+        seeds += [n for n in changed_types if n in reachable]
+        if seeds:
+            suspect = set()
+            queue = deque(s for s in seeds if s in reachable)
+            suspect.update(queue)
+            while queue:
+                for nxt in self.successors(queue.popleft()):
+                    if nxt in reachable and nxt not in suspect:
+                        suspect.add(nxt)
+                        queue.append(nxt)
+            kept = reachable - suspect
+            reseed = [
+                n for n in suspect
+                if n in self.types and (self.types[n] in START_TYPES or any(p in kept for p in self.predecessors(n)))
+            ]
+            reachable = kept | self._bfs(reseed, set(), within=suspect)
+        reachable &= self.types.keys()
+        # Additions can only extend the reachable set
+        grow = [v for u, v in added if u in reachable]
+        grow += [n for n in changed_types if self.types.get(n) in START_TYPES]
+        self.reachable = self._bfs(grow, reachable)
+
+    # ── Report ──
+
+    def result(self) -> Dict[str, Any]:
+        issues: List[Dict[str, Any]] = []
+        starts = self.starts()
+        if not self.types:
+            issues.append(_issue("error", "no_nodes", "Flow has no nodes."))
+        elif not starts:
+            issues.append(_issue("error", "no_start", "Flow must have at least one Start node."))
+        elif len(starts) > 1:
+            issues.append(_issue("warning", "many_starts", "Flow has multiple Start nodes — only the first will be used."))
+        for node_id in self.duplicate_ids:
+            issues.append(_issue("error", "duplicate_id", f"Node id {node_id} is used more than once.", node_id))
+        if self.types and not any(self.types[n] == "end_call" for n in self.reachable):
+            issues.append(_issue("warning", "no_end",
+                                 "No End Call node is reachable — call may never terminate gracefully."))
+        if starts:
+            for node_id in (n for n in self.types if n not in self.reachable):
+                issues.append(_issue("warning", "unreachable", f"Node {node_id} is not reachable from Start.", node_id))
+        for kind, (_, message) in LOOP_KINDS.items():
+            for loop in self.loops[kind]:
+                nodes = sorted(loop)
+                issues.append(_issue("error", kind, message.format(nodes=", ".join(nodes[:10])), nodes[0]))
+        for node_issues in self.local.values():
+            issues.extend(node_issues)
+
+        errors = [i["message"] for i in issues if i["severity"] == "error"]
+        warnings = [i["message"] for i in issues if i["severity"] == "warning" and i["code"] != "unreachable"]
+        unreachable = sum(1 for i in issues if i["code"] == "unreachable")
+        if unreachable:
+            # One summary line for the list view; per-node entries stay in "issues"
+            warnings.append(f"{unreachable} node(s) are not reachable from Start.")
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "issues": issues,
+            "revision": self.revision,
+            "stats": {"nodes": len(self.types), "edges": len(self.edge_info), "reachable": len(self.reachable)},
+        }
+
+    def to_canvas(self) -> Dict[str, Any]:
+        return self.canvas.to_canvas()
+
+
+def validate_canvas(canvas: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """One-shot full validation."""
+    if not canvas:
+        return {"valid": True, "errors": [], "warnings": ["No canvas data — agent will use freeform mode."],
+                "issues": [], "revision": 0, "stats": {"nodes": 0, "edges": 0, "reachable": 0}}
+    try:
+        return FlowValidator(canvas).result()
+    except DeltaError as e:
+        # Not indexable at all (e.g. a node without an id)
+        return {"valid": False, "errors": [str(e)], "warnings": [],
+                "issues": [_issue("error", "malformed", str(e))], "revision": 0,
+                "stats": {"nodes": 0, "edges": 0, "reachable": 0}}
+
+
+class ValidatorSessions:
+    """Per-flow validators kept between editor deltas (LRU)."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, FlowValidator]" = OrderedDict()
+
+    def get(self, flow_id: str, revision: Optional[int]) -> Optional[FlowValidator]:
+        validator = self._entries.get(flow_id)
+        if validator is None or revision is None or validator.revision != revision:
+            return None
+        self._entries.move_to_end(flow_id)
+        return validator
+
+    def start(self, flow_id: str, canvas: Optional[Dict[str, Any]]) -> FlowValidator:
+        validator = self._entries[flow_id] = FlowValidator(canvas)
+        self._entries.move_to_end(flow_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return validator
+
+    def drop(self, flow_id: str):
+        self._entries.pop(flow_id, None)
+
+
+validator_sessions = ValidatorSessions()
@@ -0,0 +1,117 @@
+"""
+Schema migrations.
+
+``init_db`` runs ``create_all`` (which creates missing tables, with their
+declared indexes) and then every migration not yet recorded in the
+``schema_migrations`` table, in order, inside one transaction. Migrations
+change tables that already exist: add columns, indexes, backfills. Each
+one is a plain function over a sync SQLAlchemy ``Connection`` and must be
+idempotent (e.g. ``create_index`` below, which checks first), because a
+fresh database already has everything ``create_all`` declares.
+
+To ship a schema change: declare it on the model, then append a
+``Migration`` that applies it to existing databases.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+logger = logging.getLogger("tron.migrations")
+
+
+class Migration(NamedTuple):
+    id: str
+    description: str
+    up: Callable
+
+
+# ── Helpers (sync, run inside ``conn.run_sync``) ──
+
+def create_index(conn, index):
+    """Create a model-declared ``Index`` unless it exists."""
+    index.create(conn, checkfirst=True)
+
+
+def _model_indexes(model, *names: str):
+    indexes = {ix.name: ix for ix in model.__table__.indexes}
+    return [indexes[name] for name in names]
+
+
+# ── Migrations (append only) ──
+
+def _call_indexes(conn):
+    from tron.core.database import CallModel, CallLatencyModel
+
+    for index in _model_indexes(
+        CallModel,
+        "ix_calls_created_at",
+        "ix_calls_status_created_at",
+        "ix_calls_agent_created_at",
+        "ix_calls_campaign_status",
+        "ix_calls_outcome_created_at",
+        "ix_calls_livekit_room",
+    ):
+        create_index(conn, index)
+    for index in _model_indexes(CallLatencyModel, "ix_call_latency_created_at"):
+        create_index(conn, index)
+    # Fresh statistics so the planner picks the new indexes (SQLite/PostgreSQL)
+    if conn.dialect.name in ("sqlite", "postgresql"):
+        from sqlalchemy import text
+
+        conn.execute(text("ANALYZE"))
+
+
+def _postgres_jsonb(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    from sqlalchemy import inspect, text
+    from sqlalchemy.dialects.postgresql import JSONB
+    from tron.core.database import Base, CallModel
+
+    # Tables created before the JSONB variant have plain json columns
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        json_columns = {c.name for c in table.columns if isinstance(c.type.dialect_impl(conn.dialect), JSONB)}
+        for col in inspector.get_columns(table.name):
+            if col["name"] in json_columns and not isinstance(col["type"], JSONB):
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN "{col["name"]}" TYPE jsonb USING "{col["name"]}"::jsonb'
+                ))
+    for index in _model_indexes(CallModel, "ix_calls_extracted_data"):
+        create_index(conn, index)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration("0001_call_indexes", "Composite indexes for call listing, stats and analytics", _call_indexes),
+    Migration("0002_postgres_jsonb", "PostgreSQL: json columns to jsonb, GIN index on calls.extracted_data", _postgres_jsonb),
+]
+
+
+def _migrate(conn) -> List[str]:
+    from sqlalchemy import Table, Column, String, DateTime, MetaData, select, insert
+
+    table = Table(
+        "schema_migrations", MetaData(),
+        Column("id", String(100), primary_key=True),
+        Column("applied_at", DateTime),
+    )
+    table.create(conn, checkfirst=True)
+    applied = set(conn.execute(select(table.c.id)).scalars())
+    ran = []
+    for migration in MIGRATIONS:
+        if migration.id in applied:
+            continue
+        logger.info(f"Applying migration {migration.id}: {migration.description}")
+        migration.up(conn)
+        conn.execute(insert(table).values(id=migration.id, applied_at=datetime.utcnow()))
+        ran.append(migration.id)
+    return ran
+
+
+async def run_migrations(engine) -> List[str]:
+    """Apply pending migrations in one transaction; returns the ids applied."""
+    async with engine.begin() as conn:
+        return await conn.run_sync(_migrate)
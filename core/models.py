@@ -80,6 +80,9 @@ class FlowUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     canvas_data: Optional[Dict[str, Any]] = None
+    # Editor saves: JSON-patch ops (core.flow_delta) against base_version instead of canvas_data
+    ops: Optional[List[Dict[str, Any]]] = None
+    base_version: Optional[int] = None
 
 
 class FlowResponse(FlowBase):
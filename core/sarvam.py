@@ -0,0 +1,60 @@
+"""
+Thin Sarvam AI REST client shared by the API (voice previews, TTS cache
+pre-warm) — the voice worker talks to Sarvam through the LiveKit plugin.
+"""
+import base64
+import logging
+
+logger = logging.getLogger("tron.sarvam")
+
+SARVAM_API_URL = "https://api.sarvam.ai"
+
+
+class SarvamError(Exception):
+    """Raised when Sarvam returns an error or no audio."""
+
+
+async def synthesize_wav(
+    text: str,
+    voice_id: str = "shreya",
+    model: str = "bulbul:v3-beta",
+    language: str = "hi-IN",
+    speed: float = 1.0,
+    timeout: float = 30.0,
+) -> bytes:
+    """Synthesize ``text`` with Bulbul and return WAV bytes."""
+    from tron.core.config import settings
+
+    api_key = settings.sarvam_api_key
+    if not api_key:
+        raise SarvamError("Sarvam API key not configured. Add it in Settings.")
+
+    import httpx
+    payload = {
+        "inputs": [text],
+        "target_language_code": language,
+        "speaker": voice_id,
+        "model": model,
+        "enable_preprocessing": True,
+    }
+    if speed and speed != 1.0:
+        payload["pace"] = speed
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{SARVAM_API_URL}/text-to-speech",
+            headers={
+                "api-subscription-key": api_key,
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=timeout,
+        )
+
+    if response.status_code != 200:
+        raise SarvamError(f"Sarvam TTS error: {response.text}")
+
+    audio_b64 = response.json().get("audios", [None])[0]
+    if not audio_b64:
+        raise SarvamError("No audio returned from Sarvam")
+    return base64.b64decode(audio_b64)
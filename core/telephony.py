@@ -0,0 +1,360 @@
+"""
+Telephony backends — the seam between the call engine and the carrier.
+
+``LiveKitTelephony`` places real calls through LiveKit SIP → Twilio.
+``LocalTelephony`` is an in-process stand-in that simulates the call lifecycle
+(ringing → answered → completed, or no_answer / busy / failed) and publishes
+the same events on the event bus, so the API and campaign stack can be
+integration- and load-tested without a LiveKit deployment.
+
+Select a backend with ``TRON_TELEPHONY_BACKEND=livekit|local``.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger("tron.telephony")
+
+
+class TelephonyError(Exception):
+    """Raised when a backend cannot place or control a call."""
+
+
+class TelephonyBackend:
+    """
+    Interface every telephony backend implements.
+
+    Rooms are returned by ``list_active`` as plain dicts with at least
+    ``name`` and ``num_participants`` so callers never touch backend types.
+    """
+
+    name = "base"
+
+    async def dial(
+        self,
+        room_name: str,
+        phone_number: str,
+        caller_id: str,
+        participant_identity: str,
+        participant_name: str,
+        attributes: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """Place an outbound call into ``room_name``. Returns {"participant_id": ...}."""
+        raise NotImplementedError
+
+    async def hangup(self, room_name: str):
+        """Tear down the call's room."""
+        raise NotImplementedError
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        """List active call rooms."""
+        raise NotImplementedError
+
+    async def dispatch_agent(self, room_name: str, metadata: Dict[str, Any]) -> Optional[str]:
+        """Dispatch the voice agent worker into ``room_name``. Returns a dispatch id."""
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release any resources held by the backend."""
+        return None
+
+
+# ─────────────── LiveKit + Twilio ───────────────
+
+AGENT_NAME = "hindi-voice-agent"
+
+
+class LiveKitTelephony(TelephonyBackend):
+    """Real calls through LiveKit SIP trunking (Twilio Elastic SIP Trunk)."""
+
+    name = "livekit"
+
+    def _client(self):
+        from tron.core.config import settings
+        from livekit import api
+
+        return api.LiveKitAPI(
+            url=settings.livekit_url,
+            api_key=settings.livekit_api_key,
+            api_secret=settings.livekit_api_secret,
+        )
+
+    async def dial(self, room_name, phone_number, caller_id, participant_identity, participant_name, attributes):
+        from tron.core.config import settings
+        from livekit.protocol.sip import CreateSIPParticipantRequest
+
+        request = CreateSIPParticipantRequest(
+            sip_trunk_id=settings.livekit_outbound_trunk_id,
+            sip_call_to=phone_number,
+            sip_number=caller_id,
+            room_name=room_name,
+            participant_identity=participant_identity,
+            participant_name=participant_name,
+            krisp_enabled=True,
+            play_dialtone=True,
+            wait_until_answered=False,  # Don't block; let call proceed async
+            participant_attributes=attributes,
+        )
+
+        lkapi = self._client()
+        try:
+            participant = await lkapi.sip.create_sip_participant(request)
+            logger.info(f"SIP participant created: {participant.participant_id}")
+            return {"participant_id": participant.participant_id}
+        finally:
+            await lkapi.aclose()
+
+    async def hangup(self, room_name: str):
+        from livekit import api
+
+        lkapi = self._client()
+        try:
+            await lkapi.room.delete_room(api.DeleteRoomRequest(room=room_name))
+            logger.info(f"Room {room_name} deleted")
+        except Exception as e:
+            logger.error(f"Error deleting room {room_name}: {e}")
+        finally:
+            await lkapi.aclose()
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        from livekit.protocol.room import ListRoomsRequest
+
+        lkapi = self._client()
+        try:
+            result = await lkapi.room.list_rooms(ListRoomsRequest())
+            return [
+                {
+                    "name": r.name,
+                    "sid": r.sid,
+                    "num_participants": r.num_participants,
+                    "creation_time": r.creation_time,
+                }
+                for r in result.rooms if r.name.startswith("call-")
+            ]
+        except Exception as e:
+            logger.error(f"Error listing rooms: {e}")
+            return []
+        finally:
+            await lkapi.aclose()
+
+    async def dispatch_agent(self, room_name: str, metadata: Dict[str, Any]) -> Optional[str]:
+        import json
+        from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
+
+        lkapi = self._client()
+        try:
+            dispatch = await lkapi.agent_dispatch.create_dispatch(CreateAgentDispatchRequest(
+                room=room_name,
+                agent_name=AGENT_NAME,
+                metadata=json.dumps(metadata),
+            ))
+            dispatch_id = getattr(dispatch, "id", None) or getattr(dispatch, "dispatch_id", None)
+            logger.info(f"Agent dispatched: {dispatch_id or 'ok'}")
+            return dispatch_id
+        finally:
+            await lkapi.aclose()
+
+
+# ─────────────── Local stand-in ───────────────
+
+class LocalTelephony(TelephonyBackend):
+    """
+    In-process LiveKit stand-in.
+
+    Every dial spawns a lightweight task that walks the call through
+    ringing → answered → ended with randomized timings and outcomes, publishing
+    ``call.ringing`` / ``call.answered`` / ``call.ended`` on the event bus and
+    writing the final state to the calls table like a real worker would.
+    Thousands of concurrent simulated calls cost only a few KB each.
+    """
+
+    name = "local"
+
+    # Terminal outcome weights for a dialled number
+    OUTCOMES = {"completed": 0.65, "no_answer": 0.2, "busy": 0.1, "failed": 0.05}
+
+    def __init__(
+        self,
+        time_scale: float = 1.0,
+        ring_seconds: tuple = (2.0, 8.0),
+        talk_seconds: tuple = (15.0, 120.0),
+        max_channels: int = 0,
+        persist: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self.time_scale = time_scale
+        self.ring_seconds = ring_seconds
+        self.talk_seconds = talk_seconds
+        self.max_channels = max_channels
+        self.persist = persist
+        self._rng = random.Random(seed)
+        self._rooms: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._dial_seq = 0
+        self._dispatch_seq = 0
+
+    @property
+    def active_count(self) -> int:
+        return len(self._rooms)
+
+    async def dial(self, room_name, phone_number, caller_id, participant_identity, participant_name, attributes):
+        if self.max_channels and len(self._rooms) >= self.max_channels:
+            raise TelephonyError(f"All {self.max_channels} simulated channels busy")
+        if room_name in self._rooms:
+            raise TelephonyError(f"Room {room_name} already exists")
+
+        self._dial_seq += 1
+        participant_id = f"PA_local_{self._dial_seq}"
+        self._rooms[room_name] = {
+            "name": room_name,
+            "sid": f"RM_local_{room_name}",
+            "num_participants": 1,
+            "creation_time": int(time.time()),
+            "phone_number": phone_number,
+            "caller_id": caller_id,
+            "participant_id": participant_id,
+            "attributes": dict(attributes),
+            "state": "ringing",
+        }
+        self._tasks[room_name] = asyncio.create_task(self._simulate(room_name))
+        return {"participant_id": participant_id}
+
+    async def hangup(self, room_name: str):
+        task = self._tasks.get(room_name)
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        return [
+            {k: r[k] for k in ("name", "sid", "num_participants", "creation_time")}
+            for r in self._rooms.values()
+        ]
+
+    async def dispatch_agent(self, room_name: str, metadata: Dict[str, Any]) -> Optional[str]:
+        self._dispatch_seq += 1
+        dispatch_id = f"AD_local_{self._dispatch_seq}"
+        room = self._rooms.get(room_name)
+        if room is not None:
+            room["num_participants"] += 1
+            room["dispatch_id"] = dispatch_id
+        from tron.core.events import event_bus
+        await event_bus.publish("agent.dispatched", {
+            "room_name": room_name,
+            "dispatch_id": dispatch_id,
+            "call_id": metadata.get("call_id"),
+        })
+        return dispatch_id
+
+    async def aclose(self):
+        for room_name in list(self._tasks):
+            await self.hangup(room_name)
+
+    def _pick_outcome(self) -> str:
+        roll = self._rng.random()
+        acc = 0.0
+        for outcome, weight in self.OUTCOMES.items():
+            acc += weight
+            if roll < acc:
+                return outcome
+        return "completed"
+
+    async def _sleep(self, bounds: tuple) -> float:
+        seconds = self._rng.uniform(*bounds)
+        await asyncio.sleep(seconds * self.time_scale)
+        return seconds
+
+    async def _simulate(self, room_name: str):
+        """Drive one simulated call through its lifecycle."""
+        from tron.core.events import event_bus
+
+        room = self._rooms[room_name]
+        call_id = room["attributes"].get("tron_call_id")
+        started = datetime.utcnow()
+        answered_at = None
+        status = "cancelled"
+        talk = 0.0
+        try:
+            await event_bus.publish("call.ringing", {"call_id": call_id, "livekit_room": room_name})
+            rang = await self._sleep(self.ring_seconds)
+            status = self._pick_outcome()
+
+            if status == "completed":
+                answered_at = started + timedelta(seconds=rang)
+                room["state"] = "active"
+                await self._persist(call_id, status="in_progress", answered_at=answered_at)
+                await event_bus.publish("call.answered", {"call_id": call_id, "livekit_room": room_name})
+                talk = await self._sleep(self.talk_seconds)
+        except asyncio.CancelledError:
+            # Hung up from our side: a call that was answered still counts as completed
+            status = "completed" if answered_at else "cancelled"
+        finally:
+            self._rooms.pop(room_name, None)
+            self._tasks.pop(room_name, None)
+            ended_at = datetime.utcnow()
+            duration = (answered_at - started).total_seconds() + talk if answered_at else (ended_at - started).total_seconds()
+            await self._persist(
+                call_id,
+                status=status,
+                answered_at=answered_at,
+                ended_at=ended_at,
+                duration_seconds=int(duration),
+                talk_time_seconds=int(talk) if answered_at else None,
+            )
+            await event_bus.publish("call.ended", {
+                "call_id": call_id,
+                "livekit_room": room_name,
+                "status": status,
+            })
+
+    async def _persist(self, call_id: Optional[str], **fields):
+        """Write lifecycle state to the calls table (best effort)."""
+        if not (self.persist and call_id):
+            return
+        try:
+            from tron.core.database import CallModel, get_session_factory
+            from sqlalchemy import update
+
+            values = {k: v for k, v in fields.items() if v is not None}
+            factory = await get_session_factory()
+            async with factory() as db:
+                await db.execute(update(CallModel).where(CallModel.id == call_id).values(**values))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Local telephony could not persist call {call_id}: {e}")
+
+
+# ─────────────── Backend selection ───────────────
+
+_backend: Optional[TelephonyBackend] = None
+
+
+def get_telephony() -> TelephonyBackend:
+    """Return the process-wide telephony backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        from tron.core.config import settings
+        name = (settings.telephony_backend or "livekit").lower()
+        if name == "local":
+            _backend = LocalTelephony(
+                time_scale=settings.local_telephony_time_scale,
+                max_channels=settings.local_telephony_max_channels,
+            )
+        elif name == "livekit":
+            _backend = LiveKitTelephony()
+        else:
+            raise TelephonyError(f"Unknown telephony backend: {name}")
+        logger.info(f"Telephony backend: {_backend.name}")
+    return _backend
+
+
+def set_telephony(backend: Optional[TelephonyBackend]):
+    """Install a backend explicitly (tests, load runs). ``None`` resets to config."""
+    global _backend
+    _backend = backend
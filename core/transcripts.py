@@ -0,0 +1,135 @@
+"""
+Append-only call transcripts.
+
+The voice worker appends finalized utterances to ``transcript_segments`` in
+small batches while the call is live, instead of rewriting the whole
+``CallModel.transcript`` JSON list. The API reads a transcript back from the
+segments, and a relay tails new segments onto the event bus as
+``call.transcript`` events for the live monitor (the worker runs in its own
+process, so the table is the hand-off point).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque, Tuple
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger("tron.transcripts")
+
+RELAY_INTERVAL_SECONDS = 1.0
+RELAY_BATCH = 500
+# How long a segment may take to commit after a higher id was already read
+RELAY_LAG_SECONDS = 10.0
+
+
+def segment_to_dict(seg) -> Dict[str, Any]:
+    return {
+        "seq": seg.seq,
+        # The dashboard's transcript roles are "agent" / "user"
+        "role": "agent" if seg.role == "assistant" else seg.role,
+        "text": seg.text,
+        "timestamp": seg.created_at.isoformat() if seg.created_at else None,
+    }
+
+
+async def append_segments(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """Insert a batch of {call_id, seq, role, text, created_at} rows in one statement."""
+    from tron.core.database import TranscriptSegmentModel
+
+    if rows:
+        await db.execute(insert(TranscriptSegmentModel), rows)
+
+
+async def load_transcript(db: AsyncSession, call_id: str, after_seq: int = -1) -> List[Dict[str, Any]]:
+    """Segments of a call in order, optionally only those after ``after_seq``."""
+    from tron.core.database import TranscriptSegmentModel
+
+    result = await db.execute(
+        select(TranscriptSegmentModel).where(
+            TranscriptSegmentModel.call_id == call_id,
+            TranscriptSegmentModel.seq > after_seq,
+        ).order_by(TranscriptSegmentModel.seq)
+    )
+    return [segment_to_dict(s) for s in result.scalars().all()]
+
+
+async def load_transcripts(db: AsyncSession, call_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Segments of several calls in one query, by call id (calls without segments are absent)."""
+    from tron.core.database import TranscriptSegmentModel
+
+    if not call_ids:
+        return {}
+    result = await db.execute(
+        select(TranscriptSegmentModel)
+        .where(TranscriptSegmentModel.call_id.in_(call_ids))
+        .order_by(TranscriptSegmentModel.call_id, TranscriptSegmentModel.seq)
+    )
+    transcripts: Dict[str, List[Dict[str, Any]]] = {}
+    for seg in result.scalars().all():
+        transcripts.setdefault(seg.call_id, []).append(segment_to_dict(seg))
+    return transcripts
+
+
+async def relay_segments(interval: float = RELAY_INTERVAL_SECONDS):
+    """
+    Publish newly written segments on the event bus as ``call.transcript``.
+    Runs for the lifetime of the API process.
+
+    Ids are assigned at insert but become visible at commit, so with
+    concurrent writers (PostgreSQL) a lower id can appear after a higher one
+    was read. Each pass therefore re-reads from where the id cursor stood
+    ``RELAY_LAG_SECONDS`` ago and skips ``(call_id, seq)`` pairs already sent.
+    """
+    from tron.core.database import TranscriptSegmentModel, get_session_factory
+    from tron.core.events import event_bus
+
+    factory = await get_session_factory()
+    cursor: Optional[int] = None
+    floor = 0
+    # (monotonic time, cursor) after each pass, oldest first
+    marks: Deque[Tuple[float, int]] = deque()
+    # (call_id, seq) → id of the segments above ``floor`` already published
+    sent: Dict[Tuple[str, int], int] = {}
+    while True:
+        try:
+            async with factory() as db:
+                if cursor is None or event_bus.subscriber_count == 0:
+                    # Nobody watching: just keep the cursor at the tail
+                    result = await db.execute(select(func.max(TranscriptSegmentModel.id)))
+                    cursor = floor = result.scalar() or 0
+                    marks.clear()
+                    sent.clear()
+                else:
+                    after = floor
+                    while True:
+                        result = await db.execute(
+                            select(TranscriptSegmentModel).where(
+                                TranscriptSegmentModel.id > after
+                            ).order_by(TranscriptSegmentModel.id).limit(RELAY_BATCH)
+                        )
+                        segments = result.scalars().all()
+                        for seg in segments:
+                            after = seg.id
+                            cursor = max(cursor, seg.id)
+                            if (seg.call_id, seg.seq) in sent:
+                                continue
+                            sent[(seg.call_id, seg.seq)] = seg.id
+                            await event_bus.publish("call.transcript", {
+                                "call_id": seg.call_id,
+                                **segment_to_dict(seg),
+                            })
+                        if len(segments) < RELAY_BATCH:
+                            break
+            now = time.monotonic()
+            marks.append((now, cursor))
+            while marks and now - marks[0][0] >= RELAY_LAG_SECONDS:
+                floor = marks.popleft()[1]
+            sent = {key: seg_id for key, seg_id in sent.items() if seg_id > floor}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Transcript relay error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,322 @@
+"""
+Content-addressed TTS audio cache.
+
+Scripted audio (greetings, fixed flow prompts, closing lines) is the same
+string for thousands of calls in a campaign, so it is synthesized once and
+replayed. Entries are keyed by hash(text, voice_id, model, language, speed)
+and stored as 16-bit PCM WAV files in an on-disk LRU shared by the API
+(which pre-warms clips when a campaign starts) and the voice worker (which
+plays them straight into the room). A per-process in-memory hot tier keeps
+the most recently played clips as raw PCM.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterable, List
+
+logger = logging.getLogger("tron.tts_cache")
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    """Mono/stereo 16-bit PCM clip."""
+    pcm: bytes
+    sample_rate: int
+    num_channels: int = 1
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (2 * self.num_channels * self.sample_rate)
+
+    def to_wav(self) -> bytes:
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(self.num_channels)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(self.pcm)
+        return buf.getvalue()
+
+    @classmethod
+    def from_wav(cls, data: bytes) -> "CachedAudio":
+        with wave.open(io.BytesIO(data), "rb") as w:
+            if w.getsampwidth() != 2:
+                raise ValueError("Only 16-bit PCM WAV is supported")
+            return cls(
+                pcm=w.readframes(w.getnframes()),
+                sample_rate=w.getframerate(),
+                num_channels=w.getnchannels(),
+            )
+
+
+def cache_key(
+    text: str,
+    voice_id: str,
+    model: str,
+    language: str,
+    speed: float = 1.0,
+) -> str:
+    """Content address for a clip. Whitespace-only differences share a key."""
+    payload = json.dumps(
+        [" ".join(text.split()), voice_id, model, language, round(float(speed or 1.0), 3)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def voice_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Cache-key voice parameters from an agent config dict / AgentModel."""
+    get = config.get if isinstance(config, dict) else (lambda k, d=None: getattr(config, k, d))
+    return {
+        "voice_id": get("voice_id") or "shreya",
+        "model": get("voice_model") or "bulbul:v3-beta",
+        "language": get("language") or "hi-IN",
+        "speed": get("voice_speed") or 1.0,
+    }
+
+
+# Short backchannel clips played while the LLM is still thinking
+FILLER_PHRASES = {
+    "hi": ["हाँ जी", "एक सेकंड", "जी", "अच्छा"],
+    "en": ["Sure", "One moment", "Okay", "Right"],
+}
+
+
+def filler_texts(config: Dict[str, Any]) -> List[str]:
+    """Filler phrases for an agent: ``guardrails["fillers"]`` or the language default."""
+    get = config.get if isinstance(config, dict) else (lambda k, d=None: getattr(config, k, d))
+    guardrails = get("guardrails") or {}
+    custom = guardrails.get("fillers") if isinstance(guardrails, dict) else None
+    if isinstance(custom, list):
+        return [t for t in custom if isinstance(t, str) and t.strip()]
+    language = (get("language") or "hi-IN").split("-")[0]
+    return FILLER_PHRASES.get(language, FILLER_PHRASES["en"])
+
+
+class TTSCache:
+    """Two-tier (memory → disk) LRU of synthesized clips."""
+
+    def __init__(self, directory: str, max_bytes: int, hot_max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_max_bytes = hot_max_bytes
+        self._hot: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._hot_bytes = 0
+        self._disk_index: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._index_lock = threading.RLock()  # disk I/O runs in worker threads
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ── Disk tier ──
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def _load_index(self):
+        """Scan the cache directory once, oldest access first."""
+        with self._index_lock:
+            if self._disk_index is not None:
+                return
+            self._scan()
+
+    def _scan(self):
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".wav"):
+                        st = os.stat(os.path.join(root, name))
+                        entries.append((st.st_mtime, name[:-4], st.st_size))
+        entries.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_bytes = sum(size for _, _, size in entries)
+
+    def _read_disk(self, key: str) -> Optional[CachedAudio]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = CachedAudio.from_wav(f.read())
+            os.utime(path)  # LRU: touch on access, visible to other processes
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable TTS cache entry {key}: {e}")
+            self._remove_disk(key)
+            return None
+        self._load_index()
+        with self._index_lock:
+            self._disk_index[key] = self._disk_index.pop(key, os.path.getsize(path))
+        return audio
+
+    def _write_disk(self, key: str, audio: CachedAudio):
+        self._load_index()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = audio.to_wav()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # atomic: readers never see a partial clip
+        with self._index_lock:
+            self._disk_bytes += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            while self._disk_bytes > self.max_bytes and len(self._disk_index) > 1:
+                old_key = next(iter(self._disk_index))
+                self._remove_disk(old_key)
+
+    def _remove_disk(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+        with self._index_lock:
+            if self._disk_index is not None:
+                self._disk_bytes -= self._disk_index.pop(key, 0)
+
+    # ── Hot tier ──
+
+    def _remember(self, key: str, audio: CachedAudio):
+        if len(audio.pcm) > self.hot_max_bytes:
+            return
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_bytes -= len(old.pcm)
+        self._hot[key] = audio
+        self._hot_bytes += len(audio.pcm)
+        while self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted.pcm)
+
+    # ── Public API ──
+
+    async def get(self, key: str) -> Optional[CachedAudio]:
+        audio = self._hot.get(key)
+        if audio is not None:
+            self._hot.move_to_end(key)
+            self.hits += 1
+            return audio
+        audio = await asyncio.to_thread(self._read_disk, key)
+        if audio is not None:
+            self._remember(key, audio)
+            self.hits += 1
+            return audio
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: CachedAudio):
+        if not audio.pcm:
+            return
+        self._remember(key, audio)
+        try:
+            await asyncio.to_thread(self._write_disk, key, audio)
+        except Exception as e:
+            logger.warning(f"Could not persist TTS cache entry {key}: {e}")
+
+    async def get_or_synthesize(
+        self,
+        key: str,
+        synthesize: Callable[[], Awaitable[Optional[CachedAudio]]],
+    ) -> Optional[CachedAudio]:
+        """Cached clip for ``key``; concurrent misses share one synthesis."""
+        audio = await self.get(key)
+        if audio is not None:
+            return audio
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            audio = await synthesize()
+            if audio is not None:
+                await self.put(key, audio)
+            future.set_result(audio)
+            return audio
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less futures don't log warnings
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        self._load_index()
+        return {
+            "hot_entries": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "disk_entries": len(self._disk_index),
+            "disk_bytes": self._disk_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+_cache: Optional[TTSCache] = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide cache configured from settings."""
+    global _cache
+    if _cache is None:
+        from tron.core.config import settings
+        _cache = TTSCache(
+            directory=settings.tts_cache_dir,
+            max_bytes=settings.tts_cache_max_mb * 1024 * 1024,
+            hot_max_bytes=settings.tts_cache_hot_mb * 1024 * 1024,
+        )
+    return _cache
+
+
+# ─────────────── Campaign pre-warm ───────────────
+
+async def prewarm_clips(texts: Iterable[str], voice: Dict[str, Any], concurrency: int = 4) -> Dict[str, int]:
+    """
+    Make sure every text in ``texts`` is cached for ``voice``, synthesizing
+    misses through the Sarvam REST API. Returns {"cached": n, "synthesized": n, "failed": n}.
+    """
+    from tron.core.sarvam import synthesize_wav
+
+    cache = get_tts_cache()
+    unique: List[str] = list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"cached": 0, "synthesized": 0, "failed": 0}
+
+    async def _one(text: str):
+        key = cache_key(text, **voice)
+        if await cache.get(key) is not None:
+            counts["cached"] += 1
+            return
+        async with semaphore:
+            try:
+                wav = await synthesize_wav(
+                    text,
+                    voice_id=voice["voice_id"],
+                    model=voice["model"],
+                    language=voice["language"],
+                    speed=voice["speed"],
+                )
+                await cache.put(key, CachedAudio.from_wav(wav))
+                counts["synthesized"] += 1
+            except Exception as e:
+                logger.warning(f"TTS pre-warm failed for {text[:40]!r}: {e}")
+                counts["failed"] += 1
+
+    await asyncio.gather(*(_one(t) for t in unique))
+    return counts
@@ -0,0 +1,224 @@
+"""
+Warm-up before a campaign dials, and keep-alive while it runs.
+
+Ollama loads a model on first use and unloads it after ``keep_alive`` of
+idleness, so the first calls of a campaign (or of a burst after a quiet
+spell) pay a multi-second cold load. ``warm_up_agent`` runs before the first
+call and:
+
+    llm     loads the agent's model on every Ollama endpoint with a long keep_alive
+    prompt  sends the agent's static system prompt once so the server's prompt
+            (KV) cache holds the prefix every call starts with
+    tts     pre-synthesizes the greeting, filler and scripted flow clips
+    stt     checks the speech-to-text API is reachable with the configured key
+
+Each step reports ok / ms / detail; the report is kept per campaign and
+published as ``campaign.warmup``. ``keep_alive_loop`` then re-pings the model
+until the campaign task ends.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger("tron.warmup")
+
+# Cold-loading a 32B model can take a while
+LLM_LOAD_TIMEOUT_SECONDS = 180
+PROMPT_TIMEOUT_SECONDS = 60
+TTS_TIMEOUT_SECONDS = 60
+STT_TIMEOUT_SECONDS = 5
+
+
+def ollama_urls() -> List[str]:
+    """Ollama base URLs (without ``/v1``): ``TRON_OLLAMA_ENDPOINTS`` or the single configured endpoint."""
+    from tron.core.config import settings
+
+    urls = [u.strip().rstrip('/') for u in settings.ollama_endpoints.split(',') if u.strip()]
+    return urls or [(os.getenv('OLLAMA_BASE_URL') or settings.ollama_endpoint).rstrip('/')]
+
+
+def _step(ok: bool, started: float, detail: str = "") -> Dict[str, Any]:
+    return {"ok": ok, "ms": int((time.monotonic() - started) * 1000), "detail": detail}
+
+
+async def _ollama_post(client, url: str, path: str, payload: Dict[str, Any]) -> Optional[str]:
+    """POST to an Ollama endpoint; returns an error string, or None on success."""
+    try:
+        response = await client.post(f"{url}{path}", json=payload)
+    except Exception as e:
+        return f"{url}: {e or type(e).__name__}"
+    if response.status_code != 200:
+        return f"{url}: HTTP {response.status_code} {response.text[:200]}"
+    return None
+
+
+async def _gather_errors(calls) -> List[str]:
+    return [e for e in await asyncio.gather(*calls) if e]
+
+
+async def _warm_llm(agent) -> Dict[str, Any]:
+    """Load the model into memory on every Ollama endpoint (empty prompt = load only)."""
+    import httpx
+    from tron.core.config import settings
+
+    started = time.monotonic()
+    if (agent.llm_provider or "ollama") != "ollama":
+        return _step(True, started, f"skipped for {agent.llm_provider}")
+    payload = {"model": agent.llm_model, "keep_alive": settings.llm_keep_alive}
+    urls = ollama_urls()
+    async with httpx.AsyncClient(timeout=LLM_LOAD_TIMEOUT_SECONDS) as client:
+        errors = await _gather_errors(_ollama_post(client, url, "/api/generate", payload) for url in urls)
+    if errors:
+        return _step(False, started, "; ".join(errors))
+    return _step(True, started, f"{agent.llm_model} loaded on {len(urls)} endpoint(s)")
+
+
+async def _prime_prompt(agent) -> Dict[str, Any]:
+    """One 1-token completion over the static system prompt to seed the prompt cache."""
+    import httpx
+    from tron.core.config import settings
+    from tron.core.flow_engine import build_agent_prompt, prompt_hash
+
+    started = time.monotonic()
+    provider = agent.llm_provider or "ollama"
+    system_prompt = build_agent_prompt(agent)
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": "Hello"}]
+    prefix = prompt_hash(system_prompt)
+
+    async with httpx.AsyncClient(timeout=PROMPT_TIMEOUT_SECONDS) as client:
+        if provider == "ollama":
+            payload = {
+                "model": agent.llm_model,
+                "messages": messages,
+                "stream": False,
+                "keep_alive": settings.llm_keep_alive,
+                "options": {"num_predict": 1},
+            }
+            errors = await _gather_errors(_ollama_post(client, url, "/api/chat", payload) for url in ollama_urls())
+        elif provider == "custom" and agent.llm_endpoint:
+            # OpenAI-compatible servers (vLLM, llama.cpp) with automatic prefix caching
+            async def _prime(url: str) -> Optional[str]:
+                url = url.strip().rstrip('/')
+                try:
+                    response = await client.post(
+                        f"{url}/chat/completions",
+                        headers={"Authorization": f"Bearer {agent.llm_api_key or 'none'}"},
+                        json={"model": agent.llm_model, "messages": messages, "max_tokens": 1},
+                    )
+                except Exception as e:
+                    return f"{url}: {e or type(e).__name__}"
+                return None if response.status_code == 200 else f"{url}: HTTP {response.status_code}"
+
+            errors = await _gather_errors(_prime(u) for u in agent.llm_endpoint.split(',') if u.strip())
+        else:
+            return _step(True, started, f"skipped for {provider}")
+    if errors:
+        return _step(False, started, "; ".join(errors))
+    return _step(True, started, f"prefix {prefix} primed")
+
+
+async def _warm_tts(db_session_factory, agent) -> Dict[str, Any]:
+    """Cache the agent's greeting, filler clips and fixed flow prompts."""
+    from tron.core.flow_cache import flow_cache
+    from tron.core.flow_engine import compile_template
+    from tron.core.tts_cache import prewarm_clips, voice_params, filler_texts
+
+    started = time.monotonic()
+    # Templated greetings: only the sentences without {{slots}} are the same on every call
+    texts = compile_template(agent.greeting_text or "").cacheable_texts() + filler_texts(agent)
+    if agent.flow_id:
+        async with db_session_factory() as db:
+            flow = await flow_cache.load(agent.flow_id, db)
+        if flow is not None:
+            texts.extend(flow.scripted)
+    # Synthesis runs outside the session so no DB connection is held meanwhile
+    counts = await asyncio.wait_for(prewarm_clips(texts, voice_params(agent)), timeout=TTS_TIMEOUT_SECONDS)
+    detail = ", ".join(f"{k} {v}" for k, v in counts.items())
+    return _step(counts.get("failed", 0) == 0, started, detail)
+
+
+async def _check_stt() -> Dict[str, Any]:
+    """The Sarvam API answers and a key is configured (any HTTP response counts as reachable)."""
+    import httpx
+    from tron.core.config import settings
+    from tron.core.sarvam import SARVAM_API_URL
+
+    started = time.monotonic()
+    if not settings.sarvam_api_key:
+        return _step(False, started, "Sarvam API key not configured")
+    try:
+        async with httpx.AsyncClient(timeout=STT_TIMEOUT_SECONDS) as client:
+            await client.get(SARVAM_API_URL, headers={"api-subscription-key": settings.sarvam_api_key})
+    except Exception as e:
+        return _step(False, started, f"{SARVAM_API_URL} unreachable: {e or type(e).__name__}")
+    return _step(True, started, "reachable")
+
+
+async def _guarded(name: str, coro) -> Dict[str, Any]:
+    started = time.monotonic()
+    try:
+        return await coro
+    except Exception as e:
+        logger.warning(f"Warm-up step {name} failed: {e}")
+        return _step(False, started, str(e) or type(e).__name__)
+
+
+async def warm_up_agent(db_session_factory, agent_id: str) -> Dict[str, Any]:
+    """
+    Run every warm-up step for an agent concurrently. Failures are reported,
+    never raised: a campaign still dials with a cold model.
+    """
+    from tron.core.database import AgentModel
+    from sqlalchemy import select
+
+    started = time.monotonic()
+    async with db_session_factory() as db:
+        result = await db.execute(select(AgentModel).where(AgentModel.id == agent_id))
+        agent = result.scalar_one_or_none()
+    if agent is None:
+        return {"agent_id": agent_id, "ready": False, "steps": {}, "ms": 0}
+
+    # Load the model first: priming an unloaded model would just queue behind the load
+    llm = await _guarded("llm", _warm_llm(agent))
+    prompt, tts, stt = await asyncio.gather(
+        _guarded("prompt", _prime_prompt(agent)),
+        _guarded("tts", _warm_tts(db_session_factory, agent)),
+        _guarded("stt", _check_stt()),
+    )
+    steps = {"llm": llm, "prompt": prompt, "tts": tts, "stt": stt}
+    report = {
+        "agent_id": agent_id,
+        "ready": all(s["ok"] for s in steps.values()),
+        "steps": steps,
+        "ms": int((time.monotonic() - started) * 1000),
+    }
+    logger.info(
+        f"Warm-up for agent {agent_id} in {report['ms']}ms: "
+        + ", ".join(f"{name} {'ok' if s['ok'] else 'FAILED'} ({s['detail']})" for name, s in steps.items())
+    )
+    return report
+
+
+async def keep_alive_loop(db_session_factory, agent_id: str, interval: Optional[float] = None):
+    """Re-load the agent's model on every Ollama endpoint every ``interval`` seconds until cancelled."""
+    import httpx
+    from tron.core.config import settings
+    from tron.core.database import AgentModel
+    from sqlalchemy import select
+
+    interval = interval or settings.llm_keep_alive_interval
+    async with db_session_factory() as db:
+        result = await db.execute(select(AgentModel.llm_provider, AgentModel.llm_model).where(AgentModel.id == agent_id))
+        row = result.first()
+    if row is None or (row.llm_provider or "ollama") != "ollama" or interval <= 0:
+        return
+
+    payload = {"model": row.llm_model, "keep_alive": settings.llm_keep_alive}
+    async with httpx.AsyncClient(timeout=LLM_LOAD_TIMEOUT_SECONDS) as client:
+        while True:
+            await asyncio.sleep(interval)
+            errors = await _gather_errors(_ollama_post(client, url, "/api/generate", payload) for url in ollama_urls())
+            for error in errors:
+                logger.warning(f"Keep-alive for {row.llm_model} failed: {error}")
@@ -0,0 +1,63 @@
+"""
+Local branch classifiers: keyword matching on word boundaries with the
+longest phrase winning, and intent scoring that defers to the LLM when unsure.
+
+    python -m pytest tron/tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core.classifier import KeywordMatcher, IntentClassifier, label_variants  # noqa: E402
+
+
+def _yes_no() -> KeywordMatcher:
+    return KeywordMatcher([(p, "yes") for p in label_variants("yes")] + [(p, "no") for p in label_variants("no")])
+
+
+def test_keywords_match_hinglish_and_devanagari():
+    matcher = _yes_no()
+    assert matcher.match("Haan ji, bilkul!") == "yes"
+    assert matcher.match("नहीं चाहिए") == "no"
+    assert matcher.match("OK.") == "yes"
+
+
+def test_longest_phrase_wins():
+    # "ji" alone is a yes; "ji nahi" is a no
+    assert _yes_no().match("ji nahi") == "no"
+
+
+def test_keywords_stay_on_word_boundaries():
+    # "na" must not fire inside "naam"
+    assert _yes_no().match("mera naam Ravi hai") is None
+
+
+def test_branch_order_breaks_ties():
+    matcher = KeywordMatcher([("busy", "callback"), ("busy", "busy")])
+    assert matcher.match("abhi busy hoon") == "callback"
+
+
+def _intents() -> IntentClassifier:
+    return IntentClassifier([
+        {"label": "pricing", "examples": ["kitna price hai", "cost kya hai", "rate batao"]},
+        {"label": "callback", "examples": ["baad mein call karo"]},
+        {"label": "complaint", "examples": ["service kharab hai", "problem ho rahi hai"]},
+    ])
+
+
+def test_intent_keyword_pass_is_certain():
+    assert _intents().classify("baad me") == ("callback", 1.0)
+
+
+def test_intent_tolerates_stt_spelling():
+    label, confidence = _intents().classify("kitne ka price h")
+    assert label == "pricing"
+    assert 0.55 <= confidence < 1.0
+
+
+def test_intent_defers_when_unsure():
+    label, confidence = _intents().classify("aaj mausam kaisa hai")
+    assert label is None
+    assert confidence < 0.55
+    assert _intents().classify("") == (None, 0.0)
@@ -0,0 +1,152 @@
+"""
+CallFinalizer: the shutdown payload, the single write, and spool replay —
+including calls that were already closed before the worker finalized them.
+
+    python -m pytest tron/tests
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core import database  # noqa: E402
+from tron.core.config import settings  # noqa: E402
+from tron.core.database import AgentModel, CallModel, CampaignModel, TranscriptSegmentModel  # noqa: E402
+from tron.voice.finalizer import CallFinalizer, commit_payload, replay_spool  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database and spool directory for one test (created on first use)."""
+    monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/tron.db")
+    monkeypatch.setattr(settings, "finalize_spool_dir", str(tmp_path / "spool"))
+    for name in ("_engine", "_writer_engine", "_session_factory"):
+        monkeypatch.setattr(database, name, None)
+    yield tmp_path
+    if database._engine is not None:
+        asyncio.run(database._engine.dispose())
+    if database._writer_engine is not None:
+        asyncio.run(database._writer_engine.dispose())
+
+
+async def _seed(status: str = "ringing", ended: bool = False) -> None:
+    await database.init_db()
+    factory = await database.get_session_factory()
+    async with factory() as s:
+        s.add(AgentModel(id="agent-1", name="Test agent"))
+        s.add(CampaignModel(id="camp-1", name="Test campaign", agent_id="agent-1"))
+        s.add(CallModel(
+            id="call-1", campaign_id="camp-1", agent_id="agent-1", phone_number="+919800000000",
+            status=status, started_at=datetime.utcnow() - timedelta(minutes=2),
+            ended_at=datetime.utcnow() - timedelta(minutes=1) if ended else None,
+        ))
+        await s.commit()
+
+
+async def _state():
+    factory = await database.get_session_factory()
+    async with factory() as s:
+        call = (await s.execute(
+            select(CallModel.status, CallModel.outcome, CallModel.talk_time_seconds).where(CallModel.id == "call-1")
+        )).one()
+        campaign = (await s.execute(
+            select(CampaignModel.completed_calls, CampaignModel.failed_calls).where(CampaignModel.id == "camp-1")
+        )).one()
+        segments = (await s.execute(
+            select(func.count()).select_from(TranscriptSegmentModel).where(TranscriptSegmentModel.call_id == "call-1")
+        )).scalar()
+    return tuple(call), tuple(campaign), segments
+
+
+def _answered_payload():
+    finalizer = CallFinalizer("call-1", "agent-1")
+    finalizer.answered_at = datetime.utcnow() - timedelta(seconds=30)
+    finalizer.outcome = "interested"
+    segments = [{"call_id": "call-1", "seq": i, "role": "user", "text": f"line {i}",
+                 "created_at": datetime.utcnow()} for i in range(3)]
+    return finalizer.payload(segments, {"call_id": "call-1", "turns": []})
+
+
+def test_payload_is_json_ready(db):
+    finalizer = CallFinalizer("call-1")
+    finalizer.mark_ended()
+    ended_at = finalizer.ended_at
+    finalizer.set_outcome("  callback_requested  ", {"slot": "evening"})
+    segment = {"call_id": "call-1", "seq": 0, "role": "user", "text": "kal call karna", "created_at": datetime.utcnow()}
+    payload = finalizer.payload([segment], {"call_id": "call-1", "turns": []})
+
+    json.dumps(payload)
+    # The first end time wins (the moment the callee hung up)
+    assert payload["ended_at"] == ended_at.isoformat()
+    assert payload["answered_at"] is None
+    assert payload["outcome"] == "callback_requested"
+    assert payload["extracted_data"] == {"slot": "evening"}
+    assert payload["segments"][0]["created_at"] == segment["created_at"].isoformat()
+    # A latency row without turns isn't written
+    assert payload["latency"] is None
+
+
+def test_commit_counts_completed_call_once(db):
+    async def run():
+        await _seed()
+        payload = _answered_payload()
+        await commit_payload(payload)
+        first = await _state()
+        # A replay of the same payload after a partial failure changes nothing
+        await commit_payload(payload)
+        return first, await _state()
+
+    first, second = asyncio.run(run())
+    (status, outcome, talk_time), counters, segments = first
+    assert (status, outcome, counters, segments) == ("completed", "interested", (1, 0), 3)
+    assert talk_time >= 29
+    assert second == first
+
+
+def test_failed_call_keeps_status_and_counter(db):
+    async def run():
+        await _seed(status="failed", ended=True)
+        await commit_payload(_answered_payload())
+        return await _state()
+
+    (status, outcome, _), counters, segments = asyncio.run(run())
+    assert status == "failed"
+    assert outcome == "interested"
+    assert counters == (0, 0)
+    assert segments == 3
+
+
+def test_spooled_payload_replays_once(db):
+    async def run():
+        await _seed()
+        pending = os.path.join(settings.finalize_spool_dir, "pending")
+        os.makedirs(pending)
+        with open(os.path.join(pending, "call-1.json"), "w", encoding="utf-8") as f:
+            json.dump(_answered_payload(), f)
+        written = await replay_spool(), await replay_spool()
+        return written, os.listdir(pending), await _state()
+
+    written, left, ((status, _, _), counters, _) = asyncio.run(run())
+    assert written == (1, 0)
+    assert left == []
+    assert (status, counters) == ("completed", (1, 0))
+
+
+def test_stale_marker_leaves_closed_call_alone(db):
+    async def run():
+        await _seed(status="failed", ended=True)
+        finalizer = CallFinalizer("call-1", "agent-1")
+        finalizer.mark_answered()
+        stale = datetime.utcnow().timestamp() - 3600
+        os.utime(finalizer._marker_path, (stale, stale))
+        return await replay_spool(), await _state()
+
+    written, ((status, outcome, _), counters, _) = asyncio.run(run())
+    assert written == 1
+    assert (status, outcome, counters) == ("failed", None, (0, 0))
@@ -0,0 +1,176 @@
+"""
+Canvas deltas and version history: diff → apply round-trips, id handling on
+the id-keyed tables, and rebuilding old versions from snapshots + deltas.
+
+    python -m pytest tron/tests
+"""
+import asyncio
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core import database  # noqa: E402
+from tron.core.config import settings  # noqa: E402
+from tron.core.database import FlowModel, FlowVersionModel  # noqa: E402
+from tron.core.flow_delta import DeltaError, IndexedCanvas  # noqa: E402
+from tron.core.flow_history import apply_delta, diff_canvas, load_version, record_version  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+
+BASE = {
+    "nodes": [
+        {"id": "s", "type": "start_outbound", "position": {"x": 0, "y": 0}},
+        {"id": "g", "type": "greeting", "data": {"text": "Namaste!"}},
+        {"id": "e", "type": "end_call", "data": {"closing_message": "Dhanyavaad!"}},
+    ],
+    # Editor-made edges often have no id
+    "edges": [
+        {"source": "s", "target": "g"},
+        {"source": "g", "target": "e"},
+    ],
+    "viewport": {"x": 0, "y": 0, "zoom": 1},
+}
+
+
+def _edited():
+    canvas = copy.deepcopy(BASE)
+    canvas["nodes"][1]["data"]["text"] = "Namaste {{name}} ji!"
+    canvas["nodes"].append({"id": "l", "type": "listen"})
+    canvas["edges"][1]["label"] = "default"
+    # A second id-less edge between the same nodes, and one with an id
+    canvas["edges"].append({"source": "g", "target": "e", "label": "yes"})
+    canvas["edges"].append({"id": "e9", "source": "e", "target": "l"})
+    canvas["viewport"] = {"x": 40, "y": -10, "zoom": 1.5}
+    return canvas
+
+
+def test_diff_apply_round_trip():
+    old, new = BASE, _edited()
+    assert apply_delta(old, diff_canvas(old, new)) == new
+    assert apply_delta(new, diff_canvas(new, old)) == old
+    assert diff_canvas(new, copy.deepcopy(new)) == []
+
+
+def test_reorder_replaces_whole_list():
+    new = copy.deepcopy(BASE)
+    new["edges"].reverse()
+    ops = diff_canvas(BASE, new)
+    assert ops == [{"op": "replace", "path": "/edges", "value": new["edges"]}]
+    assert apply_delta(BASE, ops) == new
+
+
+def test_idless_edges_are_not_given_ids():
+    ops = [{"op": "replace", "path": "/edges/g->e", "value": {"source": "g", "target": "e", "label": "x"}}]
+    assert apply_delta(BASE, ops)["edges"][1] == {"source": "g", "target": "e", "label": "x"}
+
+
+def test_append_takes_id_from_value():
+    ops = [{"op": "add", "path": "/nodes/-", "value": {"id": "n9", "type": "speak"}},
+           {"op": "add", "path": "/edges/-", "value": {"source": "g", "target": "e"}}]
+    canvas = apply_delta(BASE, ops)
+    assert canvas["nodes"][-1] == {"id": "n9", "type": "speak"}
+    assert canvas["edges"][-1] == {"source": "g", "target": "e"}
+    assert list(IndexedCanvas(canvas).edges) == ["s->g", "g->e", "g->e#2"]
+
+
+@pytest.mark.parametrize("op", [
+    # Appending over an existing node
+    {"op": "add", "path": "/nodes/-", "value": {"id": "g", "type": "speak"}},
+    {"op": "add", "path": "/nodes/-", "value": {"type": "speak"}},
+    {"op": "replace", "path": "/nodes/-", "value": {"id": "n9"}},
+    # Value id disagrees with the path
+    {"op": "add", "path": "/nodes/n9", "value": {"id": "n10"}},
+    {"op": "replace", "path": "/edges/s->g", "value": {"id": "e1", "source": "s", "target": "g"}},
+    {"op": "add", "path": "/nodes/n9", "value": "not an object"},
+    {"op": "remove", "path": "/nodes/missing"},
+    {"op": "replace", "path": "/nodes/g/data/missing", "value": 1},
+    {"op": "add", "path": "/nodes/0", "value": {"id": "x"}},
+    {"op": "test", "path": "/viewport/zoom", "value": 2},
+    {"op": "move", "path": "/nodes/g"},
+])
+def test_rejected_ops(op):
+    with pytest.raises(DeltaError):
+        apply_delta(BASE, [op])
+
+
+def test_node_without_id_is_rejected():
+    canvas = {"nodes": [{"id": "a"}, {"type": "speak"}], "edges": []}
+    with pytest.raises(DeltaError):
+        apply_delta(canvas, [])
+    with pytest.raises(DeltaError):
+        apply_delta(BASE, [{"op": "replace", "path": "/nodes", "value": canvas["nodes"]}])
+
+
+def test_pointer_ops_inside_members():
+    ops = [
+        {"op": "test", "path": "/nodes/g/data/text", "value": "Namaste!"},
+        {"op": "add", "path": "/nodes/g/data/options", "value": []},
+        {"op": "add", "path": "/nodes/g/data/options/-", "value": "b"},
+        {"op": "add", "path": "/nodes/g/data/options/0", "value": "a"},
+        {"op": "remove", "path": "/nodes/s/position"},
+        {"op": "replace", "path": "/viewport/zoom", "value": 2},
+    ]
+    canvas = apply_delta(BASE, ops)
+    assert canvas["nodes"][1]["data"]["options"] == ["a", "b"]
+    assert "position" not in canvas["nodes"][0]
+    assert canvas["viewport"]["zoom"] == 2
+    # The input canvas is never modified
+    assert BASE["nodes"][0]["position"] == {"x": 0, "y": 0}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database for one test."""
+    monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/tron.db")
+    monkeypatch.setattr(settings, "flow_snapshot_interval", 3)
+    for name in ("_engine", "_writer_engine", "_session_factory"):
+        monkeypatch.setattr(database, name, None)
+    yield tmp_path
+    if database._engine is not None:
+        asyncio.run(database._engine.dispose())
+    if database._writer_engine is not None:
+        asyncio.run(database._writer_engine.dispose())
+
+
+def _versions():
+    """Eight canvases, each one small edit away from the previous."""
+    canvases = [copy.deepcopy(BASE)]
+    for i in range(1, 8):
+        canvas = copy.deepcopy(canvases[-1])
+        canvas["nodes"][1]["data"]["text"] = f"Namaste, edit {i}!"
+        if i % 2:
+            canvas["edges"].append({"source": "g", "target": "e", "label": f"l{i}"})
+        canvases.append(canvas)
+    return canvases
+
+
+def test_load_version_replays_snapshots_and_deltas(db):
+    async def run():
+        await database.init_db()
+        factory = await database.get_session_factory()
+        canvases = _versions()
+        async with factory() as s:
+            s.add(FlowModel(id="flow-1", name="Flow", canvas_data=canvases[-1], version=len(canvases)))
+            for version, canvas in enumerate(canvases, start=1):
+                ops = diff_canvas(canvases[version - 2], canvas) if version > 1 else None
+                await record_version(s, "flow-1", version, canvas, ops)
+            await s.commit()
+            loaded = [await load_version(s, "flow-1", v) for v in range(1, len(canvases) + 1)]
+            missing = await load_version(s, "flow-1", 99)
+            # A delta that no longer applies makes later versions unavailable, not wrong
+            await s.execute(
+                update(FlowVersionModel)
+                .where(FlowVersionModel.flow_id == "flow-1", FlowVersionModel.version == 5)
+                .values(delta=[{"op": "remove", "path": "/nodes/missing"}])
+            )
+            await s.commit()
+            broken = await load_version(s, "flow-1", 5), await load_version(s, "flow-1", 6)
+        return canvases, loaded, missing, broken
+
+    canvases, loaded, missing, broken = asyncio.run(run())
+    assert loaded == canvases
+    assert missing is None
+    assert broken == (None, canvases[5])
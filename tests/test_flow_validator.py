@@ -0,0 +1,116 @@
+"""
+Flow validator: the full checks, and incremental re-validation agreeing with
+a full run on the same canvas after every delta.
+
+    python -m pytest tron/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core.flow_delta import DeltaError  # noqa: E402
+from tron.core.flow_validator import FlowValidator, validate_canvas  # noqa: E402
+
+
+def _node(node_id, node_type, **data):
+    return {"id": node_id, "type": node_type, "data": data}
+
+
+def _flow():
+    return {
+        "nodes": [
+            _node("s", "start_outbound"),
+            _node("g", "greeting", text="Namaste {{name}} ji!"),
+            _node("l", "listen"),
+            _node("b", "branch_keyword"),
+            _node("y", "speak", text="Bahut badhiya."),
+            _node("e", "end_call", closing_message="Dhanyavaad!"),
+        ],
+        "edges": [
+            {"id": "e1", "source": "s", "target": "g"},
+            {"id": "e2", "source": "g", "target": "l"},
+            {"id": "e3", "source": "l", "target": "b"},
+            {"id": "e4", "source": "b", "target": "y", "label": "yes"},
+            {"id": "e5", "source": "b", "target": "e", "label": "default"},
+            {"id": "e6", "source": "y", "target": "e"},
+        ],
+        "viewport": {"x": 0, "y": 0, "zoom": 1},
+    }
+
+
+def _codes(result):
+    return sorted((i["code"], i.get("node_id") or i.get("edge_id") or "") for i in result["issues"])
+
+
+def _same_as_full(validator: FlowValidator, result):
+    full = validate_canvas(validator.to_canvas())
+    assert _codes(result) == _codes(full)
+    assert result["valid"] == full["valid"]
+    assert result["stats"] == full["stats"]
+
+
+def test_clean_flow_is_valid():
+    result = validate_canvas(_flow())
+    assert result["valid"], result["errors"]
+    assert result["stats"] == {"nodes": 6, "edges": 6, "reachable": 6}
+
+
+def test_structural_errors():
+    canvas = _flow()
+    canvas["nodes"] = [n for n in canvas["nodes"] if n["id"] != "s"] + [_node("t", "transfer")]
+    canvas["edges"].append({"id": "e7", "source": "y", "target": "ghost"})
+    codes = {code for code, _ in _codes(validate_canvas(canvas))}
+    assert {"no_start", "edge_missing_target", "transfer_no_number"} <= codes
+    assert not validate_canvas(canvas)["valid"]
+
+
+def test_loop_without_input_is_an_error():
+    canvas = _flow()
+    # greeting → speak → greeting, with the listen node cut out
+    canvas["edges"] = [e for e in canvas["edges"] if e["id"] != "e2"] + [
+        {"id": "e7", "source": "y", "target": "g"},
+        {"id": "e8", "source": "g", "target": "y"},
+    ]
+    result = validate_canvas(canvas)
+    assert ("loop_no_input", "g") in _codes(result)
+
+
+def test_node_without_id_is_reported_not_dropped():
+    result = validate_canvas({"nodes": [_node("s", "start_outbound"), {"type": "speak"}], "edges": []})
+    assert not result["valid"]
+    assert [i["code"] for i in result["issues"]] == ["malformed"]
+
+
+def test_incremental_matches_full_run():
+    validator = FlowValidator(_flow())
+    steps = [
+        # Cut the only path to the end: "e" and "y" become unreachable
+        [{"op": "remove", "path": "/edges/e3"}],
+        # Reconnect through a new node appended at "-"
+        [{"op": "add", "path": "/nodes/-", "value": _node("l2", "listen")},
+         {"op": "add", "path": "/edges/e9", "value": {"id": "e9", "source": "l", "target": "l2"}},
+         {"op": "add", "path": "/edges/-", "value": {"source": "l2", "target": "b"}}],
+        # greeting → speak → greeting never waits for the caller
+        [{"op": "add", "path": "/edges/e10", "value": {"id": "e10", "source": "y", "target": "g"}},
+         {"op": "add", "path": "/edges/e11", "value": {"id": "e11", "source": "g", "target": "y"}},
+         {"op": "replace", "path": "/nodes/b/type", "value": "branch_sentiment"}],
+        # Break it again and blank a scripted text
+        [{"op": "remove", "path": "/edges/e10"},
+         {"op": "replace", "path": "/nodes/y/data/text", "value": " "}],
+        # Whole-list replace drops the appended edge
+        [{"op": "replace", "path": "/edges", "value": _flow()["edges"]}],
+    ]
+    for ops in steps:
+        _same_as_full(validator, validator.apply(ops))
+    assert validator.revision == len(steps)
+
+
+def test_rejected_delta_raises():
+    validator = FlowValidator(_flow())
+    with pytest.raises(DeltaError):
+        validator.apply([{"op": "add", "path": "/nodes/x", "value": _node("y", "speak")}])
+    with pytest.raises(DeltaError):
+        validator.apply([{"op": "remove", "path": "/nodes/missing"}])
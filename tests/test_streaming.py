@@ -0,0 +1,71 @@
+"""
+synthesize_segments: ordered output, and prompt shutdown when the caller
+interrupts mid-reply.
+
+    python -m pytest tron/tests
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.voice.streaming import synthesize_segments  # noqa: E402
+
+
+class FakeTTS:
+    """Yields ``frames`` events per segment, each frame tagged with its segment."""
+
+    def __init__(self, frames: int = 5):
+        self.frames = frames
+
+    def synthesize(self, text: str):
+        tts = self
+
+        class _Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def __aiter__(self):
+                return self._events()
+
+            async def _events(self):
+                for i in range(tts.frames):
+                    await asyncio.sleep(0)
+                    yield SimpleNamespace(frame=(text, i))
+
+        return _Stream()
+
+
+async def _segments(n: int):
+    for i in range(n):
+        yield f"segment {i}"
+
+
+def test_frames_in_segment_order():
+    async def run():
+        return [frame async for frame in synthesize_segments(FakeTTS(3), _segments(4), lookahead=1)]
+
+    frames = asyncio.run(run())
+    assert frames == [(f"segment {s}", i) for s in range(4) for i in range(3)]
+
+
+def test_interrupt_mid_stream_shuts_down():
+    async def run():
+        stream = synthesize_segments(FakeTTS(50), _segments(20), lookahead=1)
+        received = []
+        async for frame in stream:
+            received.append(frame)
+            if len(received) == 3:
+                break
+        # Let the producer fill the lookahead queue before the interruption
+        for _ in range(20):
+            await asyncio.sleep(0)
+        await asyncio.wait_for(stream.aclose(), timeout=2)
+        return received
+
+    assert asyncio.run(run()) == [("segment 0", i) for i in range(3)]
@@ -0,0 +1,63 @@
+"""
+{{variable}} templates: rendering, and the split of a text into sentences
+that can come from the TTS cache and ones synthesized per call.
+
+    python -m pytest tron/tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core.flow_engine import CompiledFlow, compile_template, render_text  # noqa: E402
+
+GREETING = "Namaste {{ name }} ji! Main Priya bol rahi hoon. Aapka loan {{amount}} ka hai. Kya aap {{city}} mein hain?"
+
+
+def test_render_fills_slots_and_blanks_unknown_names():
+    template = compile_template("Namaste {{ name }} ji, aapka {{contact.plan}} plan {{missing}}active hai.")
+    assert template.names == ("name", "contact.plan", "missing")
+    assert not template.static
+    assert template.render({"name": "Ravi", "contact.plan": "Gold", "missing": None}) == \
+        "Namaste Ravi ji, aapka Gold plan active hai."
+
+
+def test_compiled_once_and_static_text_passes_through():
+    assert compile_template(GREETING) is compile_template(GREETING)
+    static = compile_template("Dhanyavaad!")
+    assert static.static
+    assert static.render({"name": "Ravi"}) == "Dhanyavaad!"
+    assert render_text("", {}) == ""
+    assert render_text("Hello {{name}}", {"name": 42}) == "Hello 42"
+
+
+def test_cacheable_texts_are_slot_free_sentences():
+    assert compile_template(GREETING).cacheable_texts() == ["Main Priya bol rahi hoon."]
+    assert compile_template("  Thank you for calling.  ").cacheable_texts() == ["Thank you for calling."]
+    assert compile_template("").cacheable_texts() == []
+
+
+def test_speech_parts_merge_per_contact_runs():
+    parts = compile_template(GREETING).speech_parts({"name": "Ravi", "amount": "5000", "city": "Pune"})
+    assert parts == [
+        ("Namaste Ravi ji!", False),
+        ("Main Priya bol rahi hoon.", True),
+        ("Aapka loan 5000 ka hai. Kya aap Pune mein hain?", False),
+    ]
+
+
+def test_speech_parts_split_on_danda():
+    parts = compile_template("नमस्ते {{name}} जी। मैं प्रिया बोल रही हूँ।").speech_parts({"name": "रवि"})
+    assert parts == [("नमस्ते रवि जी।", False), ("मैं प्रिया बोल रही हूँ।", True)]
+
+
+def test_flow_scripted_texts_skip_per_contact_sentences():
+    flow = CompiledFlow({
+        "nodes": [
+            {"id": "s", "type": "start_outbound"},
+            {"id": "g", "type": "greeting", "data": {"text": GREETING}},
+            {"id": "e", "type": "end_call", "data": {"closing_message": "Dhanyavaad!"}},
+        ],
+        "edges": [{"source": "s", "target": "g"}, {"source": "g", "target": "e"}],
+    })
+    assert flow.scripted == ("Main Priya bol rahi hoon.", "Dhanyavaad!")
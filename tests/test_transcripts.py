@@ -0,0 +1,89 @@
+"""
+Transcript relay: every committed segment reaches the live monitor exactly
+once, including one whose id is lower than a segment already relayed (a
+slower concurrent writer on PostgreSQL).
+
+    python -m pytest tron/tests
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tron.core import database, transcripts  # noqa: E402
+from tron.core.config import settings  # noqa: E402
+from tron.core.database import AgentModel, CallModel  # noqa: E402
+from tron.core.events import event_bus  # noqa: E402
+from tron.core.transcripts import append_segments, relay_segments  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database for one test."""
+    monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/tron.db")
+    for name in ("_engine", "_writer_engine", "_session_factory"):
+        monkeypatch.setattr(database, name, None)
+    yield tmp_path
+    if database._engine is not None:
+        asyncio.run(database._engine.dispose())
+    if database._writer_engine is not None:
+        asyncio.run(database._writer_engine.dispose())
+
+
+async def _write(factory, seg_id: int, call_id: str, seq: int):
+    async with factory() as s:
+        await append_segments(s, [{
+            "id": seg_id, "call_id": call_id, "seq": seq, "role": "user",
+            "text": f"{call_id} {seq}", "created_at": datetime.utcnow(),
+        }])
+        await s.commit()
+
+
+def _relayed(writes, lag: float, monkeypatch):
+    """(call_id, seq) of the relayed events when ``writes`` commit one by one."""
+    monkeypatch.setattr(transcripts, "RELAY_LAG_SECONDS", lag)
+
+    async def run():
+        await database.init_db()
+        factory = await database.get_session_factory()
+        async with factory() as s:
+            s.add(AgentModel(id="agent-1", name="Test agent"))
+            for call_id in ("call-a", "call-b"):
+                s.add(CallModel(id=call_id, agent_id="agent-1", phone_number="+919800000000"))
+            await s.commit()
+
+        queue = await event_bus.subscribe()
+        relay = asyncio.create_task(relay_segments(interval=0.01))
+        try:
+            await asyncio.sleep(0.1)
+            for write in writes:
+                await _write(factory, *write)
+                await asyncio.sleep(0.1)
+        finally:
+            relay.cancel()
+            await asyncio.gather(relay, return_exceptions=True)
+            await event_bus.unsubscribe(queue)
+        events = []
+        while not queue.empty():
+            message = json.loads(queue.get_nowait())
+            if message["event"] == "call.transcript":
+                events.append((message["data"]["call_id"], message["data"]["seq"]))
+        return events
+
+    return asyncio.run(run())
+
+
+def test_late_commit_with_lower_id_is_relayed(db, monkeypatch):
+    # id 3 commits after id 5 was already relayed
+    writes = [(5, "call-a", 0), (3, "call-b", 0), (6, "call-a", 1)]
+    assert _relayed(writes, 10.0, monkeypatch) == [("call-a", 0), ("call-b", 0), ("call-a", 1)]
+
+
+def test_rows_leaving_the_window_are_not_repeated(db, monkeypatch):
+    writes = [(1, "call-a", 0), (2, "call-b", 0), (3, "call-a", 1)]
+    assert _relayed(writes, 0.02, monkeypatch) == [("call-a", 0), ("call-b", 0), ("call-a", 1)]
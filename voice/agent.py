@@ -10,42 +10,160 @@ import os
 import json
 import asyncio
 import logging
-from typing import Optional
+from typing import Optional, List, Dict
 
 from dotenv import load_dotenv
 
+from tron.voice.components import get_registry, prewarm
+from tron.voice.playback import cached_clip, clip_frames, say_cached, synthesize_clip
+from tron.voice.streaming import ClauseSegmenter, segment_stream, synthesize_segments
+from tron.voice.turn_metrics import TurnTracker
+from tron.voice.transcript import TranscriptWriter
+from tron.voice.finalizer import CallFinalizer, replay_loop
+from tron.voice.response_cache import CallResponseCache, get_response_cache, contact_values
+from tron.voice.llm_pool import EndpointPool, attempt_plan, pooled_chat
+from tron.voice.context_budget import compact_chat_ctx
+from tron.voice.fillers import FillerSet, speak_with_filler
+from tron.voice.flow_runner import FlowRunner, commit_user_turn, flow_variables, load_flow
+from tron.core.flow_engine import FlowRuntime, build_agent_prompt, compile_template, build_contact_context, prompt_hash
+from tron.core.warmup import ollama_urls
+from tron.core.tts_cache import voice_params
+
 load_dotenv()
 logger = logging.getLogger("tron.voice")
 
+SARVAM_BASE_URL = "https://api.sarvam.ai"
+
+
+# How long to keep a warmed-up agent waiting for the callee to pick up
+ANSWER_TIMEOUT_SECONDS = 60.0
+
 
 async def build_entrypoint(ctx):
-    """LiveKit Agents entrypoint — called for each new room."""
+    """
+    LiveKit Agents entrypoint — called for each new room.
+
+    The agent is dispatched while the phone is still ringing, so everything
+    expensive (config, STT/LLM/TTS, system prompt, greeting audio) happens
+    before the callee answers. On answer we only play pre-synthesized frames.
+    """
     try:
         # lazy imports so the main API can import this module without livekit installed
-        from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli
+        from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, function_tool, RunContext, StopResponse
         from livekit.agents.voice import Agent, AgentSession
         from livekit import rtc
+        from tron.core.config import settings
 
-        # Read agent config from room metadata or participant attributes
-        job_metadata: dict = {}
-        try:
-            job_metadata = json.loads(ctx.room.metadata or '{}')
-        except Exception:
-            pass
+        # Dispatch metadata (explicit dispatch) wins over room metadata
+        job_metadata = _parse_job_metadata(ctx)
 
         agent_id = job_metadata.get('agent_id') or os.getenv('DEFAULT_AGENT_ID', '')
         call_id = job_metadata.get('call_id', '')
 
-        # Load agent config from DB (if available)
-        agent_config = await _load_agent_config(agent_id)
-
-        # Build LLM / STT / TTS
-        llm = _build_llm(agent_config)
-        stt = _build_stt(agent_config)
-        tts = _build_tts(agent_config)
-
-        # Build system prompt
-        system_prompt = _build_system_prompt(agent_config)
+        # Join the room while the rest of the pipeline is being built
+        connect_task = asyncio.create_task(ctx.connect())
+
+        # End-of-call state, written in one transaction when the job shuts down
+        finalizer = CallFinalizer(call_id, agent_id)
+        finalizer.open()
+
+        # Load agent config — served from the worker cache in the common case
+        _ensure_agent_cache()
+        _ensure_finalize_replay()
+        agent_config = await _load_agent_config(agent_id, job_metadata.get('agent_version'))
+
+        # LLM / STT / TTS — shared per (provider, model, voice) within this process
+        components = get_registry(ctx)
+        llm_pool = components.get('llm_pool', _llm_pool_key(agent_config),
+                                  lambda: EndpointPool(_llm_base_urls(agent_config), _llm_api_key(agent_config)))
+        llm_pool.start_probes(components)
+
+        def _pooled_llm(endpoint, model):
+            return components.get(
+                'llm', _llm_key(agent_config, endpoint.base_url, model),
+                lambda: _build_llm(agent_config, components, base_url=endpoint.base_url, model=model),
+            )
+
+        llm = _pooled_llm(llm_pool.ranked()[0], agent_config.get('llm_model', 'qwen2.5:32b'))
+        stt = components.get('stt', _stt_key(agent_config),
+                             lambda: _build_stt(agent_config, components.http_session()))
+        tts = components.get('tts', _tts_key(agent_config),
+                             lambda: _build_tts(agent_config, components.http_session()))
+
+        # Open keep-alive connections while the phone rings
+        asyncio.create_task(components.warm([SARVAM_BASE_URL]))
+
+        # Flow agents run their canvas as a state machine; the LLM only handles
+        # llm_response nodes and branch/extract decisions
+        flow_runtime = None
+        variables = flow_variables(agent_config, job_metadata)
+        flow_id = agent_config.get('flow_id')
+        # The flow version pinned at dial time, if the call was dialled on this flow
+        flow_version = job_metadata.get('flow_version') if job_metadata.get('flow_id') == flow_id else None
+        compiled_flow = await load_flow(flow_id, flow_version)
+        if compiled_flow is not None:
+            flow_runtime = FlowRuntime(compiled_flow, variables)
+            if flow_runtime.start_node is None:
+                flow_runtime = None
+        flow_start_actions = flow_runtime.start() if flow_runtime else []
+
+        # Fetch (or pre-synthesize) the cached opening clips while the phone rings
+        greeting_template = compile_template(
+            agent_config.get('greeting_text') or "Namaste! Main aapki kaise sahayata kar sakta hoon?"
+        )
+        # Sentence runs: slot-free ones come from the cache (warmed with the
+        # campaign), per-contact ones are synthesized while ringing and not stored
+        greeting_parts = greeting_template.speech_parts(variables)
+        if flow_runtime is None:
+            greeting_task = asyncio.gather(*(
+                cached_clip(tts, text, agent_config) if static else synthesize_clip(tts, text)
+                for text, static in greeting_parts
+            ), return_exceptions=True)
+        else:
+            tts_keys = compiled_flow.tts_keys(voice_params(agent_config))
+            greeting_task = asyncio.gather(*(
+                cached_clip(tts, text, agent_config, key=tts_keys[text])
+                for a in flow_start_actions if a['type'] == 'say'
+                for text, static in (a.get('parts') or [(a['text'], True)]) if static and text in tts_keys
+            ), return_exceptions=True)
+
+        # Backchannel clips for turns where the LLM is slow to start
+        fillers = None
+        if settings.voice_filler_after > 0:
+            fillers = FillerSet(tts, agent_config)
+            asyncio.create_task(fillers.prepare())
+
+        # Build system prompt: the agent-wide part first, byte-identical on every
+        # call, so the LLM server can reuse its prompt cache; contact data last
+        static_prompt = build_agent_prompt(agent_config)
+        contact_context = build_contact_context(
+            job_metadata.get('contact_name'), job_metadata.get('contact_metadata'),
+        )
+        system_prompt = f"{static_prompt}\n\n{contact_context}" if contact_context else static_prompt
+        prefix_hash = _track_prompt_prefix(static_prompt)
+
+        # Opt-in per-agent cache of answers to repeated caller questions (freeform agents)
+        agent_response_cache = get_response_cache(agent_config) if flow_runtime is None else None
+        response_cache = None
+        if agent_response_cache is not None:
+            response_cache = CallResponseCache(agent_response_cache, contact_values(
+                job_metadata.get('contact_name'), job_metadata.get('contact_metadata'),
+            ))
+
+        async def _complete(instructions: str, user_text: str) -> str:
+            """One short non-streamed completion for flow decisions."""
+            from livekit.agents.llm import ChatContext
+
+            chat_ctx = ChatContext.empty()
+            chat_ctx.add_message(role='system', content=instructions)
+            chat_ctx.add_message(role='user', content=user_text)
+            plan = attempt_plan(llm_pool, agent_config.get('llm_model', 'qwen2.5:32b'), settings.llm_fallback_model)
+            parts = []
+            async for chunk in pooled_chat(plan, _pooled_llm, {'chat_ctx': chat_ctx}, None,
+                                           settings.llm_first_token_deadline):
+                if chunk.delta is not None and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+            return ''.join(parts).strip()
 
         class _TronAgent(Agent):
             def __init__(self):
@@ -56,17 +174,154 @@ async def build_entrypoint(ctx):
                     tts=tts,
                 )
 
+            async def on_user_turn_completed(self, turn_ctx, new_message):
+                text = new_message.text_content or ""
+                if flow_runner is not None:
+                    # The flow decides what to say next
+                    asyncio.create_task(flow_runner.on_user_turn(text))
+                    raise StopResponse()
+                if response_cache is None:
+                    return
+                answer = response_cache.lookup(turn_ctx, text)
+                if answer is None:
+                    return
+                # Confident repeat question: answer from cache, skip the LLM
+                await commit_user_turn(self, text, transcript)
+                await say_cached(self.session, self.tts, answer, agent_config, synthesize=False)
+                raise StopResponse()
+
+            async def llm_node(self, chat_ctx, tools, model_settings):
+                # Best endpoint by TTFT/load; fail over if the first token is late
+                plan = attempt_plan(llm_pool, agent_config.get('llm_model', 'qwen2.5:32b'),
+                                    settings.llm_fallback_model)
+                # Keep the prompt under the model's token budget on long calls
+                chat_ctx, prompt_tokens = compact_chat_ctx(chat_ctx, agent_config)
+                timing = turn_tracker.llm_started()
+                timing.prompt_tokens = prompt_tokens
+                async for chunk in pooled_chat(
+                    plan,
+                    _pooled_llm,
+                    {'chat_ctx': chat_ctx, 'tools': tools, 'tool_choice': model_settings.tool_choice},
+                    _llm_conn_options(self),
+                    settings.llm_first_token_deadline,
+                    on_first_token=timing.first_token,
+                ):
+                    if getattr(chunk, 'usage', None) is not None:
+                        timing.prompt_tokens = chunk.usage.prompt_tokens
+                        timing.cached_tokens = chunk.usage.prompt_cached_tokens
+                    yield chunk
+                timing.done()
+
+            async def tts_node(self, text, model_settings):
+                # Speak clause by clause while the LLM is still generating
+                def _synthesize(tokens):
+                    segments = segment_stream(tokens, ClauseSegmenter(min_clause_chars=settings.tts_min_clause_chars))
+                    return synthesize_segments(self.tts, segments, conn_options=_tts_conn_options(self))
+
+                # "haan ji" from cache if the first token is late
+                async for frame in speak_with_filler(text, _synthesize, fillers, settings.voice_filler_after):
+                    yield frame
+
+            @function_tool
+            async def end_call(self, context: RunContext, outcome: str):
+                """
+                Hang up once the conversation is over. Say goodbye first.
+
+                Args:
+                    outcome: Short tag for how the call went, e.g. "interested",
+                        "not_interested", "callback_requested", "wrong_number".
+                """
+                finalizer.set_outcome(outcome)
+                context.disallow_interruptions()
+                # Hang up after the goodbye has played, not mid-sentence
+                context.speech_handle.add_done_callback(lambda _: ctx.delete_room())
+                return None
+
         session = AgentSession(
             turn_detection="stt",
-            min_endpointing_delay=0.8,
+            min_endpointing_delay=settings.voice_min_endpointing_delay,
+            vad=components.vad,
         )
-        await ctx.connect()
-        await session.start(agent=_TronAgent(), room=ctx.room)
-
-        # Greet
-        greeting = agent_config.get('greeting_text') or "Namaste! Main aapki kaise sahayata kar sakta hoon?"
-        await asyncio.sleep(1)
-        await session.say(greeting)
+        # Per-turn latency timeline, written by the finalizer
+        turn_tracker = TurnTracker()
+        turn_tracker.attach(session)
+
+        # Stream finalized utterances into transcript_segments (~1 s batches)
+        transcript = TranscriptWriter(call_id)
+        transcript.attach(session)
+        transcript.start()
+
+        if response_cache is not None:
+            response_cache.attach(session)
+
+        flow_runner = None
+        if flow_runtime is not None:
+            flow_runner = FlowRunner(flow_runtime, ctx, tts, agent_config, _complete,
+                                     finalizer=finalizer, transcript=transcript)
+
+        async def _finalize():
+            if response_cache is not None:
+                logger.info(f"[TRON] Call {call_id}: {response_cache.served} answer(s) from response cache, "
+                            f"{response_cache.withheld} withheld (contact details), "
+                            f"agent cache {response_cache.cache.stats()}")
+            if flow_runner is not None:
+                logger.info(f"[TRON] Call {call_id}: flow used {flow_runner.llm_turns} LLM call(s), "
+                            f"{flow_runtime.local_routes} branch(es) routed locally")
+            if turn_tracker.prompt_tokens:
+                logger.info(f"[TRON] Call {call_id}: prompt prefix {prefix_hash}, "
+                            f"{sum(turn_tracker.cached_tokens)}/{sum(turn_tracker.prompt_tokens)} prompt tokens from cache")
+            await finalizer.finalize(
+                await transcript.take_pending(),
+                turn_tracker.record(call_id, agent_config),
+            )
+
+        ctx.add_shutdown_callback(_finalize)
+
+        await connect_task
+        agent = _TronAgent()
+        await session.start(agent=agent, room=ctx.room)
+        if flow_runner is not None:
+            flow_runner.bind(session, agent)
+
+        # Don't react to dial tone / ringback before the callee picks up
+        _set_audio_input(session, False)
+
+        if not await _wait_for_answer(ctx, ANSWER_TIMEOUT_SECONDS):
+            logger.info(f"[TRON] Call {call_id} not answered, leaving room {ctx.room.name}")
+            greeting_task.cancel()
+            ctx.shutdown(reason="not answered")
+            return
+
+        finalizer.mark_answered()
+        _set_audio_input(session, True)
+
+        def _on_hangup(p):
+            # Callee hung up: the call ends now, not when the room is torn down
+            if p.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+                finalizer.mark_ended()
+                ctx.shutdown(reason="callee hung up")
+
+        ctx.room.on('participant_disconnected', _on_hangup)
+
+        if flow_runner is not None:
+            # Opening nodes of the flow (greeting/speak clips are cached by now)
+            await greeting_task
+            await flow_runner.run(flow_start_actions)
+        else:
+            # Greet — from the pre-synthesized clips when available
+            greeting_clips = await greeting_task
+            speech = None
+            for (text, _), clip in zip(greeting_parts, greeting_clips):
+                if isinstance(clip, Exception):
+                    logger.warning(f"[TRON] Greeting pre-synthesis failed, speaking live: {clip}")
+                    clip = None
+                # Queued back to back; only the last one is awaited
+                if clip is not None:
+                    speech = session.say(text, audio=clip_frames(clip))
+                else:
+                    speech = session.say(text)
+            if speech is not None:
+                await speech
 
         logger.info(f"[TRON] Voice agent started for call {call_id}, room {ctx.room.name}")
 
@@ -76,78 +331,195 @@ async def build_entrypoint(ctx):
         logger.error(f"[TRON] Voice agent error: {e}", exc_info=True)
 
 
-async def _load_agent_config(agent_id: str) -> dict:
-    """Load agent config from TRON database."""
-    if not agent_id:
-        return {}
-    try:
-        from tron.core.database import get_engine, AgentModel
-        from sqlalchemy.ext.asyncio import AsyncSession
-        from sqlalchemy import select
-
-        engine = get_engine()
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(AgentModel).where(AgentModel.id == agent_id))
-            agent = result.scalar_one_or_none()
-            if agent:
-                return {
-                    'persona': agent.persona,
-                    'voice_id': agent.voice_id,
-                    'voice_speed': agent.voice_speed,
-                    'language': agent.language,
-                    'llm_provider': agent.llm_provider,
-                    'llm_model': agent.llm_model,
-                    'llm_endpoint': agent.llm_endpoint,
-                    'llm_api_key': agent.llm_api_key,
-                    'llm_temperature': agent.llm_temperature,
-                    'greeting_text': agent.greeting_text,
-                    'max_call_duration': agent.max_call_duration,
-                }
-    except Exception as e:
-        logger.warning(f"Could not load agent config: {e}")
+def _parse_job_metadata(ctx) -> dict:
+    """Read call metadata from the agent dispatch, falling back to room metadata."""
+    for raw in (getattr(getattr(ctx, 'job', None), 'metadata', None), ctx.room.metadata):
+        if not raw:
+            continue
+        try:
+            data = json.loads(raw)
+            if isinstance(data, dict) and data:
+                return data
+        except Exception:
+            pass
     return {}
 
 
-def _build_llm(config: dict):
-    """Build LLM from agent config."""
+def _llm_conn_options(agent):
+    """The session's LLM retry/timeout options, if the agent is attached."""
+    try:
+        return agent.session.conn_options.llm_conn_options
+    except Exception:
+        return None
+
+
+def _tts_conn_options(agent):
+    """The session's TTS retry/timeout options, if the agent is attached."""
+    try:
+        return agent.session.conn_options.tts_conn_options
+    except Exception:
+        return None
+
+
+def _set_audio_input(session, enabled: bool):
+    """Toggle the session's microphone input when the SDK supports it."""
+    try:
+        session.input.set_audio_enabled(enabled)
+    except Exception:
+        pass
+
+
+async def _wait_for_answer(ctx, timeout: float) -> bool:
+    """
+    Wait until the SIP callee answers (``sip.callStatus`` becomes ``active``).
+    Non-SIP participants (web test calls) count as answered as soon as they join.
+    Returns False on timeout or if the callee leaves while ringing.
+    """
+    from livekit import rtc
+
+    try:
+        participant = await asyncio.wait_for(ctx.wait_for_participant(), timeout)
+    except asyncio.TimeoutError:
+        return False
+
+    if participant.kind != rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+        return True
+    if participant.attributes.get('sip.callStatus') == 'active':
+        return True
+
+    answered = asyncio.Event()
+    outcome = {'answered': False}
+
+    def _on_attributes(changed: dict, p):
+        if p.identity == participant.identity and p.attributes.get('sip.callStatus') == 'active':
+            outcome['answered'] = True
+            answered.set()
+
+    def _on_disconnect(p):
+        if p.identity == participant.identity:
+            answered.set()
+
+    ctx.room.on('participant_attributes_changed', _on_attributes)
+    ctx.room.on('participant_disconnected', _on_disconnect)
+    try:
+        await asyncio.wait_for(answered.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        ctx.room.off('participant_attributes_changed', _on_attributes)
+        ctx.room.off('participant_disconnected', _on_disconnect)
+    return outcome['answered']
+
+
+async def _load_agent_config(agent_id: str, min_version: Optional[str] = None) -> dict:
+    """Load agent config through the worker-side cache (DB only on miss/stale)."""
+    from tron.voice.agent_cache import agent_config_cache
+    return await agent_config_cache.load(agent_id, min_version)
+
+
+_cache_ready = False
+_replay_started = False
+
+
+def _ensure_agent_cache():
+    """Start cache pre-population once per worker process."""
+    global _cache_ready
+    if _cache_ready:
+        return
+    _cache_ready = True
+    from tron.voice.agent_cache import agent_config_cache
+    asyncio.create_task(agent_config_cache.prepopulate())
+
+
+def _ensure_finalize_replay():
+    """Replay spooled / crashed-worker finalize records once per worker process."""
+    global _replay_started
+    if _replay_started:
+        return
+    _replay_started = True
+    asyncio.create_task(replay_loop())
+
+
+def _llm_key(config: dict, base_url: Optional[str] = None, model: Optional[str] = None) -> tuple:
+    return (
+        config.get('llm_provider', 'ollama'),
+        model or config.get('llm_model', 'qwen2.5:32b'),
+        base_url or '',
+        config.get('llm_temperature', 0.7),
+    )
+
+
+def _llm_pool_key(config: dict) -> tuple:
+    return (config.get('llm_provider', 'ollama'), tuple(_llm_base_urls(config)), _llm_api_key(config))
+
+
+def _stt_key(config: dict) -> tuple:
+    return ('sarvam', config.get('language', 'unknown'))
+
+
+def _tts_key(config: dict) -> tuple:
+    return (
+        config.get('voice_model') or 'bulbul:v3-beta',
+        config.get('voice_id', 'shreya'),
+        config.get('language', 'hi-IN'),
+        config.get('voice_speed', 1.0),
+    )
+
+
+def _llm_base_urls(config: dict) -> List[Optional[str]]:
+    """
+    OpenAI-compatible base URLs serving the agent's provider (None = api.openai.com).
+    ``custom`` agents may list several comma-separated endpoints; Ollama uses
+    ``TRON_OLLAMA_ENDPOINTS`` (one URL per GPU box) or ``OLLAMA_BASE_URL``.
+    """
+    provider = config.get('llm_provider', 'ollama')
+    if provider == 'openai':
+        return [None]
+    if provider == 'custom':
+        urls = _split_urls(config.get('llm_endpoint') or '')
+        return urls or ['']
+    return [u if u.endswith('/v1') else u + '/v1' for u in ollama_urls()]
+
+
+def _split_urls(value: str) -> List[str]:
+    return [u.strip().rstrip('/') for u in value.split(',') if u.strip()]
+
+
+def _llm_api_key(config: dict) -> str:
     provider = config.get('llm_provider', 'ollama')
-    model = config.get('llm_model', 'qwen2.5:32b')
+    if provider == 'openai':
+        return config.get('llm_api_key') or os.getenv('OPENAI_API_KEY', '')
+    if provider == 'custom':
+        return config.get('llm_api_key', 'none')
+    # Ollama, and the default for unknown providers
+    return 'ollama'
+
+
+def _build_llm(config: dict, registry=None, base_url: Optional[str] = None, model: Optional[str] = None):
+    """
+    Build LLM from agent config, on the registry's pooled client when given.
+    ``base_url`` / ``model`` pick one pool endpoint and override the agent's model.
+    """
+    from livekit.plugins import openai as lk_openai
+
+    # Unknown providers still honour the configured model (on Ollama)
+    model = model or config.get('llm_model', 'qwen2.5:32b')
     temp = config.get('llm_temperature', 0.7)
+    api_key = _llm_api_key(config)
+    if base_url is None:
+        base_url = _llm_base_urls(config)[0]
 
-    if provider == 'ollama':
-        from livekit.plugins import openai as lk_openai
-        return lk_openai.LLM(
-            model=model,
-            base_url=os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434') + '/v1',
-            api_key='ollama',
-            temperature=temp,
-        )
-    elif provider == 'openai':
-        from livekit.plugins import openai as lk_openai
-        return lk_openai.LLM(
-            model=model,
-            api_key=config.get('llm_api_key') or os.getenv('OPENAI_API_KEY', ''),
-            temperature=temp,
-        )
-    elif provider == 'custom':
-        from livekit.plugins import openai as lk_openai
-        return lk_openai.LLM(
-            model=model,
-            base_url=config.get('llm_endpoint', ''),
-            api_key=config.get('llm_api_key', 'none'),
-            temperature=temp,
-        )
+    kwargs = {'model': model, 'temperature': temp}
+    if registry is not None:
+        kwargs['client'] = registry.openai_client(base_url, api_key)
     else:
-        # Default to Ollama
-        from livekit.plugins import openai as lk_openai
-        return lk_openai.LLM(
-            model='qwen2.5:32b',
-            base_url='http://localhost:11434/v1',
-            api_key='ollama',
-        )
+        kwargs['api_key'] = api_key
+        if base_url:
+            kwargs['base_url'] = base_url
+    return lk_openai.LLM(**kwargs)
 
 
-def _build_stt(config: dict):
+def _build_stt(config: dict, http_session=None):
     """Build STT — Sarvam Saaras v3."""
     try:
         from livekit.plugins import sarvam
@@ -156,6 +528,7 @@ def _build_stt(config: dict):
             model='saaras:v3',
             mode='transcribe',
             flush_signal=True,
+            http_session=http_session,
         )
     except ImportError:
         # Fallback to Deepgram if sarvam plugin not available
@@ -167,14 +540,16 @@ def _build_stt(config: dict):
     return None
 
 
-def _build_tts(config: dict):
-    """Build TTS — Sarvam Bulbul v3-beta."""
+def _build_tts(config: dict, http_session=None):
+    """Build TTS — Sarvam Bulbul (v3-beta unless the agent picks another model)."""
     try:
         from livekit.plugins import sarvam
         return sarvam.TTS(
             target_language_code=config.get('language', 'hi-IN'),
-            model='bulbul:v3-beta',
+            model=config.get('voice_model') or 'bulbul:v3-beta',
             speaker=config.get('voice_id', 'shreya'),
+            pace=config.get('voice_speed', 1.0),
+            http_session=http_session,
         )
     except ImportError:
         try:
@@ -185,48 +560,26 @@ def _build_tts(config: dict):
     return None
 
 
-def _build_vad():
-    """Build Voice Activity Detection."""
-    try:
-        from livekit.plugins import silero
-        return silero.VAD.load()
-    except Exception:
-        return None
-
-
-def _build_system_prompt(config: dict) -> str:
-    """Combine persona with guardrails and flow instructions."""
-    parts = []
-    persona = config.get('persona', '')
-    if persona:
-        parts.append(persona)
-    else:
-        parts.append("You are a helpful AI assistant making an outbound call. Be concise and natural. Speak in the same language the user prefers.")
-
-    language = config.get('language', 'hi-IN')
-    if language.startswith('hi'):
-        parts.append("\nRespond in Hindi by default unless the user speaks in another language. Keep responses short (1-2 sentences max per turn).")
-    else:
-        parts.append("\nKeep responses short and conversational (1-2 sentences max per turn).")
+# Static prompt prefix hash → calls started with it in this worker
+_prompt_prefixes: Dict[str, int] = {}
 
-    # Guardrails
-    guardrails = config.get('guardrails', {})
-    if isinstance(guardrails, dict):
-        forbidden = guardrails.get('forbidden_topics', [])
-        if forbidden:
-            parts.append(f"\nNever discuss: {', '.join(forbidden)}.")
-        disclosures = guardrails.get('required_disclosures', '')
-        if disclosures:
-            parts.append(f"\nRequired disclosure: {disclosures}")
 
-    return '\n'.join(parts)
+def _track_prompt_prefix(static_prompt: str) -> str:
+    """Count calls per static prompt prefix; a new hash per call means the prefix isn't stable."""
+    prefix_hash = prompt_hash(static_prompt)
+    _prompt_prefixes[prefix_hash] = _prompt_prefixes.get(prefix_hash, 0) + 1
+    logger.info(
+        f"Prompt prefix {prefix_hash} ({len(static_prompt)} chars, "
+        f"call #{_prompt_prefixes[prefix_hash]} on this prefix in this worker)"
+    )
+    return prefix_hash
 
 
 def run_worker():
     """Start the LiveKit Agents worker."""
     try:
         from livekit.agents import WorkerOptions, cli
-        cli.run_app(WorkerOptions(entrypoint_fnc=build_entrypoint))
+        cli.run_app(WorkerOptions(entrypoint_fnc=build_entrypoint, prewarm_fnc=prewarm))
     except ImportError:
         logger.error("livekit-agents not installed. Run: pip install livekit-agents")
 
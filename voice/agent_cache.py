@@ -0,0 +1,150 @@
+"""
+Worker-side agent config cache.
+
+Call setup used to open a DB session per call to re-read the same AgentModel
+row. The cache keeps one config dict per ``agent_id`` tagged with the row's
+``updated_at`` (its version). Dispatch metadata carries the version read
+just before dialling, so a cached entry at that version or newer is served
+without any DB I/O; anything older is reloaded. Without a version in the
+metadata the current one is read first (one primary-key read), as
+``core.flow_cache`` does for flows. The API runs in another process, so the
+version is the only change signal.
+
+Entries are pre-populated for agents referenced by running campaigns.
+"""
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger("tron.voice.agent_cache")
+
+
+def agent_version(agent) -> str:
+    """Version tag for an AgentModel row — its last-modified timestamp."""
+    return agent.updated_at.isoformat() if agent.updated_at else ""
+
+
+def agent_to_config(agent) -> Dict[str, Any]:
+    """Flatten an AgentModel row into the dict the voice pipeline consumes."""
+    return {
+        'agent_id': agent.id,
+        'agent_version': agent_version(agent),
+        'name': agent.name,
+        'persona': agent.persona,
+        'voice_id': agent.voice_id,
+        'voice_model': agent.voice_model,
+        'voice_speed': agent.voice_speed,
+        'language': agent.language,
+        'llm_provider': agent.llm_provider,
+        'llm_model': agent.llm_model,
+        'llm_endpoint': agent.llm_endpoint,
+        'llm_api_key': agent.llm_api_key,
+        'llm_temperature': agent.llm_temperature,
+        'tone': agent.tone,
+        'greeting_text': agent.greeting_text,
+        'max_call_duration': agent.max_call_duration,
+        'flow_id': agent.flow_id,
+        'tools_enabled': agent.tools_enabled or [],
+        'guardrails': agent.guardrails or {},
+    }
+
+
+class AgentConfigCache:
+    """LRU of agent configs keyed by agent_id and validated by version."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, agent_id: str, min_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached config if it is at least ``min_version``."""
+        entry = self._entries.get(agent_id)
+        if entry is None:
+            return None
+        version, config = entry
+        # ISO timestamps compare correctly as strings
+        if min_version and version < min_version:
+            return None
+        self._entries.move_to_end(agent_id)
+        return config
+
+    def put(self, agent_id: str, config: Dict[str, Any]):
+        self._entries[agent_id] = (config.get('agent_version', ''), config)
+        self._entries.move_to_end(agent_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        """Drop one agent, or everything when ``agent_id`` is None."""
+        if agent_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(agent_id, None)
+
+    async def load(self, agent_id: str, min_version: Optional[str] = None) -> Dict[str, Any]:
+        """Return the agent config, reading the DB only on a miss or stale entry."""
+        if not agent_id:
+            return {}
+        try:
+            from tron.core.database import AgentModel, get_session_factory
+            from sqlalchemy import select
+
+            factory = await get_session_factory()
+            if not min_version and agent_id in self._entries:
+                # No version from dispatch: check the current one before serving
+                async with factory() as session:
+                    result = await session.execute(select(AgentModel.updated_at).where(AgentModel.id == agent_id))
+                    row = result.first()
+                if row is None:
+                    self.invalidate(agent_id)
+                    return {}
+                min_version = row.updated_at.isoformat() if row.updated_at else None
+            config = self.get(agent_id, min_version)
+            if config is not None:
+                self.hits += 1
+                return config
+
+            self.misses += 1
+            async with factory() as session:
+                result = await session.execute(select(AgentModel).where(AgentModel.id == agent_id))
+                agent = result.scalar_one_or_none()
+            if agent:
+                config = agent_to_config(agent)
+                self.put(agent_id, config)
+                return config
+        except Exception as e:
+            logger.warning(f"Could not load agent config: {e}")
+        return {}
+
+    async def prepopulate(self) -> int:
+        """Load configs for every agent referenced by a running campaign."""
+        try:
+            from tron.core.database import AgentModel, CampaignModel, get_session_factory
+            from sqlalchemy import select
+
+            factory = await get_session_factory()
+            async with factory() as session:
+                result = await session.execute(
+                    select(AgentModel).where(
+                        AgentModel.id.in_(
+                            select(CampaignModel.agent_id).where(CampaignModel.status == "running")
+                        )
+                    )
+                )
+                agents = result.scalars().all()
+            for agent in agents:
+                self.put(agent.id, agent_to_config(agent))
+            logger.info(f"Agent config cache pre-populated with {len(agents)} agent(s)")
+            return len(agents)
+        except Exception as e:
+            logger.warning(f"Could not pre-populate agent config cache: {e}")
+            return 0
+
+
+# Process-wide cache used by the voice worker
+agent_config_cache = AgentConfigCache()
@@ -0,0 +1,153 @@
+"""
+Per-process registry of voice pipeline components.
+
+STT/TTS/LLM plugin instances are stateless between calls (each call opens its
+own streams), so a worker process keeps one instance per
+(provider, model, voice, ...) key and hands it to every call that needs it.
+HTTP connections to Sarvam and the LLM endpoints come from pooled clients
+owned by the registry, so calls reuse warm keep-alive connections instead of
+paying DNS + TLS setup on the first turn.
+"""
+import asyncio
+import logging
+from typing import Optional, Dict, Any, Callable, Hashable, Iterable
+
+logger = logging.getLogger("tron.voice.components")
+
+# Keep-alive pool sizing for the shared HTTP clients
+HTTP_POOL_LIMIT = 100
+HTTP_KEEPALIVE_SECONDS = 120
+
+
+class ComponentRegistry:
+    """Shared component instances and HTTP pools for one worker process."""
+
+    def __init__(self):
+        self._components: Dict[Hashable, Any] = {}
+        self._openai_clients: Dict[Hashable, Any] = {}
+        self._http_session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.vad = None
+
+    def _bind_loop(self):
+        """Connections belong to an event loop; start fresh if the loop changed."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if loop is not self._loop:
+            self._components.clear()
+            self._openai_clients.clear()
+            self._http_session = None
+            self._loop = loop
+
+    def get(self, kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the shared ``kind`` component for ``key``, building it once."""
+        self._bind_loop()
+        full_key = (kind, key)
+        component = self._components.get(full_key)
+        if component is None:
+            component = factory()
+            if component is not None:
+                self._components[full_key] = component
+                logger.info(f"Built shared {kind} component for {key}")
+        return component
+
+    def http_session(self):
+        """Shared aiohttp session (used by the Sarvam STT/TTS plugins)."""
+        self._bind_loop()
+        if self._http_session is None or self._http_session.closed:
+            import aiohttp
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=HTTP_POOL_LIMIT,
+                    keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+                ),
+            )
+        return self._http_session
+
+    def openai_client(self, base_url: Optional[str], api_key: str):
+        """Shared OpenAI-compatible client per (base_url, api_key)."""
+        self._bind_loop()
+        key = (base_url, api_key)
+        client = self._openai_clients.get(key)
+        if client is None:
+            import httpx
+            import openai
+            client = openai.AsyncClient(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=HTTP_POOL_LIMIT,
+                        max_keepalive_connections=HTTP_POOL_LIMIT,
+                        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                    ),
+                    timeout=httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0),
+                ),
+            )
+            self._openai_clients[key] = client
+        return client
+
+    async def warm(self, urls: Iterable[str] = ()):
+        """
+        Open keep-alive connections ahead of the first turn: ``urls`` on the
+        shared aiohttp session, and every pooled LLM client via ``/models``.
+        """
+        session = self.http_session()
+
+        async def _touch(url: str):
+            try:
+                async with session.get(url) as resp:
+                    await resp.read()
+            except Exception as e:
+                logger.debug(f"Connection warm-up to {url} failed: {e}")
+
+        async def _touch_llm(client):
+            try:
+                await client.models.list()
+            except Exception as e:
+                logger.debug(f"LLM connection warm-up failed: {e}")
+
+        await asyncio.gather(
+            *(_touch(u) for u in urls if u),
+            *(_touch_llm(c) for c in list(self._openai_clients.values())),
+        )
+
+    async def aclose(self):
+        for client in self._openai_clients.values():
+            try:
+                await client.close()
+            except Exception:
+                pass
+        self._openai_clients.clear()
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        self._components.clear()
+
+
+# Fallback registry when the worker runs without a prewarm stage
+_default_registry = ComponentRegistry()
+
+
+def prewarm(proc):
+    """
+    LiveKit ``prewarm_fnc`` — runs once per job process before any call.
+    Loads the Silero VAD model and installs the component registry.
+    """
+    registry = ComponentRegistry()
+    try:
+        from livekit.plugins import silero
+        registry.vad = silero.VAD.load()
+    except Exception as e:
+        logger.warning(f"Silero VAD not available: {e}")
+    proc.userdata["components"] = registry
+    logger.info("Worker process prewarmed")
+
+
+def get_registry(ctx=None) -> ComponentRegistry:
+    """Registry for the current job process."""
+    proc = getattr(ctx, "proc", None)
+    userdata = getattr(proc, "userdata", None) or {}
+    return userdata.get("components") or _default_registry
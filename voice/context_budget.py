@@ -0,0 +1,139 @@
+"""
+Token-budgeted chat history for long calls.
+
+The ``AgentSession`` chat context grows for the whole call, so prompt size
+and LLM prefill time grow every turn. Before each generation ``compact``
+keeps the system instructions and the most recent turns verbatim and folds
+older turns into one short extractive summary message, under a per-model
+token budget. The cut point moves in steps of ``keep_turns`` turns, so
+consecutive turns send the same prefix and server-side prompt caches keep
+hitting.
+
+Only the copy of the context sent to the LLM is compacted; the agent's full
+history (and the transcript) is untouched.
+"""
+import logging
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger("tron.voice.context_budget")
+
+# Share of the budget the summary of older turns may take
+SUMMARY_SHARE = 0.25
+SUMMARY_LINE_CHARS = 100
+# Per-item overhead of the chat template (role markers etc.)
+ITEM_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count without a tokenizer: ~4 bytes per token. UTF-8 makes
+    Devanagari 3 bytes/char, which lands close to real Hindi token counts.
+    """
+    return (len((text or "").encode("utf-8")) + 3) // 4
+
+
+def _item_text(item) -> str:
+    kind = getattr(item, "type", "message")
+    if kind == "message":
+        return getattr(item, "text_content", "") or ""
+    if kind == "function_call":
+        return f"{getattr(item, 'name', '')}({getattr(item, 'arguments', '')})"
+    if kind == "function_call_output":
+        return str(getattr(item, "output", ""))
+    return ""
+
+
+def item_tokens(item) -> int:
+    return estimate_tokens(_item_text(item)) + ITEM_OVERHEAD_TOKENS
+
+
+def _is_instruction(item) -> bool:
+    return getattr(item, "type", "message") == "message" and getattr(item, "role", None) in ("system", "developer")
+
+
+def budget_for(config: Dict[str, Any], model: Optional[str] = None) -> Tuple[int, int]:
+    """(max_tokens, keep_turns) for an agent: ``guardrails["context_budget"]`` > per-model setting > default."""
+    from tron.core.config import settings
+
+    model = model or config.get('llm_model', '')
+    max_tokens = settings.llm_context_budgets.get(model, settings.llm_context_budget)
+    keep_turns = settings.llm_context_keep_turns
+    guardrails = config.get('guardrails') or {}
+    override = guardrails.get('context_budget') if isinstance(guardrails, dict) else None
+    if isinstance(override, dict):
+        max_tokens = int(override.get('max_tokens', max_tokens))
+        keep_turns = int(override.get('keep_turns', keep_turns))
+    return max(200, max_tokens), max(1, keep_turns)
+
+
+def _summary_text(items: List[Any], max_tokens: int) -> str:
+    lines = []
+    for item in items:
+        role = getattr(item, "role", None)
+        if getattr(item, "type", "message") != "message" or role not in ("user", "assistant"):
+            continue
+        text = " ".join(_item_text(item).split())
+        if not text:
+            continue
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS].rsplit(" ", 1)[0] + "…"
+        lines.append(f"{'Caller' if role == 'user' else 'You'}: {text}")
+    # Over budget: the most recent lines matter most
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    if not lines:
+        return ""
+    return "Earlier in this call (summary):\n" + "\n".join(lines)
+
+
+def compact(items: List[Any], max_tokens: int, keep_turns: int) -> Tuple[List[Any], Optional[str], int]:
+    """
+    Fit ``items`` into ``max_tokens``. Returns (kept items, summary text or
+    None, estimated prompt tokens). ``items`` is not modified.
+    """
+    total = sum(item_tokens(i) for i in items)
+    if total <= max_tokens:
+        return list(items), None, total
+
+    instructions = [i for i in items if _is_instruction(i)]
+    conversation = [i for i in items if not _is_instruction(i)]
+
+    # Turns start at each caller message; cutting there never orphans a tool output
+    starts = [idx for idx, i in enumerate(conversation) if getattr(i, "role", None) == "user"]
+    if len(starts) <= keep_turns:
+        return list(items), None, total
+
+    # Move the cut in whole blocks of keep_turns turns so the prefix stays stable
+    droppable = len(starts) - keep_turns
+    cut_turn = (droppable // keep_turns) * keep_turns
+    fixed = sum(item_tokens(i) for i in instructions)
+    while True:
+        kept = conversation[starts[cut_turn]:]
+        kept_tokens = sum(item_tokens(i) for i in kept)
+        if fixed + kept_tokens <= max_tokens or cut_turn >= len(starts) - 1:
+            break
+        cut_turn += 1
+
+    summary = _summary_text(
+        conversation[:starts[cut_turn]],
+        min(int(max_tokens * SUMMARY_SHARE), max(0, max_tokens - fixed - kept_tokens)),
+    )
+    tokens = fixed + kept_tokens + (estimate_tokens(summary) + ITEM_OVERHEAD_TOKENS if summary else 0)
+    return instructions + kept, summary or None, tokens
+
+
+def compact_chat_ctx(chat_ctx, config: Dict[str, Any], model: Optional[str] = None):
+    """Budgeted copy of a LiveKit ``ChatContext``; returns (ctx, estimated tokens)."""
+    max_tokens, keep_turns = budget_for(config, model)
+    items, summary, tokens = compact(chat_ctx.items, max_tokens, keep_turns)
+    if len(items) == len(chat_ctx.items) and summary is None:
+        return chat_ctx, tokens
+    compacted = chat_ctx.copy()
+    compacted.items = items
+    if summary:
+        from livekit.agents.llm import ChatMessage
+
+        # Right after the instructions, before the verbatim turns
+        position = sum(1 for i in items if _is_instruction(i))
+        compacted.items.insert(position, ChatMessage(role="system", content=[summary]))
+    return compacted, tokens
@@ -0,0 +1,99 @@
+"""
+Filler / backchannel audio while the LLM is thinking.
+
+With a large model the first token can take over a second, and callers fill
+the silence with "hello?". When a reply's first LLM token hasn't arrived
+``after`` seconds into the turn, ``speak_with_filler`` plays a short cached
+clip ("haan ji", "ek second") and then the real reply. Fillers never enter
+the chat context, and scripted ``say(text)`` replies — whose text is there
+immediately — never trigger one.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Optional, Dict, Any, List, AsyncIterable, AsyncIterator, Callable
+
+from tron.core.tts_cache import CachedAudio, filler_texts
+from tron.voice.playback import cached_clip, clip_frames
+
+logger = logging.getLogger("tron.voice.fillers")
+
+
+class FillerSet:
+    """An agent's filler clips, rotated so the same one isn't heard twice in a row."""
+
+    def __init__(self, tts, config: Dict[str, Any]):
+        self.tts = tts
+        self.config = config
+        self.texts: List[str] = filler_texts(config)
+        self._clips: List[CachedAudio] = []
+        self._cycle = None
+        self.played = 0
+
+    async def prepare(self):
+        """Load (or synthesize once) every filler clip; missing ones are skipped."""
+        for text in self.texts:
+            try:
+                clip = await cached_clip(self.tts, text, self.config)
+            except Exception as e:
+                logger.debug(f"Filler clip {text!r} unavailable: {e}")
+                continue
+            if clip is not None:
+                self._clips.append(clip)
+        self._cycle = itertools.cycle(self._clips) if self._clips else None
+
+    def pick(self) -> Optional[CachedAudio]:
+        if self._cycle is None:
+            return None
+        self.played += 1
+        return next(self._cycle)
+
+
+async def speak_with_filler(
+    text: AsyncIterable[str],
+    synthesize: Callable[[AsyncIterable[str]], AsyncIterable],
+    fillers: Optional[FillerSet],
+    after: float,
+) -> AsyncIterator:
+    """
+    Yield audio frames for the LLM ``text`` stream via ``synthesize``,
+    preceded by a filler clip if the first token takes longer than ``after``
+    seconds. ``synthesize`` does its own segmenting, so the timer measures
+    the model, not the segmenter waiting for a full clause.
+    """
+    if fillers is None or after <= 0:
+        async for frame in synthesize(text):
+            yield frame
+        return
+
+    it = text.__aiter__()
+
+    async def _until_text() -> List[str]:
+        # Empty / whitespace-only deltas don't count as the model having started
+        head = []
+        async for delta in it:
+            head.append(delta)
+            if delta.strip():
+                break
+        return head
+
+    first = asyncio.ensure_future(_until_text())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=after)
+        if not done:
+            clip = fillers.pick()
+            if clip is not None:
+                async for frame in clip_frames(clip):
+                    yield frame
+
+        async def _rest():
+            for delta in await first:
+                yield delta
+            async for delta in it:
+                yield delta
+
+        async for frame in synthesize(_rest()):
+            yield frame
+    finally:
+        if not first.done():
+            first.cancel()
@@ -0,0 +1,356 @@
+"""
+End-of-call finalizer for the voice worker.
+
+Everything a call produced — end time, duration, talk time, final status,
+the outcome tagged by ``end_call``, the last unflushed transcript segments
+and the per-turn latency row — is written in ONE transaction when the job
+shuts down, together with the campaign's ``completed_calls`` /
+``failed_calls`` counter.
+
+If the database is unavailable (or busy past its timeout) the payload is
+spooled as a JSON file under ``settings.finalize_spool_dir`` and replayed by
+the next worker process. While a call is live the worker keeps an "open call"
+marker in the spool directory and touches it every few seconds; a marker whose
+heartbeat went stale belongs to a worker that crashed, and the call is
+finalized from the marker on the next replay pass.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import select, update, func
+
+logger = logging.getLogger("tron.voice.finalizer")
+
+HEARTBEAT_SECONDS = 5.0
+# A marker this old without a heartbeat belongs to a dead worker
+STALE_AFTER_SECONDS = 6 * HEARTBEAT_SECONDS
+REPLAY_INTERVAL_SECONDS = 30.0
+
+
+def _spool_dir() -> str:
+    from tron.core.config import settings
+    return settings.finalize_spool_dir
+
+
+def _ts(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class CallFinalizer:
+    """Collects the end state of one call and writes it when the job ends."""
+
+    def __init__(self, call_id: str, agent_id: str = ""):
+        self.call_id = call_id
+        self.agent_id = agent_id
+        self.dispatched_at = datetime.utcnow()
+        self.answered_at: Optional[datetime] = None
+        self.ended_at: Optional[datetime] = None
+        self.outcome: Optional[str] = None
+        self.extracted_data: Dict[str, Any] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._done = False
+
+    # ── Live call state ──
+
+    @property
+    def _marker_path(self) -> str:
+        return os.path.join(_spool_dir(), "open", f"{self.call_id}.json")
+
+    def open(self):
+        """Drop the open-call marker and start its heartbeat."""
+        if not self.call_id:
+            return
+        self._save_marker()
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    def _save_marker(self):
+        try:
+            _write_json(self._marker_path, {
+                "call_id": self.call_id,
+                "agent_id": self.agent_id,
+                "pid": os.getpid(),
+                "dispatched_at": _ts(self.dispatched_at),
+                "answered_at": _ts(self.answered_at),
+                "outcome": self.outcome,
+                "extracted_data": self.extracted_data,
+            })
+        except Exception as e:
+            logger.warning(f"Could not write open-call marker for {self.call_id}: {e}")
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                os.utime(self._marker_path)
+            except OSError:
+                self._save_marker()
+
+    def mark_answered(self):
+        self.answered_at = datetime.utcnow()
+        if self.call_id:
+            self._save_marker()
+
+    def mark_ended(self):
+        """Pin the end time (first call wins, e.g. the moment the callee hung up)."""
+        if self.ended_at is None:
+            self.ended_at = datetime.utcnow()
+
+    def set_outcome(self, outcome: str, data: Optional[Dict[str, Any]] = None):
+        self.outcome = (outcome or "").strip()[:50] or None
+        if data:
+            self.extracted_data.update(data)
+        if self.call_id:
+            self._save_marker()
+
+    # ── Shutdown ──
+
+    def payload(self, segments: List[Dict[str, Any]], latency: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        self.mark_ended()
+        return {
+            "call_id": self.call_id,
+            "dispatched_at": _ts(self.dispatched_at),
+            "answered_at": _ts(self.answered_at),
+            "ended_at": _ts(self.ended_at),
+            "outcome": self.outcome,
+            "extracted_data": self.extracted_data,
+            "segments": [
+                {**seg, "created_at": _ts(seg.get("created_at"))} for seg in segments
+            ],
+            "latency": latency if latency and latency.get("turns") else None,
+        }
+
+    async def finalize(self, segments: List[Dict[str, Any]], latency: Optional[Dict[str, Any]] = None):
+        """Write the call's end state once; spool it if the database write fails."""
+        if self._done or not self.call_id:
+            return
+        self._done = True
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+
+        payload = self.payload(segments, latency)
+        try:
+            await commit_payload(payload)
+        except Exception as e:
+            logger.warning(f"Finalize for call {self.call_id} failed, spooling: {e}")
+            try:
+                _write_json(os.path.join(_spool_dir(), "pending", f"{self.call_id}.json"), payload)
+            except Exception as spool_error:
+                # Keep the marker: crash recovery will still close the call
+                logger.error(f"Could not spool call {self.call_id}: {spool_error}")
+                return
+        _remove(self._marker_path)
+
+
+# ─────────────── The single write ───────────────
+
+async def commit_payload(payload: Dict[str, Any], recovered: bool = False):
+    """
+    Apply one call's end state in a single transaction. A call that is
+    already closed (``ended_at`` set, or marked failed when the dial failed
+    while the worker was being dispatched) keeps its status and isn't counted
+    on the campaign again; only the transcript, outcome and latency are added.
+    ``recovered`` payloads (rebuilt from a crashed worker's marker) carry
+    none of those, so they leave such calls untouched.
+    """
+    from tron.core.database import (
+        CallModel, CampaignModel, CallLatencyModel, TranscriptSegmentModel, get_session_factory,
+    )
+    from tron.core.transcripts import append_segments
+
+    call_id = payload["call_id"]
+    answered_at = _dt(payload.get("answered_at"))
+    ended_at = _dt(payload.get("ended_at")) or datetime.utcnow()
+    status = "completed" if answered_at else "no_answer"
+
+    factory = await get_session_factory()
+    async with factory() as db:
+        row = (await db.execute(
+            select(CallModel.campaign_id, CallModel.started_at, CallModel.ended_at, CallModel.status)
+            .where(CallModel.id == call_id)
+        )).one_or_none()
+        if row is None:
+            logger.warning(f"Finalize: call {call_id} not found, dropping")
+            return
+        campaign_id, started_at, already_ended, current_status = row
+        # Closed by the campaign runner / API (dial failed, hung up) or by an
+        # earlier replay of this payload
+        closed = already_ended is not None or current_status in ("failed", "cancelled")
+        if closed and recovered:
+            return
+
+        values = {}
+        if closed:
+            status = current_status
+        else:
+            started_at = started_at or _dt(payload.get("dispatched_at")) or ended_at
+            values = {
+                "status": status,
+                "ended_at": ended_at,
+                "duration_seconds": max(0, int((ended_at - started_at).total_seconds())),
+                "talk_time_seconds": max(0, int((ended_at - answered_at).total_seconds())) if answered_at else 0,
+            }
+        if answered_at:
+            values["answered_at"] = answered_at
+        if payload.get("outcome"):
+            values["outcome"] = payload["outcome"]
+        if payload.get("extracted_data"):
+            values["extracted_data"] = payload["extracted_data"]
+        if values:
+            await db.execute(update(CallModel).where(CallModel.id == call_id).values(**values))
+
+        segments = payload.get("segments") or []
+        if segments:
+            # Skip anything the periodic flush already wrote
+            last_seq = (await db.execute(
+                select(func.max(TranscriptSegmentModel.seq)).where(TranscriptSegmentModel.call_id == call_id)
+            )).scalar()
+            last_seq = -1 if last_seq is None else last_seq
+            await append_segments(db, [
+                {**seg, "created_at": _dt(seg.get("created_at"))}
+                for seg in segments if seg["seq"] > last_seq
+            ])
+
+        if payload.get("latency"):
+            await db.merge(CallLatencyModel(**payload["latency"]))
+
+        if campaign_id and not closed:
+            counter = CampaignModel.completed_calls if status == "completed" else CampaignModel.failed_calls
+            await db.execute(
+                update(CampaignModel).where(CampaignModel.id == campaign_id)
+                .values({counter.key: counter + 1})
+            )
+
+        await db.commit()
+    logger.info(f"Finalized call {call_id}: {status}, outcome={payload.get('outcome')}")
+
+
+# ─────────────── Spool replay / crash recovery ───────────────
+
+def _claim(path: str) -> Optional[str]:
+    """Rename a spool file so only one worker process replays it."""
+    claimed = f"{path}.{os.getpid()}.claim"
+    try:
+        os.rename(path, claimed)
+    except OSError:
+        return None
+    return claimed
+
+
+def _release(claimed: str, path: str):
+    try:
+        os.rename(claimed, path)
+    except OSError:
+        pass
+
+
+def _orphaned_markers() -> List[str]:
+    directory = os.path.join(_spool_dir(), "open")
+    if not os.path.isdir(directory):
+        return []
+    now = time.time()
+    out = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > STALE_AFTER_SECONDS:
+                out.append(path)
+        except OSError:
+            pass
+    return out
+
+
+def _payload_from_marker(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        marker = json.load(f)
+    # Last heartbeat is the best guess for when the call actually ended
+    ended_at = datetime.utcfromtimestamp(os.path.getmtime(path))
+    return {
+        "call_id": marker["call_id"],
+        "dispatched_at": marker.get("dispatched_at"),
+        "answered_at": marker.get("answered_at"),
+        "ended_at": _ts(ended_at),
+        "outcome": marker.get("outcome"),
+        "extracted_data": marker.get("extracted_data") or {},
+        "segments": [],
+        "latency": None,
+    }
+
+
+async def replay_spool() -> int:
+    """Commit spooled payloads and finalize calls of crashed workers. Returns calls written."""
+    written = 0
+    pending_dir = os.path.join(_spool_dir(), "pending")
+    if os.path.isdir(pending_dir):
+        for name in sorted(os.listdir(pending_dir)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(pending_dir, name)
+            claimed = _claim(path)
+            if claimed is None:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    payload = json.load(f)
+                await commit_payload(payload)
+            except Exception as e:
+                logger.warning(f"Spooled finalize {name} still failing: {e}")
+                _release(claimed, path)
+                return written  # DB still unhealthy: try again next pass
+            _remove(claimed)
+            # The call is closed; its marker (if one survived) is no longer needed
+            _remove(os.path.join(_spool_dir(), "open", name))
+            written += 1
+
+    for path in _orphaned_markers():
+        claimed = _claim(path)
+        if claimed is None:
+            continue
+        try:
+            await commit_payload(_payload_from_marker(claimed), recovered=True)
+        except Exception as e:
+            logger.warning(f"Recovering call from {os.path.basename(path)} failed: {e}")
+            _release(claimed, path)
+            return written
+        _remove(claimed)
+        written += 1
+    if written:
+        logger.info(f"Replayed {written} finalize record(s) from {_spool_dir()}")
+    return written
+
+
+async def replay_loop(interval: float = REPLAY_INTERVAL_SECONDS):
+    """Replay the spool now and then periodically for the life of the worker."""
+    while True:
+        try:
+            await replay_spool()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Finalize replay error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,206 @@
+"""
+Runs a flow canvas inside a live call.
+
+``core.flow_engine.FlowRuntime`` decides what happens next; this module
+carries the actions out on the ``AgentSession``: scripted lines play from the
+TTS cache, ``llm_response`` nodes become a ``generate_reply`` with the node's
+instructions, branch/extract decisions are one short non-streamed LLM
+completion, and ``end_call`` tags the outcome and hangs up after the closing
+line has played.
+"""
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from tron.core.flow_engine import CompiledFlow, FlowRuntime
+from tron.core.tts_cache import voice_params
+from tron.voice.playback import say_cached
+
+logger = logging.getLogger("tron.voice.flow_runner")
+
+WEBHOOK_TIMEOUT_SECONDS = 10
+
+
+async def load_flow(flow_id: Optional[str], version: Optional[int] = None) -> Optional[CompiledFlow]:
+    """
+    The flow at ``version`` (the one the call was dialled with) or its current
+    version, compiled once per version and shared across calls.
+    """
+    if not flow_id:
+        return None
+    try:
+        from tron.core.flow_cache import flow_cache
+
+        flow = await flow_cache.load(flow_id, version=version)
+        if flow is None and version is not None:
+            logger.warning(f"Flow {flow_id} v{version} unavailable, using the current version")
+            flow = await flow_cache.load(flow_id)
+        return flow
+    except Exception as e:
+        logger.warning(f"Could not load flow {flow_id}: {e}")
+        return None
+
+
+def flow_variables(agent_config: Dict[str, Any], job_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Initial ``{{variable}}`` values: contact metadata plus contact/agent names."""
+    variables = dict(job_metadata.get('contact_metadata') or {})
+    variables.setdefault('contact_name', job_metadata.get('contact_name') or '')
+    variables.setdefault('agent_name', agent_config.get('name') or '')
+    variables.setdefault('phone_number', job_metadata.get('phone_number') or '')
+    return variables
+
+
+async def commit_user_turn(agent, text: str, transcript=None):
+    """
+    Record a caller turn the agent answered itself (``StopResponse``): the SDK
+    only adds the user message to the chat context when it generates a reply.
+    """
+    try:
+        chat_ctx = agent.chat_ctx.copy()
+        chat_ctx.add_message(role="user", content=text)
+        await agent.update_chat_ctx(chat_ctx)
+    except Exception as e:
+        logger.debug(f"Could not add user turn to chat context: {e}")
+    if transcript is not None:
+        transcript.add("user", text)
+
+
+class FlowRunner:
+    """Executes ``FlowRuntime`` actions for one call, one batch at a time."""
+
+    def __init__(
+        self,
+        runtime: FlowRuntime,
+        ctx,
+        tts,
+        agent_config: Dict[str, Any],
+        complete: Callable[[str, str], Awaitable[str]],
+        finalizer=None,
+        transcript=None,
+    ):
+        self.runtime = runtime
+        self.ctx = ctx
+        self.tts = tts
+        self.agent_config = agent_config
+        self.complete = complete
+        self.finalizer = finalizer
+        self.transcript = transcript
+        self.session = None
+        self.agent = None
+        self.llm_turns = 0
+        self._lock = asyncio.Lock()
+        self._last_speech = None
+        # Scripted text → TTS cache key, computed once per flow version and voice
+        self._tts_keys = runtime.flow.tts_keys(voice_params(agent_config))
+
+    def bind(self, session, agent):
+        self.session = session
+        self.agent = agent
+
+    async def run(self, actions: List[Dict[str, Any]]):
+        async with self._lock:
+            await self._execute(actions)
+
+    async def on_user_turn(self, text: str):
+        """Record the caller's line in the chat context and advance the flow."""
+        async with self._lock:
+            await self._commit_user_text(text)
+            await self._execute(self.runtime.on_user_turn(text))
+
+    async def _commit_user_text(self, text: str):
+        await commit_user_turn(self.agent, text, self.transcript)
+
+    async def _execute(self, actions: List[Dict[str, Any]]):
+        queue = list(actions)
+        while queue:
+            action = queue.pop(0)
+            kind = action["type"]
+            try:
+                if kind == "say":
+                    await self._say(action)
+                elif kind == "llm":
+                    self.llm_turns += 1
+                    self._last_speech = self.session.generate_reply(instructions=action["instructions"])
+                elif kind == "decide":
+                    self.llm_turns += 1
+                    try:
+                        answer = await self.complete(action["prompt"], action["text"])
+                    except Exception as e:
+                        logger.warning(f"Flow decision at {action['node_id']} failed: {e}")
+                        answer = ""
+                    queue = self.runtime.decide(answer) + queue
+                elif kind == "wait":
+                    await self._wait_for_playout()
+                    await asyncio.sleep(action["seconds"])
+                elif kind == "webhook":
+                    asyncio.create_task(self._webhook(action))
+                elif kind == "transfer":
+                    await self._wait_for_playout()
+                    await self._transfer(action["to"])
+                elif kind == "end":
+                    await self._end(action)
+            except Exception as e:
+                logger.error(f"Flow action {kind} failed: {e}", exc_info=True)
+        if self.finalizer is not None and self.runtime.collected:
+            self.finalizer.extracted_data.update(self.runtime.collected)
+
+    async def _say(self, action: Dict[str, Any], **kwargs):
+        """
+        Speak a say/end action. Templated text comes as sentence runs: slot-free
+        ones play from the TTS cache, per-contact ones are synthesized live.
+        """
+        for text, static in action.get("parts") or [(action["text"], True)]:
+            if static:
+                self._last_speech = await say_cached(
+                    self.session, self.tts, text, self.agent_config,
+                    synthesize=False, key=self._tts_keys.get(text), **kwargs,
+                )
+            else:
+                self._last_speech = self.session.say(text, **kwargs)
+
+    async def _wait_for_playout(self):
+        if self._last_speech is not None:
+            try:
+                await self._last_speech.wait_for_playout()
+            except Exception:
+                pass
+
+    async def _end(self, action: Dict[str, Any]):
+        if self.finalizer is not None:
+            if action.get("outcome"):
+                self.finalizer.set_outcome(action["outcome"], self.runtime.collected)
+            elif self.runtime.collected:
+                self.finalizer.extracted_data.update(self.runtime.collected)
+        if action.get("text"):
+            await self._say(action, allow_interruptions=False)
+        await self._wait_for_playout()
+        self.ctx.delete_room()
+
+    async def _transfer(self, to: str):
+        if self.finalizer is not None:
+            self.finalizer.set_outcome("transferred", self.runtime.collected)
+        from livekit import rtc
+
+        for participant in self.ctx.room.remote_participants.values():
+            if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+                await self.ctx.transfer_sip_participant(participant, to)
+                return
+        logger.warning(f"Flow transfer to {to}: no SIP participant in the room")
+
+    async def _webhook(self, action: Dict[str, Any]):
+        import aiohttp
+
+        if not action.get("url"):
+            return
+        payload = {
+            "call_id": (self.finalizer.call_id if self.finalizer is not None else None),
+            "variables": action.get("variables", {}),
+        }
+        try:
+            timeout = aiohttp.ClientTimeout(total=WEBHOOK_TIMEOUT_SECONDS)
+            async with aiohttp.ClientSession(timeout=timeout) as http:
+                async with http.request(action.get("method", "POST"), action["url"], json=payload) as resp:
+                    if resp.status >= 400:
+                        logger.warning(f"Flow webhook {action['url']} returned {resp.status}")
+        except Exception as e:
+            logger.warning(f"Flow webhook {action['url']} failed: {e}")
@@ -0,0 +1,209 @@
+"""
+Pool of OpenAI-compatible LLM endpoints with latency-aware routing.
+
+A provider can be served by several boxes (e.g. one Ollama per GPU). Each
+endpoint tracks an EWMA of its time-to-first-token and the number of
+generations in flight; a turn goes to the endpoint with the lowest
+``ewma_ttft * (1 + inflight)``. Background probes hit ``/models`` to take
+dead endpoints out of rotation and bring them back when they recover.
+
+``pooled_chat`` wraps one turn: if the first token doesn't arrive within
+the deadline it abandons that endpoint and retries on the next one, and
+finally on the fallback model, before anything has been spoken.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Optional, List, Callable, Any, AsyncIterator, Tuple
+
+logger = logging.getLogger("tron.voice.llm_pool")
+
+EWMA_ALPHA = 0.3
+# Assumed TTFT for endpoints with no observations yet
+DEFAULT_TTFT = 1.0
+PROBE_INTERVAL_SECONDS = 10.0
+PROBE_TIMEOUT_SECONDS = 3.0
+# Consecutive failures before an endpoint is taken out of rotation
+MAX_FAILURES = 2
+
+
+class Endpoint:
+    """One OpenAI-compatible base URL and its live routing stats."""
+
+    def __init__(self, base_url: Optional[str], api_key: str):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.ewma_ttft: Optional[float] = None
+        self.inflight = 0
+        self.healthy = True
+        self.failures = 0
+
+    def score(self) -> float:
+        if not self.healthy:
+            return float("inf")
+        return (self.ewma_ttft or DEFAULT_TTFT) * (1 + self.inflight)
+
+    def _update_ewma(self, seconds: float):
+        if self.ewma_ttft is None:
+            self.ewma_ttft = seconds
+        else:
+            self.ewma_ttft = EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.ewma_ttft
+
+    def observe_ttft(self, seconds: float):
+        self.failures = 0
+        self.healthy = True
+        self._update_ewma(seconds)
+
+    def fail(self, penalty: Optional[float] = None):
+        """Record a failed or too-slow generation (``penalty`` = seconds it cost)."""
+        if penalty is not None:
+            self._update_ewma(penalty)
+        self.failures += 1
+        if self.failures >= MAX_FAILURES:
+            if self.healthy:
+                logger.warning(f"LLM endpoint {self.base_url or 'default'} out of rotation")
+            self.healthy = False
+
+    def __repr__(self) -> str:
+        ttft = f"{self.ewma_ttft:.2f}s" if self.ewma_ttft is not None else "n/a"
+        return f"<Endpoint {self.base_url or 'default'} ttft={ttft} inflight={self.inflight} healthy={self.healthy}>"
+
+
+class EndpointPool:
+    """Endpoints serving one provider, ranked per request."""
+
+    def __init__(self, base_urls: List[Optional[str]], api_key: str):
+        self.endpoints = [Endpoint(url, api_key) for url in base_urls] or [Endpoint(None, api_key)]
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def ranked(self) -> List[Endpoint]:
+        """Healthy endpoints best-first; unhealthy ones last as a last resort."""
+        return sorted(self.endpoints, key=lambda e: (not e.healthy, e.score()))
+
+    def start_probes(self, registry, interval: float = PROBE_INTERVAL_SECONDS):
+        """Start background health checks (idempotent)."""
+        if len(self.endpoints) < 2:
+            return
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop(registry, interval))
+
+    async def _probe_loop(self, registry, interval: float):
+        while True:
+            await asyncio.gather(*(self._probe(registry, e) for e in self.endpoints))
+            await asyncio.sleep(interval)
+
+    async def _probe(self, registry, endpoint: Endpoint):
+        client = registry.openai_client(endpoint.base_url, endpoint.api_key)
+        try:
+            await asyncio.wait_for(client.models.list(), PROBE_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if endpoint.healthy:
+                logger.warning(f"LLM endpoint {endpoint.base_url} failed health check: {e}")
+            endpoint.healthy = False
+            return
+        if not endpoint.healthy:
+            logger.info(f"LLM endpoint {endpoint.base_url} back in rotation")
+        endpoint.healthy = True
+        endpoint.failures = 0
+
+    def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+
+def attempt_plan(pool: EndpointPool, model: str, fallback_model: str = "") -> List[Tuple[Optional[Endpoint], str]]:
+    """
+    (endpoint, model) attempts for one turn: every endpoint, then the fallback
+    model on an endpoint chosen when it is reached (``None`` here).
+    """
+    ranked = pool.ranked()
+    plan: List[Tuple[Optional[Endpoint], str]] = [(e, model) for e in ranked]
+    if fallback_model and fallback_model != model:
+        plan.append((None, fallback_model))
+    return plan
+
+
+def _fallback_endpoint(candidates: List[Endpoint], avoid: List[Endpoint]) -> Endpoint:
+    """Best endpoint right now, skipping ``avoid`` when there is a choice."""
+    ranked = sorted(candidates, key=lambda e: (not e.healthy, e.score()))
+    others = [e for e in ranked if e not in avoid]
+    return (others or ranked)[0]
+
+
+async def pooled_chat(
+    plan: List[Tuple[Optional[Endpoint], str]],
+    get_llm: Callable[[Endpoint, str], Any],
+    chat_kwargs: dict,
+    conn_options,
+    first_token_deadline: float,
+    on_first_token: Optional[Callable[[], None]] = None,
+) -> AsyncIterator:
+    """
+    Stream chunks for one turn over ``plan``. Every attempt but the last must
+    produce its first chunk within ``first_token_deadline``; after the first
+    chunk the turn is committed to that endpoint.
+    """
+    endpoints = [e for e, _ in plan if e is not None]
+    errored: List[Endpoint] = []
+    timed_out: Optional[Endpoint] = None
+    for i, (endpoint, model) in enumerate(plan):
+        last = i == len(plan) - 1
+        if endpoint is None:
+            # Ranked now, after this turn's penalties; skip endpoints that
+            # errored this turn and the one that just timed out
+            endpoint = _fallback_endpoint(endpoints, errored + [timed_out])
+        llm = get_llm(endpoint, model)
+        options = conn_options
+        if not last and conn_options is not None:
+            # The deadline is the retry policy for non-final attempts
+            options = dataclasses.replace(conn_options, max_retry=0)
+        kwargs = dict(chat_kwargs)
+        if options is not None:
+            kwargs["conn_options"] = options
+
+        endpoint.inflight += 1
+        started = time.monotonic()
+        stream = llm.chat(**kwargs)
+        try:
+            chunks = stream.__aiter__()
+            try:
+                if last:
+                    first = await chunks.__anext__()
+                else:
+                    first = await asyncio.wait_for(chunks.__anext__(), first_token_deadline)
+            except StopAsyncIteration:
+                endpoint.observe_ttft(time.monotonic() - started)
+                return
+            except asyncio.TimeoutError:
+                endpoint.fail(penalty=first_token_deadline * 2)
+                timed_out = endpoint
+                logger.warning(
+                    f"No first token from {endpoint.base_url or 'default'} ({model}) "
+                    f"within {first_token_deadline}s, failing over"
+                )
+                continue
+            except Exception as e:
+                endpoint.fail()
+                errored.append(endpoint)
+                if last:
+                    raise
+                logger.warning(f"LLM endpoint {endpoint.base_url or 'default'} ({model}) failed, failing over: {e}")
+                continue
+
+            endpoint.observe_ttft(time.monotonic() - started)
+            if on_first_token is not None:
+                on_first_token()
+            yield first
+            async for chunk in chunks:
+                yield chunk
+            return
+        finally:
+            endpoint.inflight -= 1
+            try:
+                await stream.aclose()
+            except Exception:
+                pass
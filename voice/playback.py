@@ -0,0 +1,90 @@
+"""
+Playback of cached TTS clips into a LiveKit room.
+
+Scripted audio goes through ``core.tts_cache``: a hit is replayed as PCM
+frames via ``session.say(text, audio=...)`` with no TTS round trip; a miss is
+synthesized once with the call's TTS plugin and stored for every later call.
+"""
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+
+from tron.core.tts_cache import CachedAudio, cache_key, get_tts_cache, voice_params
+
+logger = logging.getLogger("tron.voice.playback")
+
+FRAME_MS = 20
+
+
+async def synthesize_clip(tts, text: str) -> Optional[CachedAudio]:
+    """Synthesize ``text`` with a LiveKit TTS plugin into one PCM clip."""
+    if tts is None or not text:
+        return None
+    chunks = []
+    sample_rate = num_channels = None
+    async with tts.synthesize(text) as stream:
+        async for ev in stream:
+            frame = ev.frame
+            sample_rate = sample_rate or frame.sample_rate
+            num_channels = num_channels or frame.num_channels
+            chunks.append(bytes(frame.data))
+    if not chunks:
+        return None
+    return CachedAudio(pcm=b"".join(chunks), sample_rate=sample_rate, num_channels=num_channels)
+
+
+async def cached_clip(tts, text: str, config: Dict[str, Any], key: Optional[str] = None) -> Optional[CachedAudio]:
+    """
+    Clip for ``text`` in the agent's voice — from cache, else synthesized and
+    stored. ``key`` is the precomputed cache key, when the caller has it.
+    """
+    if not text:
+        return None
+    key = key or cache_key(text, **voice_params(config))
+    return await get_tts_cache().get_or_synthesize(key, lambda: synthesize_clip(tts, text))
+
+
+async def clip_frames(audio: CachedAudio):
+    """Yield ``audio`` as 20 ms ``rtc.AudioFrame``s."""
+    from livekit import rtc
+
+    bytes_per_sample = 2 * audio.num_channels
+    step = audio.sample_rate * FRAME_MS // 1000 * bytes_per_sample
+    pcm = audio.pcm
+    for i in range(0, len(pcm), step):
+        chunk = pcm[i:i + step]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=audio.sample_rate,
+            num_channels=audio.num_channels,
+            samples_per_channel=len(chunk) // bytes_per_sample,
+        )
+
+
+async def say_cached(session, tts, text: str, config: Dict[str, Any], synthesize: bool = True,
+                     key: Optional[str] = None, **kwargs):
+    """
+    ``session.say`` using cached audio when possible, live TTS otherwise.
+    With ``synthesize=False`` a cache miss is spoken live right away and the
+    clip is stored in the background for next time.
+    """
+    try:
+        if synthesize:
+            clip = await cached_clip(tts, text, config, key=key)
+        else:
+            clip = await get_tts_cache().get(key or cache_key(text, **voice_params(config)))
+            if clip is None:
+                asyncio.create_task(_store_clip(tts, text, config))
+    except Exception as e:
+        logger.warning(f"Cached TTS unavailable, speaking live: {e}")
+        clip = None
+    if clip is not None:
+        return session.say(text, audio=clip_frames(clip), **kwargs)
+    return session.say(text, **kwargs)
+
+
+async def _store_clip(tts, text: str, config: Dict[str, Any]):
+    try:
+        await cached_clip(tts, text, config)
+    except Exception as e:
+        logger.warning(f"Background TTS caching failed for {text[:40]!r}: {e}")
@@ -0,0 +1,252 @@
+"""
+Per-agent semantic response cache.
+
+Campaign callers ask the same few questions ("kitna price hai?", "aap kaun
+bol rahe ho?") thousands of times. When an agent opts in, the worker keeps
+the agent's recent answers keyed by the normalized previous agent line (the
+context the question was asked in) plus a local embedding of the caller's
+utterance. A new turn whose utterance is similar enough to a cached one in
+the same context is answered from the cache — text and TTS clip — without an
+LLM round trip.
+
+The cache is shared by every call of the agent, but each call's prompt ends
+with that contact's name and metadata. Answers that mention any of those
+values (the name or its parts, metadata strings, numbers by their digits)
+are never stored, so one caller's details can't be replayed to another.
+
+Enabled per agent with ``"response_cache"`` in ``tools_enabled``; tuned with
+``guardrails["response_cache"]``::
+
+    {"threshold": 0.88, "ttl_seconds": 86400, "max_entries": 500}
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+from tron.core.embedding import normalize_text, embed, cosine
+
+logger = logging.getLogger("tron.voice.response_cache")
+
+TOOL_NAME = "response_cache"
+
+DEFAULT_THRESHOLD = 0.88
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+# Long answers are usually specific to the caller; don't replay them
+MAX_RESPONSE_CHARS = 400
+
+
+@dataclass
+class CacheSettings:
+    threshold: float = DEFAULT_THRESHOLD
+    ttl_seconds: float = DEFAULT_TTL_SECONDS
+    max_entries: int = DEFAULT_MAX_ENTRIES
+
+
+def cache_settings(config: Dict[str, Any]) -> Optional[CacheSettings]:
+    """Cache settings for an agent config, or None when the agent hasn't opted in."""
+    if TOOL_NAME not in (config.get('tools_enabled') or []):
+        return None
+    guardrails = config.get('guardrails') or {}
+    params = guardrails.get(TOOL_NAME) if isinstance(guardrails, dict) else None
+    params = params if isinstance(params, dict) else {}
+    return CacheSettings(
+        threshold=float(params.get('threshold', DEFAULT_THRESHOLD)),
+        ttl_seconds=float(params.get('ttl_seconds', DEFAULT_TTL_SECONDS)),
+        max_entries=int(params.get('max_entries', DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def context_key(previous_agent_line: str) -> str:
+    """Bucket for entries asked after the same agent line."""
+    return hashlib.sha1(normalize_text(previous_agent_line).encode("utf-8")).hexdigest()[:16]
+
+
+def contact_values(contact_name: Optional[str] = None, contact_metadata: Any = None) -> List[str]:
+    """Normalized words and digit runs the contact puts into the prompt."""
+    raw: List[str] = []
+
+    def _collect(value):
+        if isinstance(value, dict):
+            for v in value.values():
+                _collect(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                _collect(v)
+        elif value is not None and not isinstance(value, bool):
+            raw.append(str(value))
+
+    _collect(contact_name)
+    _collect(contact_metadata)
+    values = set()
+    for text in raw:
+        # "1,50,000" and "150000" are the same amount
+        values.update(re.findall(r"\d{2,}", text.replace(",", "")))
+        norm = normalize_text(re.sub(r"\d", " ", text))
+        if len(norm) >= 3:
+            values.add(norm)
+        values.update(word for word in norm.split(" ") if len(word) >= 3)
+    return sorted(values)
+
+
+def mentions_any(text: str, values: List[str]) -> bool:
+    """Whether ``text`` contains any of ``contact_values`` as a whole word or number."""
+    if not values:
+        return False
+    words = f" {normalize_text(text)} "
+    numbers = set(re.findall(r"\d+", (text or "").replace(",", "")))
+    return any(v in numbers if v.isdigit() else f" {v} " in words for v in values)
+
+
+class _Entry:
+    __slots__ = ("utterance", "vector", "response", "created", "hits")
+
+    def __init__(self, utterance: str, vector: Dict[int, float], response: str):
+        self.utterance = utterance
+        self.vector = vector
+        self.response = response
+        self.created = time.monotonic()
+        self.hits = 0
+
+
+class ResponseCache:
+    """TTL + LRU cache of one agent's answers, searched by utterance similarity."""
+
+    def __init__(self, settings: CacheSettings, version: str = ""):
+        self.settings = settings
+        self.version = version
+        # (context, normalized utterance) → entry, oldest first
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return now - entry.created > self.settings.ttl_seconds
+
+    def lookup(self, context: str, utterance: str) -> Optional[Tuple[str, float]]:
+        """Best cached (response, similarity) for ``utterance`` in ``context`` above threshold."""
+        vector = embed(utterance)
+        if not vector:
+            return None
+        now = time.monotonic()
+        best_key, best_score = None, 0.0
+        for key, entry in list(self._entries.items()):
+            if self._expired(entry, now):
+                del self._entries[key]
+                continue
+            if key[0] != context:
+                continue
+            score = cosine(vector, entry.vector)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is None or best_score < self.settings.threshold:
+            self.misses += 1
+            return None
+        entry = self._entries[best_key]
+        entry.hits += 1
+        self._entries.move_to_end(best_key)
+        self.hits += 1
+        return entry.response, best_score
+
+    def store(self, context: str, utterance: str, response: str):
+        response = (response or "").strip()
+        norm = normalize_text(utterance)
+        if not norm or not response or len(response) > MAX_RESPONSE_CHARS:
+            return
+        key = (context, norm)
+        self._entries.pop(key, None)
+        self._entries[key] = _Entry(norm, embed(norm), response)
+        while len(self._entries) > self.settings.max_entries:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+_caches: Dict[str, ResponseCache] = {}
+
+
+def get_response_cache(config: Dict[str, Any]) -> Optional[ResponseCache]:
+    """This process's cache for the agent, reset whenever the agent is edited."""
+    settings = cache_settings(config)
+    agent_id = config.get('agent_id')
+    if settings is None or not agent_id:
+        _caches.pop(agent_id, None)
+        return None
+    version = config.get('agent_version', '')
+    cache = _caches.get(agent_id)
+    if cache is None or cache.version != version:
+        # Persona / prompt changes make old answers wrong
+        cache = _caches[agent_id] = ResponseCache(settings, version)
+    return cache
+
+
+class CallResponseCache:
+    """
+    Glue between one call's ``AgentSession`` and the agent's cache: looks up
+    each finished user turn and remembers the LLM answer on a miss.
+    """
+
+    def __init__(self, cache: ResponseCache, private_values: Optional[List[str]] = None):
+        self.cache = cache
+        # This caller's details (see contact_values): answers quoting them stay out of the cache
+        self.private_values = private_values or []
+        self.served = 0
+        self.withheld = 0
+        self._pending: Optional[Tuple[str, str]] = None
+
+    def attach(self, session):
+        session.on("conversation_item_added", self._on_item)
+
+    def lookup(self, turn_ctx, utterance: str) -> Optional[str]:
+        """Cached answer for this turn, or None (and remember the turn to learn from)."""
+        context = context_key(_last_agent_line(turn_ctx))
+        hit = self.cache.lookup(context, utterance)
+        if hit is None:
+            self._pending = (context, utterance)
+            return None
+        self._pending = None
+        self.served += 1
+        response, score = hit
+        logger.debug(f"Response cache hit ({score:.2f}) for {utterance[:40]!r}")
+        return response
+
+    def _on_item(self, ev):
+        item = ev.item
+        if getattr(item, "role", None) != "assistant" or self._pending is None:
+            return
+        context, utterance = self._pending
+        self._pending = None
+        if getattr(item, "interrupted", False):
+            return
+        response = getattr(item, "text_content", "") or ""
+        if mentions_any(response, self.private_values):
+            self.withheld += 1
+            return
+        self.cache.store(context, utterance, response)
+
+
+def _last_agent_line(turn_ctx) -> str:
+    items: List = list(getattr(turn_ctx, "items", []) or [])
+    for item in reversed(items):
+        if getattr(item, "role", None) == "assistant":
+            return getattr(item, "text_content", "") or ""
+    return ""
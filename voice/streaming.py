@@ -0,0 +1,162 @@
+"""
+Sentence/clause-level streaming from LLM tokens into TTS.
+
+The default pipeline hands Sarvam (a non-streaming TTS) whole English
+sentences found by blingfire, which knows nothing about the Devanagari danda
+and rarely splits Hinglish replies early. ``ClauseSegmenter`` cuts the token
+stream on Hindi/English sentence ends (``।`` ``॥`` ``?`` ``!`` ``.``) and on
+clause marks (``,`` ``;`` ``:`` ``—``) once a clause is long enough to sound
+natural. ``synthesize_segments`` starts synthesizing each segment the moment
+it is complete and plays segment N while N+1.. are still being generated and
+synthesized, so the caller hears the first clause instead of waiting for the
+whole reply.
+"""
+import asyncio
+import logging
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+logger = logging.getLogger("tron.voice.streaming")
+
+SENTENCE_ENDS = "।॥?!"
+CLAUSE_MARKS = ",;:—"
+
+# Segments synthesized ahead of the one currently playing
+DEFAULT_LOOKAHEAD = 2
+
+
+class ClauseSegmenter:
+    """
+    Incremental text segmenter. ``push`` LLM deltas, get back finished segments;
+    ``flush`` returns whatever is left when the stream ends.
+    """
+
+    def __init__(self, min_clause_chars: int = 24, max_chars: int = 220, first_min_chars: int = 12):
+        self.min_clause_chars = min_clause_chars
+        self.max_chars = max_chars
+        # The first segment may be cut shorter: it gates time-to-first-audio
+        self.first_min_chars = first_min_chars
+        self._buf = ""
+        self._emitted = 0
+
+    def _clause_min(self) -> int:
+        return self.first_min_chars if self._emitted == 0 else self.min_clause_chars
+
+    def _boundary(self) -> int:
+        """Index just past the first usable boundary in the buffer, or -1."""
+        buf = self._buf
+        n = len(buf)
+        for i, ch in enumerate(buf):
+            if ch in SENTENCE_ENDS or ch == "\n":
+                return i + 1
+            if ch == ".":
+                # Need the next char to tell "ok." from "2.5" / "Rs.500"
+                if i + 1 >= n:
+                    return -1
+                nxt = buf[i + 1]
+                if nxt.isspace() and not (i > 0 and buf[i - 1].isdigit() and i + 2 < n and buf[i + 2].isdigit()):
+                    return i + 1
+            elif ch in CLAUSE_MARKS and i + 1 >= self._clause_min():
+                # Don't split "1,50,000" style numbers
+                if i + 1 < n and buf[i + 1].isdigit():
+                    continue
+                if i + 1 >= n:
+                    return -1
+                return i + 1
+        if n >= self.max_chars:
+            cut = buf.rfind(" ", 0, self.max_chars)
+            return cut + 1 if cut > 0 else self.max_chars
+        return -1
+
+    def push(self, delta: str) -> List[str]:
+        self._buf += delta
+        out = []
+        while True:
+            cut = self._boundary()
+            if cut <= 0:
+                break
+            segment = self._buf[:cut].strip()
+            self._buf = self._buf[cut:]
+            if segment:
+                out.append(segment)
+                self._emitted += 1
+        return out
+
+    def flush(self) -> List[str]:
+        segment = self._buf.strip()
+        self._buf = ""
+        if segment:
+            self._emitted += 1
+            return [segment]
+        return []
+
+
+async def segment_stream(text: AsyncIterable[str], segmenter: Optional[ClauseSegmenter] = None) -> AsyncIterator[str]:
+    """Re-chunk a stream of LLM deltas into speakable segments."""
+    segmenter = segmenter or ClauseSegmenter()
+    async for delta in text:
+        for segment in segmenter.push(delta):
+            yield segment
+    for segment in segmenter.flush():
+        yield segment
+
+
+async def _synthesize_into(tts, text: str, out: asyncio.Queue, conn_options=None):
+    """Synthesize one segment, pushing frames to ``out`` as they arrive; ``None`` ends."""
+    try:
+        kwargs = {"conn_options": conn_options} if conn_options is not None else {}
+        async with tts.synthesize(text, **kwargs) as stream:
+            async for ev in stream:
+                await out.put(ev.frame)
+    except Exception as e:
+        logger.warning(f"TTS failed for segment {text[:40]!r}: {e}")
+    finally:
+        await out.put(None)
+
+
+async def synthesize_segments(
+    tts,
+    segments: AsyncIterable[str],
+    lookahead: int = DEFAULT_LOOKAHEAD,
+    conn_options=None,
+) -> AsyncIterator:
+    """
+    Yield audio frames for ``segments`` in order, synthesizing up to
+    ``lookahead`` upcoming segments while the current one plays.
+    """
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(1, lookahead))
+    tasks = []
+
+    async def _produce():
+        cancelled = False
+        try:
+            async for segment in segments:
+                frames: asyncio.Queue = asyncio.Queue()
+                tasks.append(asyncio.create_task(_synthesize_into(tts, segment, frames, conn_options)))
+                await pending.put(frames)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Cancelled means the consumer is gone: nobody would read the end
+            # marker, and waiting for room in a full queue would never return
+            if not cancelled:
+                await pending.put(None)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        while True:
+            frames = await pending.get()
+            if frames is None:
+                break
+            while True:
+                frame = await frames.get()
+                if frame is None:
+                    break
+                yield frame
+        await producer
+    finally:
+        # Interrupted or finished: stop generating and synthesizing
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(producer, *tasks, return_exceptions=True)
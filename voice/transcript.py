@@ -0,0 +1,101 @@
+"""
+Worker-side transcript writer.
+
+Finalized user/agent utterances are buffered and flushed to the
+``transcript_segments`` table roughly once a second in a single multi-row
+insert, so a long call never rewrites a large JSON blob and at most about a
+second of transcript is lost if the worker dies.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger("tron.voice.transcript")
+
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+class TranscriptWriter:
+    """Batches transcript segments for one call."""
+
+    def __init__(self, call_id: str, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.call_id = call_id
+        self.flush_interval = flush_interval
+        self.segments: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, session):
+        session.on("conversation_item_added", self._on_item)
+
+    def start(self):
+        if self._task is None and self.call_id:
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, role: str, text: str):
+        text = (text or "").strip()
+        if not text:
+            return
+        seg = {
+            "call_id": self.call_id,
+            "seq": len(self.segments),
+            "role": role,
+            "text": text,
+            "created_at": datetime.utcnow(),
+        }
+        self.segments.append(seg)
+        self._pending.append(seg)
+
+    def _on_item(self, ev):
+        item = ev.item
+        role = getattr(item, "role", None)
+        if role in ("user", "assistant"):
+            self.add(role, getattr(item, "text_content", "") or "")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending or not self.call_id:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            from tron.core.database import get_session_factory
+            from tron.core.transcripts import append_segments
+
+            factory = await get_session_factory()
+            async with factory() as db:
+                await append_segments(db, batch)
+                await db.commit()
+        except asyncio.CancelledError:
+            # Stopped mid-write: the finalizer skips seqs that did land
+            self._pending = batch + self._pending
+            raise
+        except Exception as e:
+            # Keep the batch for the next flush rather than dropping it
+            logger.warning(f"Transcript flush failed for call {self.call_id}: {e}")
+            self._pending = batch + self._pending
+
+    async def stop(self):
+        """Stop the flush loop, leaving unflushed segments in place."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def take_pending(self) -> List[Dict[str, Any]]:
+        """Stop flushing and hand over the unwritten tail (the finalizer writes it)."""
+        await self.stop()
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def aclose(self):
+        """Stop the flush loop and write whatever is left."""
+        await self.stop()
+        await self.flush()
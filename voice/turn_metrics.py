@@ -0,0 +1,174 @@
+"""
+Per-turn latency instrumentation for voice calls.
+
+For every user turn the tracker records, relative to the moment the caller
+stopped speaking (end of speech):
+
+    eou              end-of-turn decided (endpointing delay)
+    stt_final        final transcript available
+    llm_first_token  first LLM token
+    llm_done         LLM generation finished
+    tts_first_byte   first synthesized audio
+    playout_start    agent audio starts playing in the room
+    interrupted      caller barged in while the agent was speaking
+    prompt_tokens    tokens sent to the LLM for the turn (not a time)
+    cached_tokens    of those, tokens the server served from its prompt cache
+
+Turns are stored compactly as rows of integer milliseconds, ordered as
+``TURN_FIELDS`` (``None`` where a stage did not happen), in the
+``call_latency`` table, one row per call (written by the end-of-call
+finalizer).
+"""
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from tron.core.database import LATENCY_TURN_FIELDS as TURN_FIELDS
+
+logger = logging.getLogger("tron.voice.turn_metrics")
+
+
+class _Turn:
+    __slots__ = ("speech_end", "eou", "stt_final", "llm_first_token", "llm_done",
+                 "tts_first_byte", "playout_start", "interrupted", "prompt_tokens",
+                 "cached_tokens")
+
+    def __init__(self, speech_end: float):
+        self.speech_end = speech_end
+        self.eou = self.stt_final = self.llm_first_token = self.llm_done = None
+        self.tts_first_byte = self.playout_start = None
+        self.interrupted = False
+        self.prompt_tokens: Optional[int] = None
+        self.cached_tokens: Optional[int] = None
+
+    def row(self) -> List[Optional[int]]:
+        def _ms(t: Optional[float]) -> Optional[int]:
+            return None if t is None else max(0, int(round((t - self.speech_end) * 1000)))
+        return [
+            _ms(self.eou),
+            _ms(self.stt_final),
+            _ms(self.llm_first_token),
+            _ms(self.llm_done),
+            _ms(self.tts_first_byte),
+            _ms(self.playout_start),
+            1 if self.interrupted else 0,
+            self.prompt_tokens,
+            self.cached_tokens,
+        ]
+
+
+class LLMTiming:
+    """LLM timings reported directly by the agent's ``llm_node``."""
+
+    def __init__(self, tracker: "TurnTracker"):
+        self._tracker = tracker
+        self._turn = tracker._current
+        self.started = time.time()
+        self.first_token_at: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.cached_tokens: Optional[int] = None
+
+    def first_token(self):
+        self.first_token_at = time.time()
+
+    def done(self):
+        turn = self._turn
+        if turn is None or turn.llm_done is not None:
+            return
+        turn.llm_first_token = self.first_token_at
+        turn.llm_done = time.time()
+        if self.prompt_tokens is not None:
+            turn.prompt_tokens = self.prompt_tokens
+            self._tracker.prompt_tokens.append(self.prompt_tokens)
+        if self.cached_tokens is not None:
+            turn.cached_tokens = self.cached_tokens
+            self._tracker.cached_tokens.append(self.cached_tokens)
+
+
+class TurnTracker:
+    """Collects per-turn timings from an ``AgentSession``'s events."""
+
+    def __init__(self):
+        self.turns: List[List[Optional[int]]] = []
+        self.prompt_tokens: List[int] = []
+        self.cached_tokens: List[int] = []
+        self._current: Optional[_Turn] = None
+        self._agent_speaking = False
+        # Set once llm_node reports timings itself; LLMMetrics from shared
+        # LLM instances can belong to other calls in the same process
+        self._direct_llm = False
+
+    def attach(self, session):
+        session.on("metrics_collected", self._on_metrics)
+        session.on("agent_state_changed", self._on_agent_state)
+        session.on("user_state_changed", self._on_user_state)
+
+    # ── Event handlers ──
+
+    def _on_metrics(self, ev):
+        metrics = ev.metrics
+        kind = type(metrics).__name__
+        if kind == "EOUMetrics":
+            self._close_turn()
+            speech_end = getattr(metrics, "last_speaking_time", None) or (
+                metrics.timestamp - metrics.end_of_utterance_delay
+            )
+            turn = _Turn(speech_end)
+            turn.eou = speech_end + metrics.end_of_utterance_delay
+            turn.stt_final = speech_end + metrics.transcription_delay
+            self._current = turn
+        elif self._current is None:
+            return
+        elif kind == "LLMMetrics":
+            if not self._direct_llm and self._current.llm_done is None:
+                started = metrics.timestamp - metrics.duration
+                self._current.llm_first_token = started + metrics.ttft
+                self._current.llm_done = metrics.timestamp
+                self._current.prompt_tokens = metrics.prompt_tokens
+                self.prompt_tokens.append(metrics.prompt_tokens)
+                self._current.cached_tokens = metrics.prompt_cached_tokens
+                self.cached_tokens.append(metrics.prompt_cached_tokens)
+        elif kind == "TTSMetrics":
+            if self._current.tts_first_byte is None:
+                started = metrics.timestamp - metrics.duration
+                self._current.tts_first_byte = started + metrics.ttfb
+
+    def _on_agent_state(self, ev):
+        self._agent_speaking = ev.new_state == "speaking"
+        if self._agent_speaking and self._current is not None and self._current.playout_start is None:
+            self._current.playout_start = getattr(ev, "created_at", None) or time.time()
+
+    def _on_user_state(self, ev):
+        if ev.new_state == "speaking" and self._agent_speaking and self._current is not None:
+            self._current.interrupted = True
+
+    def _close_turn(self):
+        if self._current is not None:
+            self.turns.append(self._current.row())
+            self._current = None
+
+    def llm_started(self) -> LLMTiming:
+        """Timing handle for one LLM generation of the current turn."""
+        self._direct_llm = True
+        return LLMTiming(self)
+
+    # ── Results ──
+
+    def finish(self) -> List[List[Optional[int]]]:
+        """Close the open turn and return all turn rows."""
+        self._close_turn()
+        return self.turns
+
+    def record(self, call_id: str, agent_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values for a ``CallLatencyModel`` row."""
+        turns = self.finish()
+        return {
+            "call_id": call_id,
+            "agent_id": agent_config.get("agent_id") or None,
+            "llm_provider": agent_config.get("llm_provider") or "ollama",
+            "llm_model": agent_config.get("llm_model") or "",
+            "tts_model": agent_config.get("voice_model") or "",
+            "turn_count": len(turns),
+            "turns": turns,
+        }
+
@@ -27,7 +27,12 @@ export default function LiveMonitor() {
     async function fetchActive() {
       try {
         const res = await api.get('/calls/active') as any[]
-        setCalls(res || [])
+        // Keep the transcript tails already received over the WebSocket
+        setCalls(prev => (res || []).map(c => {
+          const call_id = c.call_id ?? c.id
+          const tail = prev.find(p => p.call_id === call_id)?.transcript_tail || []
+          return { ...c, call_id, transcript_tail: tail }
+        }))
       } catch {}
     }
     fetchActive()
@@ -43,12 +48,12 @@ export default function LiveMonitor() {
     ws.onmessage = evt => {
       try {
         const msg = JSON.parse(evt.data)
-        if (msg.type === 'ping') { setLastPing(new Date()); return }
-        if (msg.type === 'call_started') {
+        if (msg.event === 'ping') { setLastPing(new Date()); return }
+        if (msg.event === 'call.started' || msg.event === 'call.answered') {
           fetchActive()
-        } else if (msg.type === 'call_ended') {
+        } else if (msg.event === 'call.ended') {
           setCalls(c => c.filter(x => x.call_id !== msg.data?.call_id))
-        } else if (msg.type === 'transcript_update') {
+        } else if (msg.event === 'call.transcript') {
           const { call_id, role, text } = msg.data || {}
           setCalls(prev => prev.map(c => {
             if (c.call_id !== call_id) return c
@@ -45,13 +45,13 @@ export default function TestCall() {
     ws.onmessage = evt => {
       try {
         const msg = JSON.parse(evt.data)
-        if (msg.type === 'transcript_update' && msg.data?.call_id === callId) {
+        if (msg.event === 'call.transcript' && msg.data?.call_id === callId) {
           setTranscript(prev => [...prev, {
             role: msg.data.role,
             text: msg.data.text,
             ts: Date.now(),
           }])
-        } else if (msg.type === 'call_ended' && msg.data?.call_id === callId) {
+        } else if (msg.event === 'call.ended' && msg.data?.call_id === callId) {
           setStatus('Call ended')
           setCalling(false)
         }